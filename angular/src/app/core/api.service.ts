@@ -1,5 +1,6 @@
 import { Injectable, inject } from '@angular/core';
 import { HttpClient } from '@angular/common/http';
+import { catchError } from 'rxjs';
 import { environment } from '../../environments/environment';
 
 @Injectable({ providedIn: 'root' })
@@ -33,12 +34,19 @@ export class ApiService {
   deleteIngredient(slug: string, id: number) { return this.http.delete(`${this.base}/restaurants/${slug}/ingredients/${id}`); }
   uploadIngredientImage(slug: string, id: number, file: File) { const fd = new FormData(); fd.append('file', file); return this.http.post(`${this.base}/restaurants/${slug}/ingredients/${id}/image`, fd); }
 
-  listProducts(slug: string) { return this.http.get(`${this.base}/restaurants/${slug}/products`); }
+  listProducts(slug: string, params: any = {}) { return this.http.get<any[]>(`${this.base}/restaurants/${slug}/products`, { params, observe: 'response' }); }
   createProduct(slug: string, data: any) { return this.http.post(`${this.base}/restaurants/${slug}/products`, data); }
   updateProduct(slug: string, id: number, data: any) { return this.http.put(`${this.base}/restaurants/${slug}/products/${id}`, data); }
   deleteProduct(slug: string, id: number) { return this.http.delete(`${this.base}/restaurants/${slug}/products/${id}`); }
   uploadProductImage(slug: string, id: number, file: File) { const fd = new FormData(); fd.append('file', file); return this.http.post(`${this.base}/restaurants/${slug}/products/${id}/image`, fd); }
 
-  digitalMenu(slug: string) { return this.http.get(`${this.base}/public/menu/${slug}`); }
+  // Pre-rendered snapshot served straight from /media (when environment.menuSnapshots);
+  // the live endpoint is the fallback
+  digitalMenu(slug: string) {
+    const live = this.http.get(`${this.base}/public/menu/${slug}`);
+    if (!environment.menuSnapshots) return live;
+    return this.http.get(`/media/menus/${slug}.json`).pipe(catchError(() => live));
+  }
+  searchMenu(slug: string, q: string) { return this.http.get(`${this.base}/public/menu/${slug}/search`, { params: { q } }); }
 }
 
@@ -1,12 +1,13 @@
 import { Component, OnInit, inject } from '@angular/core';
 import { CommonModule } from '@angular/common';
+import { FormsModule } from '@angular/forms';
 import { ApiService } from '../core/api.service';
 import { ActivatedRoute } from '@angular/router';
 
 @Component({
   standalone: true,
   selector: 'app-digital-menu',
-  imports: [CommonModule],
+  imports: [CommonModule, FormsModule],
   template: `
   <section class="w-full p-4 md:p-6 min-h-screen">
     <div *ngIf="unavailable" class="max-w-xl mx-auto text-center py-16">
@@ -35,38 +36,59 @@ import { ActivatedRoute } from '@angular/router';
         <button *ngFor="let c of data?.categories" class="px-3 py-1.5 rounded-full border border-white/10 flex items-center gap-2"
           [style.background]="active===c.id? (data?.setting?.primary_color || '#C9A24B') : 'transparent'" [class.text-black]="active===c.id"
           (click)="active=c.id">
-          <img *ngIf="c.image_path" [src]="c.image_path" class="h-6 w-6 rounded object-cover"/>
+          <img *ngIf="c.image_path" [src]="c.image_path" [attr.srcset]="srcset(c, 'jpeg')" sizes="24px" loading="lazy" class="h-6 w-6 rounded object-cover"/>
           <span>{{c.name}}</span>
         </button>
       </div>
     </div>
 
-    <div *ngFor="let cat of data?.categories" class="mb-8" [hidden]="active && active!==cat.id && active!==0">
+    <input class="w-full max-w-md mb-5 px-3 py-2 rounded bg-black/40 border border-white/10" [(ngModel)]="query" (ngModelChange)="onSearch()" placeholder="Search the menu"/>
+
+    <div *ngIf="query.trim()" class="mb-8">
+      <div *ngIf="!results.length" class="text-white/60 text-sm">No dishes match "{{query}}"</div>
+      <div class="flex flex-wrap gap-3">
+        <ng-container *ngFor="let p of results" [ngTemplateOutlet]="productCard" [ngTemplateOutletContext]="{ $implicit: p }"></ng-container>
+      </div>
+    </div>
+
+    <div *ngFor="let cat of data?.categories" class="mb-8" [hidden]="query.trim() || (active && active!==cat.id && active!==0)">
       <div class="flex items-center gap-3 mb-3">
-        <img *ngIf="cat.image_path" [src]="cat.image_path" class="h-10 w-10 rounded object-cover"/>
+        <picture *ngIf="cat.image_path">
+          <source *ngIf="srcset(cat, 'avif')" type="image/avif" [attr.srcset]="srcset(cat, 'avif')" sizes="40px"/>
+          <source *ngIf="srcset(cat, 'webp')" type="image/webp" [attr.srcset]="srcset(cat, 'webp')" sizes="40px"/>
+          <img [src]="cat.image_path" [attr.srcset]="srcset(cat, 'jpeg')" sizes="40px" loading="lazy" class="h-10 w-10 rounded object-cover"/>
+        </picture>
         <h2 class="text-xl font-display" [style.color]="data?.setting?.primary_color || '#C9A24B'">{{cat.name}}</h2>
       </div>
       <div class="overflow-x-auto pb-2">
         <div class="flex gap-3 min-w-max">
-          <article *ngFor="let p of cat.products" class="lux-card overflow-hidden w-44 h-56 flex-shrink-0 hover:scale-[1.01] transition">
-            <ng-container *ngIf="p.image_path; else placeholderImage">
-              <img [src]="p.image_path" class="w-full h-28 object-cover"/>
-            </ng-container>
-            <ng-template #placeholderImage>
-              <div class="w-full h-28 bg-white/5"></div>
-            </ng-template>
-            <div class="p-3">
-              <div class="min-w-0">
-                <h3 class="font-semibold text-base truncate">{{p.name}}</h3>
-                <div class="text-white/60 text-xs">{{p.price_currency_1 | number:'1.0-0'}} {{data?.setting?.currency_1}} / {{p.price_currency_2 | number:'1.0-0'}} {{data?.setting?.currency_2}}</div>
-              </div>
-              <div class="mt-1 text-xs text-white/70 overflow-hidden text-ellipsis whitespace-nowrap" *ngIf="p.ingredient_names?.length">Ingredients: {{p.ingredient_names.join(', ')}}</div>
-            </div>
-          </article>
+          <ng-container *ngFor="let p of cat.products" [ngTemplateOutlet]="productCard" [ngTemplateOutletContext]="{ $implicit: p }"></ng-container>
         </div>
       </div>
     </div>
     </ng-container>
+
+    <ng-template #productCard let-p>
+      <article class="lux-card overflow-hidden w-44 h-56 flex-shrink-0 hover:scale-[1.01] transition">
+        <ng-container *ngIf="p.image_path; else placeholderImage">
+          <picture>
+            <source *ngIf="srcset(p, 'avif')" type="image/avif" [attr.srcset]="srcset(p, 'avif')" sizes="176px"/>
+            <source *ngIf="srcset(p, 'webp')" type="image/webp" [attr.srcset]="srcset(p, 'webp')" sizes="176px"/>
+            <img [src]="p.image_path" [attr.srcset]="srcset(p, 'jpeg')" sizes="176px" loading="lazy" class="w-full h-28 object-cover"/>
+          </picture>
+        </ng-container>
+        <ng-template #placeholderImage>
+          <div class="w-full h-28 bg-white/5"></div>
+        </ng-template>
+        <div class="p-3">
+          <div class="min-w-0">
+            <h3 class="font-semibold text-base truncate">{{p.name}}</h3>
+            <div class="text-white/60 text-xs">{{p.price_currency_1 | number:'1.0-0'}} {{data?.setting?.currency_1}} / {{p.price_currency_2 | number:'1.0-0'}} {{data?.setting?.currency_2}}</div>
+          </div>
+          <div class="mt-1 text-xs text-white/70 overflow-hidden text-ellipsis whitespace-nowrap" *ngIf="p.ingredient_names?.length">Ingredients: {{p.ingredient_names.join(', ')}}</div>
+        </div>
+      </article>
+    </ng-template>
   </section>
   `
 })
@@ -74,8 +96,14 @@ export class DigitalMenuComponent implements OnInit {
   private api = inject(ApiService);
   private route = inject(ActivatedRoute);
   data: any; active = 0; unavailable = false; message = '';
+  slug = ''; query = ''; results: any[] = []; private searchTimer: any;
+  // Responsive derivatives from the API, e.g. "a_160w.webp 160w, a_480w.webp 480w"; null when none
+  srcset(item: any, format: string): string | null {
+    const list = (item?.image_variants || []).filter((v: any) => v.format === format);
+    return list.length ? list.map((v: any) => `${v.url} ${v.width}w`).join(', ') : null;
+  }
   ngOnInit(): void {
-    const slug = this.route.snapshot.paramMap.get('slug')!;
+    const slug = this.slug = this.route.snapshot.paramMap.get('slug')!;
     this.api.digitalMenu(slug).subscribe((r: any) => {
       if (r?.unavailable) { this.unavailable = true; this.message = r.message || 'Temporarily unavailable'; }
       this.data = r;
@@ -83,6 +111,20 @@ export class DigitalMenuComponent implements OnInit {
     });
   }
 
+  // Matching happens on the server (typos, accents); hits are shown with the products already loaded
+  onSearch(){
+    clearTimeout(this.searchTimer);
+    const q = this.query.trim();
+    if (!q) { this.results = []; return; }
+    this.searchTimer = setTimeout(() => this.api.searchMenu(this.slug, q).subscribe((r: any) => {
+      if (q !== this.query.trim()) return;
+      const byId = new Map<number, any>();
+      for (const c of this.data?.categories || []) for (const p of c.products || []) byId.set(p.id, p);
+      const ids: number[] = (r?.results || []).flatMap((h: any) => h.kind === 'product' ? [h.id] : h.product_ids);
+      this.results = [...new Set(ids)].map(id => byId.get(id)).filter(Boolean);
+    }), 250);
+  }
+
   applyTheme(){
     const s = this.data?.setting;
     if (s?.primary_color) document.documentElement.style.setProperty('--luxury-gold', s.primary_color);
@@ -124,6 +124,10 @@ import { ToastService } from '../shared/toast.service';
         <button class="px-3 py-2 rounded bg-[var(--luxury-gold)] text-black" (click)="saveProduct()">{{prodModel.id? 'Update':'Add'}} product</button>
         <input type="file" (change)="onProductImage($event)" [disabled]="!prodModel.id"/>
       </div>
+      <div class="flex items-center gap-2 text-sm">
+        <input class="px-3 py-2 rounded bg-black/40 border border-white/10" [(ngModel)]="productQuery" (ngModelChange)="reloadProducts()" placeholder="Filter by name"/>
+        <span class="text-white/60">{{products.length}} of {{productTotal}}</span>
+      </div>
       <div class="overflow-auto">
         <table class="min-w-full text-sm">
           <thead class="text-white/60">
@@ -145,6 +149,7 @@ import { ToastService } from '../shared/toast.service';
             </tr>
           </tbody>
         </table>
+        <button *ngIf="productCursor" class="mt-2 text-xs px-2 py-1 bg-white/10 rounded" (click)="loadProducts(productCursor)">Load more</button>
       </div>
     </div>
 
@@ -176,6 +181,9 @@ export class RestaurantWorkspaceComponent implements OnInit {
   categories: any[] = [];
   ingredients: any[] = [];
   products: any[] = [];
+  productQuery = '';
+  productTotal = 0;
+  productCursor: string | null = null;
   catModel: any = { name: '' };
   ingModel: any = { name: '' };
   prodModel: any = { name: '', price_currency_1: 0, category_ids: [], ingredient_ids: [] };
@@ -183,7 +191,17 @@ export class RestaurantWorkspaceComponent implements OnInit {
   ngOnInit(): void { this.slug = this.route.snapshot.paramMap.get('slug')!; this.reloadAll(); }
   reloadAll(){ this.api.getSettings(this.slug).subscribe((r:any)=> this.settings=r); this.reloadTaxonomies(); this.reloadProducts(); }
   reloadTaxonomies(){ this.api.listCategories(this.slug).subscribe((r:any)=> this.categories=r); this.api.listIngredients(this.slug).subscribe((r:any)=> this.ingredients=r); }
-  reloadProducts(){ this.api.listProducts(this.slug).subscribe((r:any)=> this.products=r); }
+  reloadProducts(){ this.loadProducts(null); }
+  loadProducts(cursor: string | null){
+    const params: any = { limit: 100 };
+    if(this.productQuery) params.q = this.productQuery;
+    if(cursor) params.cursor = cursor;
+    this.api.listProducts(this.slug, params).subscribe((r)=>{
+      this.products = cursor ? [...this.products, ...(r.body||[])] : (r.body||[]);
+      this.productTotal = +(r.headers.get('X-Total-Count') || this.products.length);
+      this.productCursor = r.headers.get('X-Next-Cursor');
+    });
+  }
 
   // Settings
   saveSettings(){ this.api.saveSettings(this.slug, this.settings).subscribe((r:any)=>{ this.settings=r; this.toast.success('Settings saved'); }); }
@@ -1,4 +1,6 @@
 export const environment = {
   production: true,
-  apiBase: '/api/v1'
+  apiBase: '/api/v1',
+  // Try /media/menus/{slug}.json before the API; keep in step with MENU_SNAPSHOTS_ENABLED
+  menuSnapshots: true
 };
@@ -1,5 +1,7 @@
 export const environment = {
   production: false,
   apiBase: '/api/v1',
-  api: '/api/v1'
+  api: '/api/v1',
+  // Try /media/menus/{slug}.json before the API; keep in step with MENU_SNAPSHOTS_ENABLED
+  menuSnapshots: true
 };
@@ -0,0 +1,31 @@
+"""image variants
+
+Revision ID: 20261018_000004
+Revises: 20250101_000003
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '20261018_000004'
+down_revision: Union[str, None] = '20250101_000003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Responsive derivatives generated on upload: [{url, width, height, format}]
+    op.add_column('categories', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('products', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('ingredients', sa.Column('image_variants', sa.JSON(), nullable=True))
+    op.add_column('settings', sa.Column('logo_variants', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('settings', 'logo_variants')
+    op.drop_column('ingredients', 'image_variants')
+    op.drop_column('products', 'image_variants')
+    op.drop_column('categories', 'image_variants')
@@ -0,0 +1,102 @@
+"""relative media keys
+
+Revision ID: 20261018_000005
+Revises: 20261018_000004
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+import os
+import re
+from typing import Sequence, Union
+from alembic import context, op
+import sqlalchemy as sa
+
+
+revision: str = '20261018_000005'
+down_revision: Union[str, None] = '20261018_000004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 500
+
+# table -> (primary key, plain path columns, JSON variant columns)
+MEDIA_COLUMNS = {
+    'restaurants': ('id', ['logo_image'], []),
+    'settings': ('id', ['logo_path', 'barcode_image_path'], ['logo_variants']),
+    'categories': ('id', ['image_path'], ['image_variants']),
+    'products': ('id', ['image_path'], ['image_variants']),
+    'ingredients': ('id', ['image_path'], ['image_variants']),
+}
+
+_BLOB = re.compile(r'(?:^|/)(c/[0-9a-f]{32}[^/?#]*)')
+_MEDIA_URL = re.compile(r'^https?://[^/]+(?:/[^?#]*)?/media/([^?#]+)')
+
+
+def to_key(value):
+    # "http://host/media/c/ab12...png" -> "c/ab12...png"; anything unrecognised is kept as is
+    if not value or not isinstance(value, str):
+        return value
+    m = _BLOB.search(value) if value.startswith(('http://', 'https://')) else None
+    if m:
+        return m.group(1)
+    m = _MEDIA_URL.match(value)
+    return m.group(1) if m else value
+
+
+def to_url(value, base):
+    if not value or not isinstance(value, str) or value.startswith(('http://', 'https://', '/')):
+        return value
+    return f"{base}/{value}"
+
+
+def _variants_to_keys(variants):
+    if not variants:
+        return variants
+    return [
+        {'key': to_key(v.get('key') or v.get('url')), 'width': v['width'], 'height': v['height'], 'format': v['format']}
+        for v in variants
+    ]
+
+
+def _variants_to_urls(variants, base):
+    if not variants:
+        return variants
+    return [
+        {'url': to_url(v.get('key') or v.get('url'), base), 'width': v['width'], 'height': v['height'], 'format': v['format']}
+        for v in variants
+    ]
+
+
+def _rewrite(convert_path, convert_variants):
+    # Keyset-paginated batches, each UPDATE committed on its own so no table is locked for long
+    if context.is_offline_mode():
+        raise RuntimeError('This data migration needs a live connection; run it without --sql')
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        for table_name, (pk, paths, variants) in MEDIA_COLUMNS.items():
+            table = sa.table(table_name, sa.column(pk), *[sa.column(c) for c in paths], *[sa.column(c, sa.JSON) for c in variants])
+            key = table.c[pk]
+            last = None
+            while True:
+                query = sa.select(table).order_by(key).limit(BATCH_SIZE)
+                if last is not None:
+                    query = query.where(key > last)
+                rows = bind.execute(query).mappings().all()
+                if not rows:
+                    break
+                last = rows[-1][pk]
+                for row in rows:
+                    changes = {c: convert_path(row[c]) for c in paths if convert_path(row[c]) != row[c]}
+                    changes.update({c: convert_variants(row[c]) for c in variants if convert_variants(row[c]) != row[c]})
+                    if changes:
+                        bind.execute(table.update().where(key == row[pk]).values(**changes))
+
+
+def upgrade() -> None:
+    _rewrite(to_key, _variants_to_keys)
+
+
+def downgrade() -> None:
+    # Older code expects full URLs; rebuild them from the media base (same-origin /media by default)
+    base = (os.environ.get('MEDIA_PUBLIC_BASE_URL') or '/media').rstrip('/')
+    _rewrite(lambda v: to_url(v, base), lambda v: _variants_to_urls(v, base))
@@ -0,0 +1,31 @@
+"""menu documents
+
+Revision ID: 20261018_000006
+Revises: 20261018_000005
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+revision: str = '20261018_000006'
+down_revision: Union[str, None] = '20261018_000005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Denormalized public menu per restaurant; fill it with: python -m app.cli menu-check --repair
+    op.create_table(
+        'menu_documents',
+        sa.Column('restaurant_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('restaurants.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('document', postgresql.JSONB(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('menu_documents')
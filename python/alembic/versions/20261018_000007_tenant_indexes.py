@@ -0,0 +1,58 @@
+"""tenant composite and reverse-lookup indexes
+
+Revision ID: 20261018_000007
+Revises: 20261018_000006
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+
+
+revision: str = '20261018_000007'
+down_revision: Union[str, None] = '20261018_000006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns)
+NEW_INDEXES = [
+    # WHERE restaurant_id = ? ORDER BY name, id (menu, product list keyset)
+    ('ix_products_restaurant_name', 'products', ['restaurant_id', 'name', 'id']),
+    # category/ingredient -> products: list filters, delete_category, FK RESTRICT/CASCADE checks
+    ('ix_product_categories_category_id', 'product_categories', ['category_id', 'product_id']),
+    ('ix_product_ingredients_ingredient_id', 'product_ingredients', ['ingredient_id', 'product_id']),
+]
+
+# Covered by a composite index (or the primary key) with the same leading columns
+REDUNDANT_INDEXES = [
+    ('ix_products_restaurant_id', 'products', ['restaurant_id']),
+    ('ix_categories_restaurant_id', 'categories', ['restaurant_id']),  # uq_category_restaurant_name
+    ('ix_ingredients_restaurant_id', 'ingredients', ['restaurant_id']),  # uq_ingredient_restaurant_name
+]
+REDUNDANT_CONSTRAINTS = [
+    ('uq_product_category', 'product_categories', ['product_id', 'category_id']),
+    ('uq_product_ingredient', 'product_ingredients', ['product_id', 'ingredient_id']),
+]
+
+
+def upgrade() -> None:
+    # CONCURRENTLY keeps the tables writable while the indexes build (needs autocommit)
+    with op.get_context().autocommit_block():
+        for name, table, columns in NEW_INDEXES:
+            op.create_index(name, table, columns, postgresql_concurrently=True, if_not_exists=True)
+        for name, table, _ in REDUNDANT_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    for name, table, _ in REDUNDANT_CONSTRAINTS:
+        op.execute(f'ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {name}')
+    for table in ('products', 'categories', 'ingredients', 'product_categories', 'product_ingredients'):
+        op.execute(f'ANALYZE {table}')
+
+
+def downgrade() -> None:
+    for name, table, columns in REDUNDANT_CONSTRAINTS:
+        op.create_unique_constraint(name, table, columns)
+    for name, table, columns in REDUNDANT_INDEXES:
+        op.create_index(name, table, columns)
+    for name, table, _ in NEW_INDEXES:
+        op.drop_index(name, table_name=table)
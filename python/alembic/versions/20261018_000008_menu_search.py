@@ -0,0 +1,54 @@
+"""menu search trigram indexes
+
+Revision ID: 20261018_000008
+Revises: 20261018_000007
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '20261018_000008'
+down_revision: Union[str, None] = '20261018_000007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TABLES = ('products', 'categories', 'ingredients')
+
+# unaccent() is only STABLE (its dictionary could change), so indexes need an IMMUTABLE wrapper
+# naming the dictionary explicitly. Keep in sync with app.services.search.normalize.
+NORMALIZE = """
+CREATE OR REPLACE FUNCTION menu_search_normalize(text) RETURNS text
+LANGUAGE sql IMMUTABLE STRICT PARALLEL SAFE
+AS $$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, $1)) $$
+"""
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    available = set(bind.execute(sa.text(
+        "SELECT name FROM pg_available_extensions WHERE name IN ('pg_trgm', 'unaccent')"
+    )).scalars())
+    if available != {'pg_trgm', 'unaccent'}:
+        # The API falls back to its in-process index (MENU_SEARCH_BACKEND=auto)
+        print("pg_trgm/unaccent are not available on this server (install postgresql-contrib); skipping menu search indexes")
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA public')
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent WITH SCHEMA public')
+    op.execute(NORMALIZE)
+    with op.get_context().autocommit_block():
+        for table in TABLES:
+            op.execute(
+                f'CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_{table}_name_trgm '
+                f'ON {table} USING gin (menu_search_normalize(name) gin_trgm_ops)'
+            )
+
+
+def downgrade() -> None:
+    # Extensions stay: other objects may depend on them
+    for table in TABLES:
+        op.execute(f'DROP INDEX IF EXISTS ix_{table}_name_trgm')
+    op.execute('DROP FUNCTION IF EXISTS menu_search_normalize(text)')
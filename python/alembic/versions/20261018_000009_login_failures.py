@@ -0,0 +1,33 @@
+"""login failures shared by all workers
+
+Revision ID: 20261018_000009
+Revises: 20261018_000008
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+from alembic import op
+import sqlalchemy as sa
+
+
+revision: str = '20261018_000009'
+down_revision: Union[str, None] = '20261018_000008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Failed logins inside LOGIN_FAILURE_WINDOW_SECONDS; older rows are deleted as new ones arrive
+    op.create_table(
+        'login_failures',
+        sa.Column('id', sa.BigInteger(), primary_key=True),
+        sa.Column('scope', sa.String(length=10), nullable=False),
+        sa.Column('key', sa.Text(), nullable=False),
+        sa.Column('failed_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index('ix_login_failures_scope_key', 'login_failures', ['scope', 'key', 'failed_at'])
+    op.create_index('ix_login_failures_scope_failed_at', 'login_failures', ['scope', 'failed_at'])
+
+
+def downgrade() -> None:
+    op.drop_table('login_failures')
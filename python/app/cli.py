@@ -0,0 +1,129 @@
+import argparse
+import sys
+
+from fastapi import HTTPException
+from sqlalchemy import select
+
+from .core.cache_bus import cache_bus
+from .core.config import settings
+from .core.database import SessionLocal
+from .models.models import Restaurant
+from .services import catalog, media, menu_model, snapshots
+
+
+def cmd_snapshots(args) -> int:
+    if args.purge:
+        print(f"Removed {snapshots.purge_snapshots(args.slug or None)} snapshot file(s)")
+        return 0
+    if not settings.menu_snapshots_enabled:
+        print("MENU_SNAPSHOTS_ENABLED=false: these snapshots will not be kept up to date", file=sys.stderr)
+    count = snapshots.rebuild_all_snapshots(args.slug or None)
+    print(f"Rebuilt {count} menu snapshot(s)")
+    return 1 if args.slug and count < len(args.slug) else 0
+
+
+def cmd_media_gc(args) -> int:
+    with SessionLocal() as db:
+        result = media.collect_garbage(db)
+    print(f"{result['removed']} unreferenced blob(s) removed ({result['files_removed']} files); {result['referenced']} of {result['blobs']} in use")
+    return 0
+
+
+def cmd_menu_check(args) -> int:
+    with SessionLocal() as db:
+        report = menu_model.check_documents(db, args.slug, repair=args.repair)
+        db.commit()
+    for slug, problems in report.items():
+        print(f"{slug}: {len(problems)} problem(s)")
+        for problem in problems[:20]:
+            print(f"  {problem}")
+        if len(problems) > 20:
+            print(f"  ... {len(problems) - 20} more")
+    if not report:
+        print("All menu documents match the catalog tables")
+        return 0
+    if args.repair:
+        print(f"Rebuilt {len(report)} menu document(s)")
+        for slug in report:
+            cache_bus.publish("menu", slug)
+        return 0
+    return 1
+
+
+def _restaurant_id(db, slug: str):
+    rid = db.execute(select(Restaurant.id).where(Restaurant.slug == slug)).scalar()
+    if rid is None:
+        raise SystemExit(f"Unknown restaurant {slug!r}")
+    return rid
+
+
+def cmd_import(args) -> int:
+    fmt = args.format or catalog.guess_format(args.file, None)
+    with SessionLocal() as db, open(args.file, "rb") as f:
+        rid = _restaurant_id(db, args.slug)
+        try:
+            result = catalog.import_catalog(db, rid, f, fmt)
+        except HTTPException as exc:
+            print(f"Import failed: {exc.detail}", file=sys.stderr)
+            return 1
+        menu_model.catalog_changed(db, rid)
+        db.commit()
+    # Running API workers hear about it over CACHE_NOTIFY (when enabled)
+    cache_bus.publish("menu", args.slug)
+    if settings.menu_snapshots_enabled:
+        snapshots.rebuild_snapshot(args.slug)
+    print(
+        f"{result.products_created} product(s) created, {result.products_updated} updated, {result.products_unchanged} unchanged; "
+        f"{result.categories_created} categor(y/ies) and {result.ingredients_created} ingredient(s) created; {result.links_written} link(s) written"
+    )
+    return 0
+
+
+def cmd_export(args) -> int:
+    with SessionLocal() as db:
+        rid = _restaurant_id(db, args.slug)
+    out = open(args.output, "w", encoding="utf-8", newline="") if args.output else sys.stdout
+    try:
+        for chunk in catalog.export_catalog(rid, args.format):
+            out.write(chunk)
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Digital Menu maintenance commands")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("snapshots", help="Regenerate pre-rendered public menu snapshots")
+    p.add_argument("--slug", action="append", help="Only this restaurant (repeatable)")
+    p.add_argument("--purge", action="store_true", help="Delete the snapshots instead (after turning MENU_SNAPSHOTS_ENABLED off)")
+    p.set_defaults(func=cmd_snapshots)
+
+    p = sub.add_parser("media-gc", help="Delete content-addressed media no longer referenced by any row")
+    p.set_defaults(func=cmd_media_gc)
+
+    p = sub.add_parser("menu-check", help="Verify the denormalized menu documents against the catalog tables")
+    p.add_argument("--slug", action="append", help="Only check this restaurant (repeatable)")
+    p.add_argument("--repair", action="store_true", help="Rebuild documents that are missing or differ")
+    p.set_defaults(func=cmd_menu_check)
+
+    p = sub.add_parser("import", help="Upsert categories, ingredients and products from a CSV or JSON file")
+    p.add_argument("--slug", required=True)
+    p.add_argument("--format", choices=["csv", "json"], help="Default: from the file extension")
+    p.add_argument("file")
+    p.set_defaults(func=cmd_import)
+
+    p = sub.add_parser("export", help="Write a restaurant's catalog as CSV or JSON (importable)")
+    p.add_argument("--slug", required=True)
+    p.add_argument("--format", choices=["csv", "json"], default="json")
+    p.add_argument("-o", "--output", help="Default: stdout")
+    p.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """Thread-safe bounded LRU cache with a per-entry TTL and hit/miss counters."""
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float | None, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        with self._lock:
+            self._store(key, value, ttl)
+
+    def _store(self, key: Hashable, value: Any, ttl: float | None) -> None:
+        # caller holds self._lock
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        self._data[key] = (time.monotonic() + ttl if ttl else None, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
+
+
+class VersionedCache(LRUCache):
+    """LRU cache whose keys carry a version bumped on every invalidation.
+
+    Readers take the version before building a value and store it with
+    ``set(key, value, version=...)``; if a write invalidated the key in the
+    meantime the stale value is dropped instead of being cached.
+    """
+
+    def __init__(self, maxsize: int = 256, ttl: float | None = None):
+        super().__init__(maxsize, ttl)
+        self._versions: dict[Hashable, int] = {}
+        self._epoch = 0
+
+    def version(self, key: Hashable) -> tuple[int, int]:
+        with self._lock:
+            return self._epoch, self._versions.get(key, 0)
+
+    def set(self, key: Hashable, value: Any, ttl: float | None = None, version: tuple[int, int] | None = None) -> None:
+        with self._lock:
+            if version is not None and version != (self._epoch, self._versions.get(key, 0)):
+                return
+            self._store(key, value, ttl)
+
+    def invalidate(self, key: Hashable) -> None:
+        with self._lock:
+            self._versions[key] = self._versions.get(key, 0) + 1
+            if self._data.pop(key, None) is not None:
+                self.invalidations += 1
+
+    def invalidate_all(self) -> None:
+        with self._lock:
+            self._epoch += 1
+            self.invalidations += len(self._data)
+            self._data.clear()
+
+    def on_invalidate(self, key: Hashable) -> None:
+        # Cache bus handler: "*" drops everything
+        if key == "*":
+            self.invalidate_all()
+        else:
+            self.invalidate(key)
@@ -0,0 +1,105 @@
+from collections import defaultdict
+import logging
+import select
+import threading
+import uuid
+
+from sqlalchemy import text
+
+from .config import settings
+from .database import engine
+
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBus:
+    """Fan-out for cache invalidations.
+
+    ``publish(kind, key)`` runs the local handlers subscribed to ``kind`` and, on Postgres
+    (unless CACHE_NOTIFY_ENABLED=false), sends a NOTIFY so every other worker process
+    listening on the channel drops the same key.
+    """
+
+    def __init__(self, channel: str, enabled: bool):
+        self.channel = channel
+        self.enabled = enabled
+        self.origin = uuid.uuid4().hex[:12]
+        self._handlers: dict[str, list] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, kind: str, handler):
+        self._handlers[kind].append(handler)
+
+    def _dispatch(self, kind: str, key: str):
+        for handler in self._handlers.get(kind, ()):
+            handler(key)
+
+    def publish(self, kind: str, key: str):
+        self._dispatch(kind, key)
+        if self.enabled:
+            try:
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": f"{self.origin}|{kind}|{key}"})
+                    conn.commit()
+            except Exception:
+                logger.exception("Cache NOTIFY failed for %s:%s", kind, key)
+
+    def _on_payload(self, payload: str):
+        origin, _, rest = payload.partition("|")
+        kind, _, key = rest.partition("|")
+        if origin != self.origin and kind:
+            self._dispatch(kind, key)
+
+    def _listen_forever(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            conn = None
+            try:
+                raw = engine.raw_connection()
+                conn = raw.driver_connection  # read before detach(), which drops the pool record
+                raw.detach()  # dedicated connection, never returned to the pool
+                conn.autocommit = True
+                with conn.cursor() as cur:
+                    cur.execute(f'LISTEN "{self.channel}"')
+                backoff = 1.0
+                # Anything published while we were disconnected is lost, so start clean
+                for kind in list(self._handlers):
+                    self._dispatch(kind, "*")
+                while not self._stop.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._on_payload(conn.notifies.pop(0).payload)
+            except Exception:
+                if self._stop.is_set():
+                    break
+                logger.exception("Cache LISTEN connection lost; reconnecting in %.0fs", backoff)
+                self._stop.wait(backoff)
+                backoff = min(backoff * 2, 30.0)
+            finally:
+                if conn is not None:
+                    try:
+                        conn.close()
+                    except Exception:
+                        pass
+
+    def start(self):
+        if not self.enabled or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._listen_forever, name="cache-listen", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+
+def notify_enabled() -> bool:
+    if settings.cache_notify_enabled is None:
+        return engine.dialect.name == "postgresql"
+    return settings.cache_notify_enabled
+
+
+cache_bus = CacheBus(settings.cache_notify_channel, notify_enabled())
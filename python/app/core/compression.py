@@ -0,0 +1,170 @@
+from collections import OrderedDict
+import gzip
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+
+_COMPRESSIBLE = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def choose_encoding(accept_encoding: str) -> str | None:
+    # Brotli when the client takes it (and the package is installed), else gzip; q=0 means refused
+    accepted = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip()] = q
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def _weak(etag: str) -> str:
+    # The compressed body is a different representation of the same resource
+    return etag if etag.startswith("W/") else f"W/{etag}"
+
+
+class CompressionMiddleware:
+    """gzip/brotli for compressible responses of at least ``minimum_size`` bytes.
+
+    Single-message bodies with an ETag (public menu, list endpoints) are compressed once
+    per (ETag, encoding) and served from a small LRU afterwards; streamed bodies (catalog
+    export, static files) are compressed chunk by chunk.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 5, cache_size: int = 128):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self, encoding, send).run(scope, receive)
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def compress_cached(self, encoding: str, body: bytes, etag: str | None) -> bytes:
+        if etag is None or etag.startswith("W/") or not self.cache_size:
+            return self.compress(encoding, body)
+        key = (etag, encoding)
+        cached = self._cache.get(key)
+        if cached is None:
+            cached = self._cache[key] = self.compress(encoding, body)
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return cached
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            c = brotli.Compressor(quality=self.brotli_quality)
+            return c.process, c.finish
+        c = zlib.compressobj(self.gzip_level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        return c.compress, c.flush
+
+
+class _Responder:
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.mw = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start: Message | None = None
+        self.pending: list[bytes] = []  # chunks of a compressible body with a known length (middleware may split it)
+        self.stream = None  # (compress, flush) while streaming a compressed body
+
+    async def run(self, scope: Scope, receive: Receive):
+        await self.mw.app(scope, receive, self.on_send)
+
+    def _eligible(self, headers: MutableHeaders) -> bool:
+        if "content-encoding" in headers:
+            return False
+        return headers.get("content-type", "").startswith(_COMPRESSIBLE)
+
+    async def on_send(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body message: compressible types wait for their size
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.stream is not None:
+            await self._send_stream(message.get("body", b""), message.get("more_body", False))
+            return
+        if self.start is None:
+            # Already decided not to compress
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=self.start["headers"])
+        more = message.get("more_body", False)
+        eligible = self._eligible(headers)
+        if not eligible and self.start["status"] != 304:
+            # Media and other binary bodies pass through chunk by chunk, never buffered
+            start, self.start = self.start, None
+            await self.send(start)
+            await self.send(message)
+            return
+        if more and "content-length" in headers:
+            self.pending.append(message.get("body", b""))
+            return
+        start, self.start = self.start, None
+        body = b"".join(self.pending) + message.get("body", b"")
+        self.pending = []
+
+        if start["status"] == 304 and "etag" in headers:
+            headers.add_vary_header("Accept-Encoding")
+            headers["etag"] = _weak(headers["etag"])
+        elif eligible and (more or len(body) >= self.mw.minimum_size):
+            headers.add_vary_header("Accept-Encoding")
+            headers["content-encoding"] = self.encoding
+            etag = headers.get("etag")
+            if etag:
+                headers["etag"] = _weak(etag)
+            if more:
+                # Unknown length (StreamingResponse): compress chunk by chunk
+                self.stream = self.mw.compressor(self.encoding)
+                await self.send(start)
+                await self._send_stream(body, more)
+                return
+            body = self.mw.compress_cached(self.encoding, body, etag)
+            headers["content-length"] = str(len(body))
+        elif eligible:
+            headers.add_vary_header("Accept-Encoding")
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more})
+
+    async def _send_stream(self, body: bytes, more: bool):
+        compress, flush = self.stream
+        out = compress(body)
+        if not more:
+            out += flush()
+        await self.send({"type": "http.response.body", "body": out, "more_body": more})
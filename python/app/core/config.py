@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 from pydantic import Field
 
@@ -7,6 +9,19 @@ class Settings(BaseSettings):
     api_v1_prefix: str = "/api/v1"
     secret_key: str = Field(default="CHANGE_ME_SECRET", validation_alias="SECRET_KEY")
     access_token_expire_minutes: int = 60 * 24
+    # Verified JWT payloads cached by token digest until their exp (size 0 disables)
+    token_cache_size: int = Field(default=4096, validation_alias="TOKEN_CACHE_SIZE")
+
+    # Password hashing: bcrypt cost (hashes with another cost are rehashed on login),
+    # a dedicated verification pool and per-username / per-IP failed-login throttling
+    bcrypt_rounds: int = Field(default=12, validation_alias="BCRYPT_ROUNDS")
+    password_hash_workers: int = Field(default=2, validation_alias="PASSWORD_HASH_WORKERS")
+    password_hash_max_pending: int = Field(default=64, validation_alias="PASSWORD_HASH_MAX_PENDING")
+    login_max_failures_per_user: int = Field(default=5, validation_alias="LOGIN_MAX_FAILURES_PER_USER")
+    login_max_failures_per_ip: int = Field(default=30, validation_alias="LOGIN_MAX_FAILURES_PER_IP")
+    login_failure_window_seconds: float = Field(default=300, validation_alias="LOGIN_FAILURE_WINDOW_SECONDS")
+    # Failures counted in Postgres, shared by all workers; false: per process (limits x workers)
+    login_throttle_shared: bool = Field(default=True, validation_alias="LOGIN_THROTTLE_SHARED")
 
     postgres_host: str = Field(default="localhost", validation_alias="POSTGRES_HOST")
     postgres_port: int = Field(default=5432, validation_alias="POSTGRES_PORT")
@@ -14,7 +29,105 @@ class Settings(BaseSettings):
     postgres_user: str = Field(default="postgres", validation_alias="POSTGRES_USER")
     postgres_password: str = Field(default="postgres", validation_alias="POSTGRES_PASSWORD")
 
+    # Connection pool (per worker process); statement timeout 0 disables it
+    db_pool_size: int = Field(default=10, validation_alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=20, validation_alias="DB_MAX_OVERFLOW")
+    db_pool_recycle: int = Field(default=1800, validation_alias="DB_POOL_RECYCLE")
+    db_pool_timeout: float = Field(default=10, validation_alias="DB_POOL_TIMEOUT")
+    db_pool_pre_ping: bool = Field(default=True, validation_alias="DB_POOL_PRE_PING")
+    db_statement_timeout_ms: int = Field(default=15000, validation_alias="DB_STATEMENT_TIMEOUT_MS")
+
+    # Optional read replicas (comma-separated SQLAlchemy URLs) for public menu and GET lists
+    db_replica_urls: str = Field(default="", validation_alias="DB_REPLICA_URLS")
+    db_replica_health_interval: float = Field(default=5.0, validation_alias="DB_REPLICA_HEALTH_INTERVAL")
+    db_replica_sticky_seconds: float = Field(default=10.0, validation_alias="DB_REPLICA_STICKY_SECONDS")
+
+    # Production launcher (serve.py); 0 workers means one per CPU core
+    web_host: str = Field(default="0.0.0.0", validation_alias="WEB_HOST")
+    web_port: int = Field(default=8095, validation_alias="WEB_PORT")
+    web_workers: int = Field(default=0, validation_alias="WEB_WORKERS")
+    web_graceful_timeout: int = Field(default=30, validation_alias="WEB_GRACEFUL_TIMEOUT")
+
+    # Serve the hot read paths through an asyncpg-backed AsyncSession instead of the threadpool
+    db_async: bool = Field(default=False, validation_alias="DB_ASYNC")
+
     media_dir: str = Field(default="media", validation_alias="MEDIA_DIR")
+    # Uploads are streamed to disk in chunks and rejected past this size
+    upload_max_bytes: int = Field(default=8 * 1024 * 1024, validation_alias="UPLOAD_MAX_BYTES")
+    upload_chunk_bytes: int = Field(default=256 * 1024, validation_alias="UPLOAD_CHUNK_BYTES")
+    # Catalog import files (CSV/JSON) have their own, larger cap
+    catalog_import_max_bytes: int = Field(default=64 * 1024 * 1024, validation_alias="CATALOG_IMPORT_MAX_BYTES")
+    # Media storage: "local" ({MEDIA_DIR}, served by /media) or "s3" (any S3-compatible store).
+    # MEDIA_PUBLIC_BASE_URL (e.g. a CDN) replaces {api host}/media or the bucket URL in media links
+    media_storage: str = Field(default="local", validation_alias="MEDIA_STORAGE")
+    media_public_base_url: str = Field(default="", validation_alias="MEDIA_PUBLIC_BASE_URL")
+    s3_bucket: str = Field(default="digitalmenu-media", validation_alias="S3_BUCKET")
+    s3_prefix: str = Field(default="", validation_alias="S3_PREFIX")
+    s3_endpoint_url: str = Field(default="", validation_alias="S3_ENDPOINT_URL")
+    s3_region: str = Field(default="", validation_alias="S3_REGION")
+    s3_access_key_id: str = Field(default="", validation_alias="S3_ACCESS_KEY_ID")
+    s3_secret_access_key: str = Field(default="", validation_alias="S3_SECRET_ACCESS_KEY")
+    s3_presign_expiry_seconds: int = Field(default=0, validation_alias="S3_PRESIGN_EXPIRY_SECONDS")
+    # Content-addressed uploads under {MEDIA_DIR}/c; unreferenced blobs younger than the grace period are kept
+    media_cache_control: str = Field(default="public, max-age=31536000, immutable", validation_alias="MEDIA_CACHE_CONTROL")
+    media_gc_grace_seconds: float = Field(default=3600, validation_alias="MEDIA_GC_GRACE_SECONDS")
+
+    # Responsive derivatives of uploaded images, rendered in a process pool
+    image_variants_enabled: bool = Field(default=True, validation_alias="IMAGE_VARIANTS_ENABLED")
+    image_variant_widths: str = Field(default="160,480,960", validation_alias="IMAGE_VARIANT_WIDTHS")
+    image_variant_formats: str = Field(default="avif,webp,jpeg", validation_alias="IMAGE_VARIANT_FORMATS")
+    image_quality: int = Field(default=78, validation_alias="IMAGE_QUALITY")
+    image_workers: int = Field(default=2, validation_alias="IMAGE_WORKERS")
+
+    # In-process public menu cache (size 0 disables it)
+    menu_cache_size: int = Field(default=256, validation_alias="MENU_CACHE_SIZE")
+    menu_cache_ttl_seconds: float = Field(default=300, validation_alias="MENU_CACHE_TTL_SECONDS")
+
+    # Slug -> restaurant facts shared by all scoped routes; invalidated on restaurant writes
+    restaurant_cache_size: int = Field(default=1024, validation_alias="RESTAURANT_CACHE_SIZE")
+    restaurant_cache_ttl_seconds: float = Field(default=600, validation_alias="RESTAURANT_CACHE_TTL_SECONDS")
+
+    # Broadcast cache invalidations to other worker processes via Postgres LISTEN/NOTIFY
+    # (unset: on whenever the database is Postgres, so multi-worker caches stay coherent)
+    cache_notify_enabled: bool | None = Field(default=None, validation_alias="CACHE_NOTIFY_ENABLED")
+    cache_notify_channel: str = Field(default="digitalmenu_cache", validation_alias="CACHE_NOTIFY_CHANNEL")
+
+    # Denormalized per-restaurant menu document (menu_documents), patched by every catalog write
+    # and read by the public menu with one primary-key lookup
+    menu_read_model_enabled: bool = Field(default=True, validation_alias="MENU_READ_MODEL_ENABLED")
+
+    # Pre-rendered public menu JSON under {media_dir}/menus/{slug}.json(.gz/.br)
+    menu_snapshots_enabled: bool = Field(default=True, validation_alias="MENU_SNAPSHOTS_ENABLED")
+    menu_snapshot_gzip: bool = Field(default=True, validation_alias="MENU_SNAPSHOT_GZIP")
+    menu_snapshot_brotli: bool = Field(default=True, validation_alias="MENU_SNAPSHOT_BROTLI")
+    menu_snapshot_debounce_seconds: float = Field(default=2.0, validation_alias="MENU_SNAPSHOT_DEBOUNCE_SECONDS")
+    menu_snapshot_max_delay_seconds: float = Field(default=30.0, validation_alias="MENU_SNAPSHOT_MAX_DELAY_SECONDS")
+
+    # Public menu search: "auto" uses pg_trgm when the search migration is installed, else an
+    # in-process trigram index; matches need word similarity >= MENU_SEARCH_SIMILARITY
+    menu_search_backend: Literal["auto", "postgres", "python"] = Field(default="auto", validation_alias="MENU_SEARCH_BACKEND")
+    menu_search_similarity: float = Field(default=0.5, ge=0, le=1, validation_alias="MENU_SEARCH_SIMILARITY")
+
+    # gzip/brotli for JSON/text responses of at least COMPRESSION_MIN_SIZE bytes; compressed
+    # ETag'd bodies are kept per (ETag, encoding) in an LRU of COMPRESSION_CACHE_SIZE entries
+    compression_enabled: bool = Field(default=True, validation_alias="COMPRESSION_ENABLED")
+    compression_min_size: int = Field(default=1024, validation_alias="COMPRESSION_MIN_SIZE")
+    compression_gzip_level: int = Field(default=6, validation_alias="COMPRESSION_GZIP_LEVEL")
+    compression_brotli_quality: int = Field(default=5, validation_alias="COMPRESSION_BROTLI_QUALITY")
+    compression_cache_size: int = Field(default=128, validation_alias="COMPRESSION_CACHE_SIZE")
+
+    # Per-route latency/status/SQL metrics on GET /metrics (Prometheus text format); requests
+    # slower than METRICS_SLOW_REQUEST_MS are logged with their query counts (0 disables)
+    metrics_enabled: bool = Field(default=True, validation_alias="METRICS_ENABLED")
+    metrics_slow_request_ms: int = Field(default=500, validation_alias="METRICS_SLOW_REQUEST_MS")
+    # Directory where worker processes share their numbers, so /metrics covers all of them
+    # (serve.py uses a temporary one with several workers); empty: this process only
+    metrics_dir: str = Field(default="", validation_alias="METRICS_DIR")
+    metrics_flush_seconds: float = Field(default=1.0, validation_alias="METRICS_FLUSH_SECONDS")
+
+    # Cache-Control sent with ETag'd responses; public menus may be absorbed by a CDN/nginx
+    public_menu_cache_control: str = Field(default="public, max-age=30, stale-while-revalidate=300", validation_alias="PUBLIC_MENU_CACHE_CONTROL")
+    admin_cache_control: str = Field(default="private, no-cache", validation_alias="ADMIN_CACHE_CONTROL")
 
     class Config:
         env_file = ".env"
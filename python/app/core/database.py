@@ -1,6 +1,18 @@
-from sqlalchemy import create_engine
+import itertools
+import logging
+import os
+import threading
+import time
+
+from fastapi import Request
+from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
+from sqlalchemy.pool import NullPool
 from .config import settings
+from .metrics import track_queries
+
+
+logger = logging.getLogger(__name__)
 
 
 class Base(DeclarativeBase):
@@ -12,9 +24,139 @@ DATABASE_URL = (
     f"@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_db}"
 )
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
+ASYNC_DATABASE_URL = DATABASE_URL.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1)
+
+
+def to_async_url(url: str) -> str:
+    return url.replace("postgresql+psycopg2://", "postgresql+asyncpg://", 1).replace("postgresql://", "postgresql+asyncpg://", 1)
+
+
+def engine_options(async_driver: bool = False) -> dict:
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if settings.db_statement_timeout_ms:
+        timeout = str(settings.db_statement_timeout_ms)
+        if async_driver:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+engine = create_engine(DATABASE_URL, **engine_options())
+track_queries(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, expire_on_commit=False)
 
+# Only built when DB_ASYNC is enabled so asyncpg stays optional for the sync deployment
+async_engine = None
+AsyncSessionLocal = None
+if settings.db_async:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(ASYNC_DATABASE_URL, **engine_options(async_driver=True))
+    track_queries(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+class ReplicaSet:
+    """Round-robin over read replicas, skipping any that failed its last health check.
+
+    Health is a ``SELECT 1`` over a throwaway connection, re-run in a background thread
+    at most every ``health_interval`` seconds per replica; pick() only reads the last result. Restaurants written to within
+    ``sticky_seconds`` are read from the primary so the editor sees its own writes.
+    """
+
+    def __init__(self, urls: list[str], health_interval: float, sticky_seconds: float):
+        self.urls = urls
+        self.health_interval = health_interval
+        self.sticky_seconds = sticky_seconds
+        self.engines = [create_engine(u, **engine_options()) for u in urls]
+        for e in self.engines:
+            track_queries(e)
+        self.sessionmakers = [sessionmaker(autocommit=False, autoflush=False, bind=e, expire_on_commit=False) for e in self.engines]
+        self.async_engines = []
+        self.async_sessionmakers = []
+        if settings.db_async:
+            self.async_engines = [create_async_engine(to_async_url(u), **engine_options(async_driver=True)) for u in urls]
+            for e in self.async_engines:
+                track_queries(e.sync_engine)
+            self.async_sessionmakers = [async_sessionmaker(e, autoflush=False, expire_on_commit=False) for e in self.async_engines]
+        self._probes = [create_engine(u, poolclass=NullPool, connect_args={"connect_timeout": 2}) for u in urls]
+        self._health: dict[int, tuple[bool, float]] = {}
+        self._probing: set[int] = set()
+        self._writes: dict[str, float] = {}
+        self._rr = itertools.count()
+        self._lock = threading.Lock()
+
+    def _healthy(self, idx: int) -> bool:
+        # Cached state only: never blocks the caller (or the event loop in async routes)
+        ok, checked_at = self._health.get(idx, (True, float("-inf")))
+        if time.monotonic() - checked_at >= self.health_interval:
+            self._refresh(idx)
+        return ok
+
+    def _refresh(self, idx: int):
+        # One probe per replica in flight, on a background thread
+        with self._lock:
+            if idx in self._probing:
+                return
+            self._probing.add(idx)
+        threading.Thread(target=self._probe, args=(idx,), name=f"replica-probe-{idx}", daemon=True).start()
+
+    def _probe(self, idx: int):
+        try:
+            with self._probes[idx].connect() as conn:
+                conn.execute(text("SELECT 1"))
+            ok = True
+        except Exception:
+            if self._health.get(idx, (True, 0))[0]:
+                logger.warning("Read replica %d is unhealthy; routing reads elsewhere", idx)
+            ok = False
+        self._health[idx] = (ok, time.monotonic())
+        with self._lock:
+            self._probing.discard(idx)
+
+    def pick(self) -> int | None:
+        # Index of a healthy replica, or None to fall back to the primary
+        start = next(self._rr)
+        for i in range(len(self.engines)):
+            idx = (start + i) % len(self.engines)
+            if self._healthy(idx):
+                return idx
+        return None
+
+    def mark_written(self, key: str):
+        with self._lock:
+            self._writes[key] = time.monotonic()
+
+    def recently_written(self, key: str) -> bool:
+        written_at = self._writes.get(key)
+        return written_at is not None and time.monotonic() - written_at < self.sticky_seconds
+
+    def dispose(self, close: bool = True):
+        self._probing.clear()  # probe threads do not survive a fork
+        for e in self.engines:
+            e.dispose(close=close)
+        for e in self.async_engines:
+            e.sync_engine.dispose(close=close)
+
+
+replicas = None
+if settings.db_replica_urls.strip():
+    replicas = ReplicaSet(
+        [u.strip() for u in settings.db_replica_urls.split(",") if u.strip()],
+        settings.db_replica_health_interval,
+        settings.db_replica_sticky_seconds,
+    )
+
+# Set on write responses so read-your-writes also holds across worker processes
+PRIMARY_COOKIE = "dm_primary"
+
 
 def get_db():
     db = SessionLocal()
@@ -24,3 +166,46 @@ def get_db():
         db.close()
 
 
+def _replica_for(request: Request) -> int | None:
+    if replicas is None or PRIMARY_COOKIE in request.cookies:
+        return None
+    slug = request.path_params.get("slug")
+    if slug and replicas.recently_written(slug):
+        return None
+    return replicas.pick()
+
+
+def get_read_db(request: Request):
+    # Read-only session: a healthy replica when configured, otherwise the primary
+    idx = _replica_for(request)
+    db = SessionLocal() if idx is None else replicas.sessionmakers[idx]()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def get_async_read_db(request: Request):
+    idx = _replica_for(request)
+    factory = AsyncSessionLocal if idx is None else replicas.async_sessionmakers[idx]
+    async with factory() as db:
+        yield db
+
+
+def _dispose_after_fork():
+    # Pooled connections inherited from the parent must never be shared with it;
+    # close=False drops them from the child's pool without touching the sockets.
+    engine.dispose(close=False)
+    if async_engine is not None:
+        async_engine.sync_engine.dispose(close=False)
+    if replicas is not None:
+        replicas.dispose(close=False)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_dispose_after_fork)
@@ -0,0 +1,85 @@
+from functools import lru_cache
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, JSONResponse, ORJSONResponse
+from fastapi.staticfiles import StaticFiles
+from pydantic import TypeAdapter
+from starlette.datastructures import Headers
+from starlette.staticfiles import NotModifiedResponse
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+
+# Default response class for the API; same compact UTF-8 output as JSONResponse
+FastJSONResponse = ORJSONResponse if orjson is not None else JSONResponse
+
+
+def render_json(content: Any) -> bytes:
+    # Compact UTF-8 JSON, so bodies (and ETags) are stable for equal content
+    if orjson is not None:
+        return orjson.dumps(content)
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def compute_etag(body: bytes) -> str:
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    # If-None-Match uses weak comparison, so W/"x" matches "x"
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def conditional_response(request: Request, body: bytes, etag: str | None = None, cache_control: str | None = None) -> Response:
+    etag = etag or compute_etag(body)
+    headers = {"ETag": etag}
+    if cache_control:
+        headers["Cache-Control"] = cache_control
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model) -> TypeAdapter:
+    return TypeAdapter(list[model])
+
+
+def model_list_response(request: Request, model, items, cache_control: str | None = None) -> Response:
+    # Validate and serialize through the response model in one pydantic-core pass (no
+    # intermediate dicts or json.dumps) so the body can be hashed into an ETag
+    adapter = _list_adapter(model)
+    body = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    return conditional_response(request, body, cache_control=cache_control)
+
+
+class ImmutableStaticFiles(StaticFiles):
+    # For content-addressed files: the name is the content hash, so it doubles as a strong ETag
+    def file_response(self, full_path: str | os.PathLike, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["etag"] = f'"{Path(full_path).name}"'
+        response.headers["cache-control"] = settings.media_cache_control
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
@@ -0,0 +1,320 @@
+from bisect import bisect_left
+from contextvars import ContextVar
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+import time
+from typing import Iterable
+import uuid
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    # Cumulative buckets are computed when rendering; observe() only bumps one slot
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+
+def _labels(names: tuple[str, ...], values: tuple) -> str:
+    def escape(v) -> str:
+        return str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return ",".join(f'{n}="{escape(v)}"' for n, v in zip(names, values))
+
+
+def _number(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Registry:
+    """Counters and histograms for one process, rendered in the Prometheus text format.
+
+    Each worker process keeps its own numbers; ``render`` adds other workers' snapshots
+    (see SharedMetrics) so any one of them can answer for all.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta: dict[str, tuple[str, str, tuple[str, ...]]] = {}  # name -> (type, help, label names)
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, Histogram]] = {}
+        self._buckets: dict[str, tuple[float, ...]] = {}
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self._meta[name] = ("counter", help, labels)
+        self._counters[name] = {}
+
+    def histogram(self, name: str, help: str, buckets: tuple[float, ...], labels: tuple[str, ...] = ()):
+        self._meta[name] = ("histogram", help, labels)
+        self._histograms[name] = {}
+        self._buckets[name] = buckets
+
+    def inc(self, name: str, labels: tuple = (), amount: float = 1.0):
+        with self._lock:
+            series = self._counters[name]
+            series[labels] = series.get(labels, 0.0) + amount
+
+    def observe(self, name: str, labels: tuple, value: float):
+        with self._lock:
+            series = self._histograms[name]
+            hist = series.get(labels)
+            if hist is None:
+                hist = series[labels] = Histogram(self._buckets[name])
+            hist.observe(value)
+
+    def snapshot(self) -> dict:
+        # JSON-serializable copy of every series
+        with self._lock:
+            return {
+                "counters": {name: [[list(k), v] for k, v in series.items()] for name, series in self._counters.items()},
+                "histograms": {
+                    name: [[list(k), list(h.counts), h.sum] for k, h in series.items()] for name, series in self._histograms.items()
+                },
+            }
+
+    def _merged(self, snapshots: Iterable[dict]):
+        counters: dict[str, dict[tuple, float]] = {name: {} for name in self._counters}
+        histograms: dict[str, dict[tuple, Histogram]] = {name: {} for name in self._histograms}
+        for snap in snapshots:
+            for name, series in snap.get("counters", {}).items():
+                if name not in counters:
+                    continue  # metric dropped since that worker started
+                for labels, v in series:
+                    key = tuple(labels)
+                    counters[name][key] = counters[name].get(key, 0.0) + v
+            for name, series in snap.get("histograms", {}).items():
+                if name not in histograms:
+                    continue
+                for labels, counts, total in series:
+                    hist = histograms[name].setdefault(tuple(labels), Histogram(self._buckets[name]))
+                    if len(counts) != len(hist.counts):
+                        continue  # buckets changed since that worker started
+                    hist.counts = [a + b for a, b in zip(hist.counts, counts)]
+                    hist.sum += total
+        return counters, histograms
+
+    def render(self, others: Iterable[dict] = ()) -> str:
+        # others: snapshots of other processes, summed series by series with this one
+        counters, histograms = self._merged([self.snapshot(), *others])
+        lines = []
+        for name, (kind, help, label_names) in self._meta.items():
+            lines.append(f"# HELP {name} {help}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == "counter":
+                for values, v in sorted(counters[name].items()):
+                    lines.append(f"{name}{{{_labels(label_names, values)}}} {_number(v)}" if label_names else f"{name} {_number(v)}")
+                continue
+            for values, hist in sorted(histograms[name].items()):
+                base = _labels(label_names, values)
+                sep = "," if base else ""
+                cumulative = 0
+                for bound, count in zip(hist.buckets + (float("inf"),), hist.counts):
+                    cumulative += count
+                    le = "+Inf" if bound == float("inf") else _number(bound)
+                    lines.append(f'{name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+                suffix = f"{{{base}}}" if base else ""
+                lines.append(f"{name}_sum{suffix} {_number(hist.sum)}")
+                lines.append(f"{name}_count{suffix} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+class SharedMetrics:
+    """Registry snapshots of every worker process in one directory (METRICS_DIR).
+
+    Each process rewrites its own file every ``interval`` seconds and on shutdown; /metrics
+    in any worker adds the other files to its live numbers, so scrapes see all workers
+    (other workers' numbers lag by up to ``interval``). Files of exited workers are kept so
+    counters never go backwards; clear the directory before the server starts (serve.py does).
+    """
+
+    def __init__(self, registry: Registry, directory: str | Path, interval: float = 1.0):
+        self.registry = registry
+        self.directory = Path(directory)
+        self.interval = interval
+        self.path: Path | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        # In the worker process: the file name is unique per process even if a pid is reused
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"{os.getpid()}-{uuid.uuid4().hex[:8]}.json"
+        self.write()
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+            self.write()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.write()
+            except OSError:
+                logger.exception("Could not write metrics to %s", self.directory)
+
+    def write(self):
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.registry.snapshot()))
+        os.replace(tmp, self.path)  # readers never see a partial file
+
+    def render(self) -> str:
+        others = []
+        for path in self.directory.glob("*.json"):
+            if path == self.path:
+                continue
+            try:
+                others.append(json.loads(path.read_text()))
+            except (OSError, ValueError):
+                logger.warning("Skipping unreadable metrics file %s", path)
+        return self.registry.render(others)
+
+
+def clear_shared_metrics(directory: str | Path):
+    # Before the workers start: numbers from an earlier server run would otherwise be added
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    for path in directory.iterdir():
+        if path.suffix in (".json", ".tmp"):
+            path.unlink(missing_ok=True)
+
+
+registry = Registry()
+registry.counter("http_requests_total", "Requests by route template and status code.", ("method", "route", "status"))
+registry.histogram("http_request_duration_seconds", "Time from request to the last body byte.", LATENCY_BUCKETS, ("method", "route"))
+registry.histogram("http_request_db_queries", "SQL statements executed per request.", QUERY_BUCKETS, ("method", "route"))
+registry.counter("db_queries_total", "SQL statements by route (background for work outside requests).", ("route",))
+registry.counter("db_query_seconds_total", "Time spent executing SQL statements, by route.", ("route",))
+
+
+@dataclass
+class RequestStats:
+    queries: int = 0
+    db_seconds: float = 0.0
+
+
+# Set per request by MetricsMiddleware; the threadpool copies the context, so sync
+# endpoints and their SQLAlchemy events add to the same object
+_current: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+def current_stats() -> RequestStats | None:
+    return _current.get()
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    _finish(conn)
+
+
+def _on_error(context):
+    if context.connection is not None:
+        _finish(context.connection)
+
+
+def _finish(conn):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+    else:
+        registry.inc("db_queries_total", ("background",))
+        registry.inc("db_query_seconds_total", ("background",), elapsed)
+
+
+def track_queries(engine: Engine):
+    # For async engines pass engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+    event.listen(engine, "handle_error", _on_error)
+
+
+def route_label(scope: Scope, root_path: str) -> str:
+    # Route templates (not raw paths) keep the series count bounded
+    route = scope.get("route")
+    prefix = scope.get("root_path", "")[len(root_path):]
+    if route is not None and hasattr(route, "path"):
+        return prefix + route.path
+    if prefix:
+        return prefix + "/{path}"  # static mounts, or no match inside a mounted app
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """Records latency, status and SQL statement counts per route template.
+
+    Added to the outer app: the mounted API shares the ASGI scope, so its matched route
+    is visible here after the call. Requests slower than ``slow_seconds`` are logged with
+    their query counts.
+    """
+
+    def __init__(self, app: ASGIApp, slow_seconds: float = 0.5):
+        self.app = app
+        self.slow_seconds = slow_seconds
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        root_path = scope.get("root_path", "")
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def on_send(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, on_send)
+        finally:
+            elapsed = time.perf_counter() - started
+            _current.reset(token)
+            self._record(scope, root_path, status, elapsed, stats)
+
+    def _record(self, scope: Scope, root_path: str, status: int, elapsed: float, stats: RequestStats):
+        method = scope["method"]
+        route = route_label(scope, root_path)
+        registry.inc("http_requests_total", (method, route, str(status)))
+        registry.observe("http_request_duration_seconds", (method, route), elapsed)
+        registry.observe("http_request_db_queries", (method, route), stats.queries)
+        if stats.queries:
+            registry.inc("db_queries_total", (route,), stats.queries)
+            registry.inc("db_query_seconds_total", (route,), stats.db_seconds)
+        if self.slow_seconds and elapsed >= self.slow_seconds:
+            logger.warning(
+                "Slow request %s %s -> %d in %.0f ms (%d queries, %.0f ms in the database)",
+                method, scope.get("path", route), status, elapsed * 1000, stats.queries, stats.db_seconds * 1000,
+            )
@@ -1,10 +1,27 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
+import hashlib
+import threading
+import time
 import jwt
 from passlib.context import CryptContext
+from ..core.cache import LRUCache
 from ..core.config import settings
+from ..core.database import engine
+from ..core.throttle import DatabaseFailureThrottle, FailureThrottle
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min == max == default makes passlib flag hashes of any other cost for rehash
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,
+    bcrypt__max_rounds=settings.bcrypt_rounds,
+)
+
+token_cache = LRUCache(maxsize=settings.token_cache_size)
 
 
 def create_access_token(subject: str, role: str, restaurant_id: str | None = None, restaurant_slug: str | None = None, expires_delta: int | None = None) -> str:
@@ -20,6 +37,20 @@ def create_access_token(subject: str, role: str, restaurant_id: str | None = Non
     return encoded_jwt
 
 
+def decode_access_token(token: str) -> dict:
+    # Signature/expiry are verified once per token; later requests hit the cache
+    # until the token's own exp. Raises jwt.PyJWTError on invalid tokens.
+    key = hashlib.sha256(token.encode()).digest()
+    payload = token_cache.get(key)
+    if payload is not None:
+        return payload
+    payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+    exp = payload.get("exp")
+    if exp is not None and exp > time.time():
+        token_cache.set(key, payload, ttl=exp - time.time())
+    return payload
+
+
 def verify_password(plain_password: str, password_hash: str) -> bool:
     return pwd_context.verify(plain_password, password_hash)
 
@@ -28,3 +59,81 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, password_hash: str) -> tuple[bool, str | None]:
+    # Returns (valid, new_hash); new_hash is set when the stored hash uses an outdated cost
+    return pwd_context.verify_and_update(plain_password, password_hash)
+
+
+class HashPoolBusy(Exception):
+    pass
+
+
+class HashWorkerPool:
+    """Size-limited pool for bcrypt work so login storms cannot starve the
+    request threadpool. bcrypt releases the GIL, so threads run in parallel."""
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pwhash")
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.run_seconds = 0.0
+
+    async def run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise HashPoolBusy()
+            self.pending += 1
+        submitted = time.perf_counter()
+
+        def job():
+            started = time.perf_counter()
+            with self._lock:
+                self.running += 1
+                self.wait_seconds += started - submitted
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self.running -= 1
+                    self.completed += 1
+                    self.run_seconds += time.perf_counter() - started
+
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, job)
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "running": self.running,
+                "queued": self.pending - self.running,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "avg_wait_ms": round(self.wait_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+                "avg_run_ms": round(self.run_seconds / self.completed * 1000, 2) if self.completed else 0.0,
+            }
+
+
+hash_pool = HashWorkerPool(settings.password_hash_workers, settings.password_hash_max_pending)
+
+
+def _login_throttle(scope: str, limit: int):
+    if settings.login_throttle_shared:
+        return DatabaseFailureThrottle(scope, limit, settings.login_failure_window_seconds, engine)
+    return FailureThrottle(limit, settings.login_failure_window_seconds)
+
+
+login_user_throttle = _login_throttle("user", settings.login_max_failures_per_user)
+login_ip_throttle = _login_throttle("ip", settings.login_max_failures_per_ip)
@@ -0,0 +1,115 @@
+from collections import deque
+from datetime import timedelta
+import math
+import threading
+import time
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.engine import Engine
+
+from ..models.models import LoginFailure
+from .cache import LRUCache
+
+
+class FailureThrottle:
+    """Sliding-window failure counter per key (e.g. username, client IP).
+
+    A key is blocked once it has ``limit`` failures inside ``window`` seconds;
+    ``retry_after`` reports how long until the oldest failure ages out. The counts are
+    per process: with several workers the effective limit is ``limit`` times the workers.
+    """
+
+    def __init__(self, limit: int, window: float, max_keys: int = 10000):
+        self.limit = limit
+        self.window = window
+        self._failures = LRUCache(maxsize=max_keys, ttl=window)
+        self._lock = threading.Lock()
+        self.blocked = 0
+
+    def _recent(self, key: str, now: float) -> deque | None:
+        stamps = self._failures.get(key)
+        if stamps is not None:
+            while stamps and stamps[0] <= now - self.window:
+                stamps.popleft()
+        return stamps
+
+    def retry_after(self, key: str) -> int:
+        if self.limit <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            stamps = self._recent(key, now)
+            if not stamps or len(stamps) < self.limit:
+                return 0
+            self.blocked += 1
+            return max(1, math.ceil(stamps[0] + self.window - now))
+
+    def fail(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            stamps = self._recent(key, now)
+            if stamps is None:
+                stamps = deque(maxlen=max(self.limit, 1))
+            stamps.append(now)
+            self._failures.set(key, stamps)
+
+    def reset(self, key: str):
+        self._failures.pop(key)
+
+    def stats(self) -> dict:
+        return {"tracked_keys": len(self._failures), "limit": self.limit, "window": self.window, "blocked": self.blocked}
+
+
+class DatabaseFailureThrottle:
+    """FailureThrottle with the failures in Postgres (login_failures), so every worker
+    process and node counts against the same limit.
+
+    Same interface, but each call is a round trip: call it off the event loop. Failures
+    older than ``window`` are deleted whenever a new one is recorded.
+    """
+
+    def __init__(self, scope: str, limit: int, window: float, bind: Engine):
+        self.scope = scope
+        self.limit = limit
+        self.window = window
+        self.bind = bind
+        self._lock = threading.Lock()
+        self.blocked = 0  # this process only
+
+    def _since(self):
+        return func.now() - timedelta(seconds=self.window)
+
+    def retry_after(self, key: str) -> int:
+        if self.limit <= 0:
+            return 0
+        # Blocked until the limit-th most recent failure inside the window ages out
+        window = timedelta(seconds=self.window)
+        stmt = (
+            select(func.extract("epoch", LoginFailure.failed_at + window - func.now()))
+            .where(LoginFailure.scope == self.scope, LoginFailure.key == key, LoginFailure.failed_at > self._since())
+            .order_by(LoginFailure.failed_at.desc())
+            .offset(self.limit - 1)
+            .limit(1)
+        )
+        with self.bind.connect() as conn:
+            remaining = conn.execute(stmt).scalar()
+        if remaining is None:
+            return 0
+        with self._lock:
+            self.blocked += 1
+        return max(1, math.ceil(remaining))
+
+    def fail(self, key: str):
+        with self.bind.begin() as conn:
+            conn.execute(delete(LoginFailure).where(LoginFailure.scope == self.scope, LoginFailure.failed_at <= self._since()))
+            conn.execute(insert(LoginFailure).values(scope=self.scope, key=key))
+
+    def reset(self, key: str):
+        with self.bind.begin() as conn:
+            conn.execute(delete(LoginFailure).where(LoginFailure.scope == self.scope, LoginFailure.key == key))
+
+    def stats(self) -> dict:
+        stmt = select(func.count(LoginFailure.key.distinct())).where(LoginFailure.scope == self.scope, LoginFailure.failed_at > self._since())
+        with self.bind.connect() as conn:
+            tracked = conn.execute(stmt).scalar()
+        return {"tracked_keys": tracked, "limit": self.limit, "window": self.window, "blocked": self.blocked}
@@ -0,0 +1,55 @@
+import re
+
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class UploadLimitMiddleware:
+    """Caps multipart request bodies while they are received, per route.
+
+    ``limits`` are (path regex, max_bytes, detail); the first pattern found in the request path
+    applies and other requests pass untouched. A declared Content-Length over the cap is refused
+    before anything is read; bodies without one (chunked) are counted as they arrive and cut off
+    with 413 once they pass it, before the multipart parser has spooled the rest.
+    """
+
+    def __init__(self, app: ASGIApp, limits: list[tuple[str, int, str]]):
+        self.app = app
+        self.limits = [(re.compile(pattern), max_bytes, detail) for pattern, max_bytes, detail in limits]
+
+    def _limit(self, path: str) -> tuple[int, str] | None:
+        for pattern, max_bytes, detail in self.limits:
+            if pattern.search(path):
+                return max_bytes, detail
+        return None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        headers = Headers(scope=scope)
+        limit = self._limit(scope["path"]) if headers.get("content-type", "").startswith("multipart/") else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+        max_bytes, detail = limit
+        length = headers.get("content-length")
+        if length and length.isdigit() and int(length) > max_bytes:
+            await JSONResponse({"detail": detail}, status_code=413)(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > max_bytes:
+                    # Raised inside form parsing, so the app's exception handlers answer 413
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
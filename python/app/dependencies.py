@@ -1,11 +1,12 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
-import jwt
 
 from .core.config import settings
-from .core.database import get_db
-from .models.models import User, Restaurant
+from .core.database import get_db, get_read_db
+from .core.security import decode_access_token
+from .models.models import User
+from .services.restaurants import RestaurantRef, resolve_restaurant
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_prefix}/login")
@@ -13,7 +14,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.api_v1_prefix}/login")
 
 def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
+        payload = decode_access_token(token)
         username: str = payload.get("sub")
         role: str = payload.get("role", "admin")
         if username is None:
@@ -36,9 +37,38 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
 
 def get_current_principal(token: str = Depends(oauth2_scheme)):
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=["HS256"])
-        return payload
+        return decode_access_token(token)
     except Exception:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Could not validate credentials")
 
 
+def check_scope_role(principal: dict):
+    role = principal.get("role")
+    if role not in ("admin", "manager"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+    if role == "manager" and not principal.get("restaurant_id"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def check_scope_owner(principal: dict, rest: RestaurantRef):
+    if principal.get("role") == "manager" and str(rest.id) != principal.get("restaurant_id"):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def _scoped_restaurant(slug: str, principal: dict, db: Session) -> RestaurantRef:
+    # Authorizes admin / manager-of-this-restaurant and resolves the restaurant
+    # (from the slug cache, else with a single lookup) for the handler to reuse
+    check_scope_role(principal)
+    rest = resolve_restaurant(db, slug)
+    if not rest:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    check_scope_owner(principal, rest)
+    return rest
+
+
+def get_scoped_restaurant(slug: str, principal: dict = Depends(get_current_principal), db: Session = Depends(get_db)) -> RestaurantRef:
+    return _scoped_restaurant(slug, principal, db)
+
+
+def get_scoped_restaurant_read(slug: str, principal: dict = Depends(get_current_principal), db: Session = Depends(get_read_db)) -> RestaurantRef:
+    return _scoped_restaurant(slug, principal, db)
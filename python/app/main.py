@@ -1,16 +1,31 @@
 from pathlib import Path
 from typing import List, Optional
 import uuid
-from fastapi import FastAPI, Depends, File, UploadFile, Form, HTTPException, Request
+from fastapi import FastAPI, Depends, File, UploadFile, Form, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.security import OAuth2PasswordRequestForm
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 
 from .core.config import settings
-from .core.database import Base, engine, get_db
-from .core.security import create_access_token, verify_password, get_password_hash
-from .dependencies import get_current_user, get_current_principal
+from .core.database import engine, get_db, get_read_db, replicas, PRIMARY_COOKIE
+from .core.cache_bus import cache_bus
+from .core.compression import CompressionMiddleware
+from .core.http_cache import FastJSONResponse, ImmutableStaticFiles, conditional_response, model_list_response, render_json
+from .core.metrics import MetricsMiddleware, SharedMetrics, registry
+from .core.upload_limit import UploadLimitMiddleware
+from .core.security import (
+    HashPoolBusy,
+    create_access_token,
+    get_password_hash,
+    hash_pool,
+    login_ip_throttle,
+    login_user_throttle,
+    verify_and_update_password,
+)
+from .dependencies import get_current_user, get_current_principal, get_scoped_restaurant, get_scoped_restaurant_read
 from .models.models import (
     User,
     Setting,
@@ -34,7 +49,32 @@ from .schemas.schemas import (
     IngredientCreate,
     ProductOut,
     ProductCreate,
+    CatalogImportResult,
+    BulkPriceUpdate,
+    BulkPriceResult,
+)
+from .services import catalog, menu_model
+from .services.bootstrap import prepare_database
+from .services.images import check_formats, shutdown_pool
+from .services.media import release_media
+from .services.menu import render_menu, menu_cache
+from .services.products import (
+    ProductFilters,
+    ProductPage,
+    PRICE_PREVIEW_LIMIT,
+    ProductSort,
+    check_link_ids,
+    list_product_page,
+    load_product_out,
+    product_out,
+    reprice_products,
+    sync_product_links,
 )
+from .services.restaurants import RestaurantRef, resolve_restaurant, restaurant_cache, restaurant_changed
+from .services.search import search_menu
+from .services.snapshots import snapshot_scheduler
+from .services.storage import LocalStorage, S3Storage, storage
+from .services.uploads import store_image
 
 
 app = FastAPI(title=settings.app_name)
@@ -46,49 +86,127 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Total-Count", "X-Next-Cursor"],
 )
+if settings.compression_enabled:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.compression_min_size,
+        gzip_level=settings.compression_gzip_level,
+        brotli_quality=settings.compression_brotli_quality,
+        cache_size=settings.compression_cache_size,
+    )
+if settings.metrics_enabled:
+    # Outermost, so timings include compression
+    app.add_middleware(MetricsMiddleware, slow_seconds=settings.metrics_slow_request_ms / 1000)
+shared_metrics = SharedMetrics(registry, settings.metrics_dir, settings.metrics_flush_seconds) if settings.metrics_enabled and settings.metrics_dir else None
 
 
 media_path = Path(settings.media_dir)
 media_path.mkdir(parents=True, exist_ok=True)
+if isinstance(storage, LocalStorage):
+    # Content-addressed uploads never change under a URL, so they are cached for a year
+    (media_path / "c").mkdir(exist_ok=True)
+    app.mount("/media/c", ImmutableStaticFiles(directory=str(media_path / "c")), name="media-blobs")
+# Local snapshots / legacy uploads; with MEDIA_STORAGE=s3 media URLs point at the bucket or CDN
 app.mount("/media", StaticFiles(directory=str(media_path)), name="media")
 
 
 @app.on_event("startup")
 def on_startup():
-    # Create tables if not exists (alembic handles migrations; this is for safety in dev)
-    Base.metadata.create_all(bind=engine)
-    # Seed default admin
-    with Session(bind=engine) as db:
-        admin = db.query(User).filter(User.username == "admin").first()
-        if not admin:
-            admin = User(username="admin", password_hash=get_password_hash("evolusys"))
-            db.add(admin)
-            db.commit()
-        # seed demo restaurant if none exists
-        if db.query(Restaurant).count() == 0:
-            demo = Restaurant(name="La Famiglia", slug="la-famiglia", username="lafamiglia", password_hash=get_password_hash("secret"), is_active=True)
-            db.add(demo)
-            db.flush()
-            setting = Setting(restaurant_id=demo.id, company_name="La Famiglia", currency_1="USD", currency_2="EUR", rate=1.0)
-            db.add(setting)
-            db.commit()
-
-
-api = FastAPI()
+    prepare_database()
+    check_formats()
+    cache_bus.start()
+    if shared_metrics is not None:
+        shared_metrics.start()
+
+
+@app.on_event("shutdown")
+def on_shutdown():
+    cache_bus.stop()
+    if shared_metrics is not None:
+        shared_metrics.stop()
+    # Write out snapshots still waiting on their debounce timer, then release pooled connections
+    snapshot_scheduler.flush()
+    shutdown_pool()
+    engine.dispose()
+    if replicas is not None:
+        replicas.dispose()
+
+
+api = FastAPI(default_response_class=FastJSONResponse)
+
+
+# Multipart bodies are capped while they arrive (headroom for the multipart framing);
+# save_upload still enforces the exact per-file limit on images
+api.add_middleware(
+    UploadLimitMiddleware,
+    limits=[
+        (
+            r"/restaurants/[^/]+/(settings/(logo|barcode_image)|(categories|ingredients|products)/\d+/image)$",
+            settings.upload_max_bytes + 64 * 1024,
+            f"File exceeds {settings.upload_max_bytes} bytes",
+        ),
+        (
+            r"/restaurants/[^/]+/catalog/import$",
+            settings.catalog_import_max_bytes + 64 * 1024,
+            f"Import file exceeds {settings.catalog_import_max_bytes} bytes",
+        ),
+    ],
+)
+
+
+if replicas is not None:
+    @api.middleware("http")
+    async def read_your_writes(request: Request, call_next):
+        # Pin this client to the primary for a short while after any successful write
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+            response.set_cookie(PRIMARY_COOKIE, "1", max_age=max(1, int(settings.db_replica_sticky_seconds)), httponly=True, samesite="lax")
+        return response
+
+if settings.db_async:
+    from .routers import async_reads
+
+    # Registered before the sync routes below, so these win for the same method/path
+    api.include_router(async_reads.router)
+
+
+async def _check_password(plain: str, account) -> bool:
+    # Verifies off the request threadpool and transparently upgrades outdated hashes
+    if not account or not account.password_hash:
+        return False
+    try:
+        valid, new_hash = await hash_pool.run(verify_and_update_password, plain, account.password_hash)
+    except HashPoolBusy:
+        raise HTTPException(status_code=503, detail="Login temporarily overloaded, retry shortly", headers={"Retry-After": "1"})
+    if valid and new_hash:
+        account.password_hash = new_hash
+    return valid
 
 
 @api.post("/login", response_model=Token)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(request: Request, form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+    username = form_data.username
+    client_ip = request.client.host if request.client else "unknown"
+    # The throttles are blocking Postgres round trips with LOGIN_THROTTLE_SHARED (the default)
+    retry_after = await run_in_threadpool(lambda: max(login_user_throttle.retry_after(username), login_ip_throttle.retry_after(client_ip)))
+    if retry_after:
+        raise HTTPException(status_code=429, detail="Too many login attempts", headers={"Retry-After": str(retry_after)})
+
     # Admin login
-    user = db.query(User).filter(User.username == form_data.username).first()
-    if user and verify_password(form_data.password, user.password_hash):
+    user = await run_in_threadpool(lambda: db.query(User).filter(User.username == username).first())
+    if await _check_password(form_data.password, user):
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(login_user_throttle.reset, username)
         token = create_access_token(subject=user.username, role="admin")
         return {"access_token": token, "token_type": "bearer"}
 
     # Restaurant manager login
-    restaurant = db.query(Restaurant).filter(Restaurant.username == form_data.username).first()
-    if restaurant and restaurant.password_hash and verify_password(form_data.password, restaurant.password_hash):
+    restaurant = await run_in_threadpool(lambda: db.query(Restaurant).filter(Restaurant.username == username).first())
+    if await _check_password(form_data.password, restaurant):
+        await run_in_threadpool(db.commit)
+        await run_in_threadpool(login_user_throttle.reset, username)
         token = create_access_token(
             subject=restaurant.username or restaurant.slug,
             role="manager",
@@ -96,56 +214,82 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             restaurant_slug=restaurant.slug,
         )
         return {"access_token": token, "token_type": "bearer"}
-def _ensure_admin(principal: dict):
-    if not principal or principal.get("role") != "admin":
-        raise HTTPException(status_code=403, detail="Admin only")
 
+    await run_in_threadpool(login_user_throttle.fail, username)
+    await run_in_threadpool(login_ip_throttle.fail, client_ip)
+    raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-def _ensure_admin_or_restaurant(principal: dict, restaurant_slug: str, db: Session):
-    if principal.get("role") == "admin":
-        return
-    if principal.get("role") == "manager":
-        rid = principal.get("restaurant_id")
-        rslug = principal.get("restaurant_slug")
-        if not rid:
-            raise HTTPException(status_code=403, detail="Forbidden")
-        r = _get_restaurant_by_slug(db, restaurant_slug)
-        if str(r.id) != rid:
-            raise HTTPException(status_code=403, detail="Forbidden")
-        return
-    raise HTTPException(status_code=403, detail="Forbidden")
 
+@api.get("/admin/login/stats")
+def login_stats(principal: dict = Depends(get_current_principal)):
+    _ensure_admin(principal)
+    return {
+        "hash_pool": hash_pool.stats(),
+        "user_throttle": login_user_throttle.stats(),
+        "ip_throttle": login_ip_throttle.stats(),
+    }
 
-    raise HTTPException(status_code=400, detail="Incorrect username or password")
 
+def _ensure_admin(principal: dict):
+    if not principal or principal.get("role") != "admin":
+        raise HTTPException(status_code=403, detail="Admin only")
 
-def _get_restaurant_by_slug(db: Session, slug: str) -> Restaurant:
-    r = db.query(Restaurant).filter(Restaurant.slug == slug).first()
+
+def _get_restaurant_by_slug(db: Session, slug: str) -> RestaurantRef:
+    r = resolve_restaurant(db, slug)
     if not r:
         raise HTTPException(status_code=404, detail="Restaurant not found")
     return r
 
 
 def _get_restaurant_by_id_or_slug(db: Session, id_or_slug: str) -> Restaurant:
-    # Try UUID
+    r = None
     try:
-        rid = uuid.UUID(id_or_slug)
-        r = db.query(Restaurant).filter(Restaurant.id == rid).first()
-        if r:
-            return r
-    except Exception:
+        r = db.get(Restaurant, uuid.UUID(id_or_slug))
+    except ValueError:
         pass
-    # Fallback by slug
-    return _get_restaurant_by_slug(db, id_or_slug)
+    if r is None:
+        # Slug resolution is served from the restaurant cache, leaving one primary-key get
+        r = db.get(Restaurant, _get_restaurant_by_slug(db, id_or_slug).id)
+    if not r:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return r
+
+
+def _menu_changed(slug: str):
+    # Call after commit from every write that affects what the public menu shows
+    cache_bus.publish("menu", slug)
+    if replicas is not None:
+        replicas.mark_written(slug)
+    if settings.menu_snapshots_enabled:
+        snapshot_scheduler.schedule(slug)
+
+
+def _list_response(request: Request, model, items) -> Response:
+    return model_list_response(request, model, items, settings.admin_cache_control)
+
+
+def _product_page_response(request: Request, page: ProductPage) -> Response:
+    response = _list_response(request, ProductOut, page.items)
+    response.headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
+
+
+@api.get("/admin/cache/stats")
+def cache_stats(principal: dict = Depends(get_current_principal)):
+    _ensure_admin(principal)
+    return {"menu": menu_cache.stats(), "restaurant": restaurant_cache.stats()}
 
 
 # Admin: restaurants
 @api.get("/admin/restaurants", response_model=List[RestaurantOut])
-def list_restaurants(db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
+def list_restaurants(request: Request, db: Session = Depends(get_read_db), principal: dict = Depends(get_current_principal)):
     _ensure_admin(principal)
     # current implementation assumes any authenticated user in users table is admin
     items = db.query(Restaurant).order_by(Restaurant.created_at.desc()).all()
-    return items
+    return _list_response(request, RestaurantOut, items)
 
 
 def _slugify(name: str) -> str:
@@ -184,7 +328,10 @@ def create_restaurant(payload: RestaurantCreate, request: Request, db: Session =
         background_color="#0F0F0F",
     )
     db.add(setting)
+    db.flush()
+    menu_model.catalog_changed(db, rest.id)
     db.commit()
+    _menu_changed(rest.slug)
     db.refresh(rest)
     return rest
 
@@ -206,6 +353,8 @@ def update_restaurant(id_or_slug: str, payload: RestaurantCreate, db: Session =
     if payload.password:
         rest.password_hash = get_password_hash(payload.password)
     db.commit()
+    restaurant_changed(rest.slug)
+    _menu_changed(rest.slug)
     db.refresh(rest)
     return rest
 
@@ -222,8 +371,12 @@ def delete_restaurant(id_or_slug: str, db: Session = Depends(get_db), principal:
     )
     if has_children:
         raise HTTPException(status_code=400, detail="Cannot delete restaurant with existing data")
+    media = [rest.logo_image] + [p for s in rest.settings for p in (s.logo_path, s.barcode_image_path)]
     db.delete(rest)
     db.commit()
+    release_media(db, *media)
+    restaurant_changed(rest.slug)
+    _menu_changed(rest.slug)
     return {"status": "ok"}
 
 
@@ -233,18 +386,22 @@ def toggle_restaurant_active(id_or_slug: str, db: Session = Depends(get_db), pri
     rest = _get_restaurant_by_id_or_slug(db, id_or_slug)
     rest.is_active = not rest.is_active
     db.commit()
+    restaurant_changed(rest.slug)
+    _menu_changed(rest.slug)
     return {"is_active": rest.is_active}
 
 
 # Scoped settings per restaurant
 @api.get("/restaurants/{slug}/settings", response_model=SettingOut)
-def get_settings(slug: str, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+def get_settings(slug: str, db: Session = Depends(get_db), ref: RestaurantRef = Depends(get_scoped_restaurant)):
+    # Manager credentials / logo live on the full row
+    rest = db.get(Restaurant, ref.id)
     setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
     if not setting:
         setting = Setting(restaurant_id=rest.id, company_name=rest.name, currency_1="USD", currency_2="EUR", rate=1.0)
         db.add(setting)
+        db.flush()
+        menu_model.setting_changed(db, rest.id)
         db.commit()
         db.refresh(setting)
     # attach manager_username to response for UI convenience
@@ -256,9 +413,9 @@ def get_settings(slug: str, db: Session = Depends(get_db), principal: dict = Dep
 
 
 @api.post("/restaurants/{slug}/settings", response_model=SettingOut)
-def save_settings(slug: str, payload: SettingCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+def save_settings(slug: str, payload: SettingCreate, db: Session = Depends(get_db), ref: RestaurantRef = Depends(get_scoped_restaurant)):
+    # Manager credentials / logo live on the full row
+    rest = db.get(Restaurant, ref.id)
     setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
     if not setting:
         setting = Setting(restaurant_id=rest.id, **payload.model_dump())
@@ -274,7 +431,10 @@ def save_settings(slug: str, payload: SettingCreate, db: Session = Depends(get_d
         rest.username = payload.manager_username or None
     if payload.manager_password:
         rest.password_hash = get_password_hash(payload.manager_password)
+    db.flush()
+    menu_model.setting_changed(db, rest.id)
     db.commit()
+    _menu_changed(slug)
     db.refresh(setting)
     result = {
         **{k: getattr(setting, k) for k in setting.__dict__ if not k.startswith("_")},
@@ -284,9 +444,10 @@ def save_settings(slug: str, payload: SettingCreate, db: Session = Depends(get_d
 
 
 @api.post("/restaurants/{slug}/settings/logo", response_model=SettingOut)
-async def upload_logo(slug: str, request: Request, file: UploadFile = File(...), db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+async def upload_logo(slug: str, file: UploadFile = File(...), db: Session = Depends(get_db), ref: RestaurantRef = Depends(get_scoped_restaurant)):
+    # Manager credentials / logo live on the full row
+    rest = db.get(Restaurant, ref.id)
+    stored = await store_image(file)
     setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
     if not setting:
         setting = Setting(restaurant_id=rest.id, company_name=rest.name, currency_1="USD", currency_2="EUR", rate=1.0)
@@ -294,15 +455,18 @@ async def upload_logo(slug: str, request: Request, file: UploadFile = File(...),
         db.commit()
         db.refresh(setting)
 
-    file_ext = Path(file.filename).suffix
-    dest = media_path / f"{rest.slug}_logo{file_ext}"
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    base = str(request.base_url).rstrip('/')
-    setting.logo_path = f"{base}/media/{dest.name}"
+    old_paths = (setting.logo_path, rest.logo_image)
+    setting.logo_path = stored.key
+    setting.logo_variants = stored.variants
     # also reflect on restaurant logo_image for quick public usage
     rest.logo_image = setting.logo_path
+    db.flush()
+    menu_model.setting_changed(db, rest.id)
     db.commit()
+    # Reference scans and storage list/delete calls block (boto3 with MEDIA_STORAGE=s3)
+    await run_in_threadpool(release_media, db, *old_paths)
+    restaurant_changed(slug)
+    _menu_changed(slug)
     db.refresh(setting)
     return {
         **{k: getattr(setting, k) for k in setting.__dict__ if not k.startswith("_")},
@@ -311,9 +475,10 @@ async def upload_logo(slug: str, request: Request, file: UploadFile = File(...),
 
 
 @api.post("/restaurants/{slug}/settings/barcode_image", response_model=SettingOut)
-async def upload_barcode_image(slug: str, request: Request, file: UploadFile = File(...), db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+async def upload_barcode_image(slug: str, file: UploadFile = File(...), db: Session = Depends(get_db), ref: RestaurantRef = Depends(get_scoped_restaurant)):
+    # Manager credentials / logo live on the full row
+    rest = db.get(Restaurant, ref.id)
+    stored = await store_image(file, variants=False)
     setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
     if not setting:
         setting = Setting(restaurant_id=rest.id, company_name=rest.name, currency_1="USD", currency_2="EUR", rate=1.0)
@@ -321,13 +486,13 @@ async def upload_barcode_image(slug: str, request: Request, file: UploadFile = F
         db.commit()
         db.refresh(setting)
 
-    file_ext = Path(file.filename).suffix
-    dest = media_path / f"{rest.slug}_barcode{file_ext}"
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    base = str(request.base_url).rstrip('/')
-    setting.barcode_image_path = f"{base}/media/{dest.name}"
+    old_path = setting.barcode_image_path
+    setting.barcode_image_path = stored.key
+    db.flush()
+    menu_model.setting_changed(db, rest.id)
     db.commit()
+    await run_in_threadpool(release_media, db, old_path)
+    _menu_changed(slug)
     db.refresh(setting)
     return {
         **{k: getattr(setting, k) for k in setting.__dict__ if not k.startswith("_")},
@@ -337,139 +502,149 @@ async def upload_barcode_image(slug: str, request: Request, file: UploadFile = F
 
 # Categories
 @api.get("/restaurants/{slug}/categories", response_model=List[CategoryOut])
-def list_categories(slug: str, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
-    return db.query(Category).filter(Category.restaurant_id == rest.id).order_by(Category.name.asc()).all()
+def list_categories(slug: str, request: Request, db: Session = Depends(get_read_db), rest: RestaurantRef = Depends(get_scoped_restaurant_read)):
+    items = db.query(Category).filter(Category.restaurant_id == rest.id).order_by(Category.name.asc()).all()
+    return _list_response(request, CategoryOut, items)
 
 
 @api.post("/restaurants/{slug}/categories", response_model=CategoryOut)
-def create_category(slug: str, payload: CategoryCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+def create_category(slug: str, payload: CategoryCreate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     cat = Category(restaurant_id=rest.id, **payload.model_dump())
     db.add(cat)
+    db.flush()
+    menu_model.categories_changed(db, rest.id, [cat.id])
     db.commit()
+    _menu_changed(slug)
     db.refresh(cat)
     return cat
 
 
 @api.put("/restaurants/{slug}/categories/{category_id}", response_model=CategoryOut)
-def update_category(slug: str, category_id: int, payload: CategoryCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+def update_category(slug: str, category_id: int, payload: CategoryCreate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     cat = db.get(Category, category_id)
-    if not cat:
+    if not cat or cat.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Category not found")
     cat.name = payload.name
+    db.flush()
+    menu_model.categories_changed(db, rest.id, [cat.id])
     db.commit()
+    _menu_changed(slug)
     db.refresh(cat)
     return cat
 
 
 @api.delete("/restaurants/{slug}/categories/{category_id}")
-def delete_category(slug: str, category_id: int, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+def delete_category(slug: str, category_id: int, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     # Prevent deletion if products exist linked
     product_link = db.query(product_categories).filter_by(category_id=category_id).first()
     if product_link:
         raise HTTPException(status_code=400, detail="Cannot delete category with linked products")
     cat = db.get(Category, category_id)
-    if not cat:
+    if not cat or cat.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Category not found")
+    old_path = cat.image_path
     db.delete(cat)
+    db.flush()
+    menu_model.categories_changed(db, rest.id, [category_id])
     db.commit()
+    release_media(db, old_path)
+    _menu_changed(slug)
     return {"status": "ok"}
 
 
 # Ingredients
 @api.get("/restaurants/{slug}/ingredients", response_model=List[IngredientOut])
-def list_ingredients(slug: str, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
-    return db.query(Ingredient).filter(Ingredient.restaurant_id == rest.id).order_by(Ingredient.name.asc()).all()
+def list_ingredients(slug: str, request: Request, db: Session = Depends(get_read_db), rest: RestaurantRef = Depends(get_scoped_restaurant_read)):
+    items = db.query(Ingredient).filter(Ingredient.restaurant_id == rest.id).order_by(Ingredient.name.asc()).all()
+    return _list_response(request, IngredientOut, items)
 
 
 @api.post("/restaurants/{slug}/ingredients", response_model=IngredientOut)
-def create_ingredient(slug: str, payload: IngredientCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+def create_ingredient(slug: str, payload: IngredientCreate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     ing = Ingredient(restaurant_id=rest.id, **payload.model_dump())
     db.add(ing)
+    db.flush()
+    menu_model.ingredients_changed(db, rest.id, [ing.id])
     db.commit()
+    _menu_changed(slug)
     db.refresh(ing)
     return ing
 
 
 @api.put("/restaurants/{slug}/ingredients/{ingredient_id}", response_model=IngredientOut)
-def update_ingredient(slug: str, ingredient_id: int, payload: IngredientCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+def update_ingredient(slug: str, ingredient_id: int, payload: IngredientCreate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     ing = db.get(Ingredient, ingredient_id)
-    if not ing:
+    if not ing or ing.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Ingredient not found")
     ing.name = payload.name
+    db.flush()
+    menu_model.ingredients_changed(db, rest.id, [ing.id])
     db.commit()
+    _menu_changed(slug)
     db.refresh(ing)
     return ing
 
 
 @api.delete("/restaurants/{slug}/ingredients/{ingredient_id}")
-def delete_ingredient(slug: str, ingredient_id: int, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+def delete_ingredient(slug: str, ingredient_id: int, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     ing = db.get(Ingredient, ingredient_id)
-    if not ing:
+    if not ing or ing.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Ingredient not found")
+    old_path = ing.image_path
+    # Deleting the ingredient drops its links, which changes these products' entries
+    linked = [row.product_id for row in db.query(product_ingredients.c.product_id).filter_by(ingredient_id=ingredient_id)]
     db.delete(ing)
+    db.flush()
+    menu_model.ingredients_changed(db, rest.id, [ingredient_id])
+    menu_model.products_changed(db, rest.id, linked)
     db.commit()
+    release_media(db, old_path)
+    _menu_changed(slug)
     return {"status": "ok"}
 
 
 @api.post("/restaurants/{slug}/ingredients/{ingredient_id}/image", response_model=IngredientOut)
-async def upload_ingredient_image(slug: str, ingredient_id: int, request: Request, file: UploadFile = File(...), db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+async def upload_ingredient_image(slug: str, ingredient_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     ing = db.get(Ingredient, ingredient_id)
-    if not ing:
+    if not ing or ing.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Ingredient not found")
-    ext = Path(file.filename).suffix
-    dest = media_path / f"{slug}_ingredient_{ingredient_id}{ext}"
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    base = str(request.base_url).rstrip('/')
-    ing.image_path = f"{base}/media/{dest.name}"
+    stored = await store_image(file)
+    old_path = ing.image_path
+    ing.image_path = stored.key
+    ing.image_variants = stored.variants
+    db.flush()
+    menu_model.ingredients_changed(db, rest.id, [ing.id])
     db.commit()
+    await run_in_threadpool(release_media, db, old_path)
+    _menu_changed(slug)
     db.refresh(ing)
     return ing
 
 
 # Products
 @api.get("/restaurants/{slug}/products", response_model=List[ProductOut])
-def list_products(slug: str, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
-    products = db.query(Product).filter(Product.restaurant_id == rest.id).order_by(Product.name.asc()).all()
-    setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
-    rate = setting.rate if setting else 1.0
-    result: list[dict] = []
-    for p in products:
-        cat_ids = [r.category_id for r in db.execute(product_categories.select().where(product_categories.c.product_id == p.id)).fetchall()]
-        ing_ids = [r.ingredient_id for r in db.execute(product_ingredients.select().where(product_ingredients.c.product_id == p.id)).fetchall()]
-        result.append({
-            "id": p.id,
-            "name": p.name,
-            "image_path": p.image_path,
-            "price_currency_1": p.price_currency_1,
-            "price_currency_2": round(p.price_currency_1 * rate, 2),
-            "category_ids": cat_ids,
-            "ingredient_ids": ing_ids,
-        })
-    return result
+def list_products(
+    slug: str,
+    request: Request,
+    q: Optional[str] = Query(None, max_length=100),
+    category_id: Optional[int] = None,
+    ingredient_id: Optional[int] = None,
+    sort: ProductSort = "name",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    rest: RestaurantRef = Depends(get_scoped_restaurant_read),
+):
+    # Without limit every matching product is returned; the total and next cursor travel in headers
+    page = list_product_page(db, rest.id, ProductFilters(q, category_id, ingredient_id), sort, limit, cursor)
+    return _product_page_response(request, page)
 
 
 @api.post("/restaurants/{slug}/products", response_model=ProductOut)
-def create_product(slug: str, payload: ProductCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+def create_product(slug: str, payload: ProductCreate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
     rate = setting.rate if setting else 1.0
+    check_link_ids(db, rest.id, payload.category_ids, payload.ingredient_ids)
     product = Product(
         restaurant_id=rest.id,
         name=payload.name,
@@ -477,162 +652,163 @@ def create_product(slug: str, payload: ProductCreate, db: Session = Depends(get_
     )
     db.add(product)
     db.flush()
-
-    if payload.category_ids:
-        for cid in payload.category_ids:
-            db.execute(product_categories.insert().values(product_id=product.id, category_id=cid))
-    if payload.ingredient_ids:
-        for iid in payload.ingredient_ids:
-            db.execute(product_ingredients.insert().values(product_id=product.id, ingredient_id=iid))
+    sync_product_links(db, product.id, payload.category_ids, payload.ingredient_ids, new=True)
+    menu_model.products_changed(db, rest.id, [product.id])
     db.commit()
+    _menu_changed(slug)
     db.refresh(product)
-    return {
-        "id": product.id,
-        "name": product.name,
-        "image_path": product.image_path,
-        "price_currency_1": product.price_currency_1,
-        "price_currency_2": round(product.price_currency_1 * rate, 2),
-        "category_ids": payload.category_ids or [],
-        "ingredient_ids": payload.ingredient_ids or [],
-    }
+    return product_out(product, rate, payload.category_ids, payload.ingredient_ids)
+
+
+@api.post("/restaurants/{slug}/products/bulk-price", response_model=BulkPriceResult)
+def bulk_price_products(slug: str, payload: BulkPriceUpdate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
+    filters = ProductFilters(payload.q, payload.category_id, payload.ingredient_id, tuple(payload.product_ids) if payload.product_ids is not None else None)
+    result = reprice_products(db, rest.id, filters, payload)
+    if not payload.dry_run and result["changed"]:
+        menu_model.products_changed(db, rest.id, [c["id"] for c in result["changes"]])
+        db.commit()
+        _menu_changed(slug)
+    result["changes"] = result["changes"][:PRICE_PREVIEW_LIMIT]
+    return result
 
 
 @api.put("/restaurants/{slug}/products/{product_id}", response_model=ProductOut)
-def update_product(slug: str, product_id: int, payload: ProductCreate, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
-    rest = _get_restaurant_by_slug(db, slug)
+def update_product(slug: str, product_id: int, payload: ProductCreate, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     product = db.get(Product, product_id)
-    if not product:
+    if not product or product.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Product not found")
     setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
     rate = setting.rate if setting else 1.0
+    check_link_ids(db, rest.id, payload.category_ids, payload.ingredient_ids)
     product.name = payload.name
     product.price_currency_1 = payload.price_currency_1
-    # Reset relations
-    db.execute(product_categories.delete().where(product_categories.c.product_id == product_id))
-    db.execute(product_ingredients.delete().where(product_ingredients.c.product_id == product_id))
-    if payload.category_ids:
-        for cid in payload.category_ids:
-            db.execute(product_categories.insert().values(product_id=product.id, category_id=cid))
-    if payload.ingredient_ids:
-        for iid in payload.ingredient_ids:
-            db.execute(product_ingredients.insert().values(product_id=product.id, ingredient_id=iid))
+    sync_product_links(db, product.id, payload.category_ids, payload.ingredient_ids)
+    db.flush()
+    menu_model.products_changed(db, rest.id, [product.id])
     db.commit()
+    _menu_changed(slug)
     db.refresh(product)
-    return {
-        "id": product.id,
-        "name": product.name,
-        "image_path": product.image_path,
-        "price_currency_1": product.price_currency_1,
-        "price_currency_2": round(product.price_currency_1 * rate, 2),
-        "category_ids": payload.category_ids or [],
-        "ingredient_ids": payload.ingredient_ids or [],
-    }
+    return product_out(product, rate, payload.category_ids, payload.ingredient_ids)
 
 
 @api.delete("/restaurants/{slug}/products/{product_id}")
-def delete_product(slug: str, product_id: int, db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+def delete_product(slug: str, product_id: int, db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     product = db.get(Product, product_id)
-    if not product:
+    if not product or product.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Product not found")
+    old_path = product.image_path
     db.delete(product)
+    db.flush()
+    menu_model.products_changed(db, rest.id, [product_id])
     db.commit()
+    release_media(db, old_path)
+    _menu_changed(slug)
     return {"status": "ok"}
 
 
 @api.post("/restaurants/{slug}/categories/{category_id}/image", response_model=CategoryOut)
-async def upload_category_image(slug: str, category_id: int, request: Request, file: UploadFile = File(...), db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+async def upload_category_image(slug: str, category_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     cat = db.get(Category, category_id)
-    if not cat:
+    if not cat or cat.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Category not found")
-    ext = Path(file.filename).suffix
-    dest = media_path / f"{slug}_category_{category_id}{ext}"
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    base = str(request.base_url).rstrip('/')
-    cat.image_path = f"{base}/media/{dest.name}"
+    stored = await store_image(file)
+    old_path = cat.image_path
+    cat.image_path = stored.key
+    cat.image_variants = stored.variants
+    db.flush()
+    menu_model.categories_changed(db, rest.id, [cat.id])
     db.commit()
+    await run_in_threadpool(release_media, db, old_path)
+    _menu_changed(slug)
     db.refresh(cat)
     return cat
 
 
 @api.post("/restaurants/{slug}/products/{product_id}/image", response_model=ProductOut)
-async def upload_product_image(slug: str, product_id: int, request: Request, file: UploadFile = File(...), db: Session = Depends(get_db), principal: dict = Depends(get_current_principal)):
-    _ensure_admin_or_restaurant(principal, slug, db)
+async def upload_product_image(slug: str, product_id: int, file: UploadFile = File(...), db: Session = Depends(get_db), rest: RestaurantRef = Depends(get_scoped_restaurant)):
     product = db.get(Product, product_id)
-    if not product:
+    if not product or product.restaurant_id != rest.id:
         raise HTTPException(status_code=404, detail="Product not found")
-    ext = Path(file.filename).suffix
-    dest = media_path / f"{slug}_product_{product_id}{ext}"
-    with dest.open("wb") as f:
-        f.write(await file.read())
-    base = str(request.base_url).rstrip('/')
-    product.image_path = f"{base}/media/{dest.name}"
+    stored = await store_image(file)
+    old_path = product.image_path
+    product.image_path = stored.key
+    product.image_variants = stored.variants
+    db.flush()
+    menu_model.products_changed(db, rest.id, [product.id])
     db.commit()
-    db.refresh(product)
-    return product
+    await run_in_threadpool(release_media, db, old_path)
+    _menu_changed(slug)
+    return load_product_out(db, product)
+
+
+# Catalog import/export
+@api.post("/restaurants/{slug}/catalog/import", response_model=CatalogImportResult)
+def import_catalog(
+    slug: str,
+    file: UploadFile = File(...),
+    fmt: Optional[catalog.CatalogFormat] = Query(None, alias="format"),
+    db: Session = Depends(get_db),
+    rest: RestaurantRef = Depends(get_scoped_restaurant),
+):
+    # One transaction: a bad row anywhere leaves the catalog untouched (the session rolls back on close)
+    result = catalog.import_catalog(db, rest.id, file.file, fmt or catalog.guess_format(file.filename, file.content_type))
+    menu_model.catalog_changed(db, rest.id)
+    db.commit()
+    _menu_changed(slug)
+    return result
+
+
+@api.get("/restaurants/{slug}/catalog/export")
+def export_catalog(slug: str, fmt: catalog.CatalogFormat = Query("json", alias="format"), rest: RestaurantRef = Depends(get_scoped_restaurant)):
+    media_type = "text/csv; charset=utf-8" if fmt == "csv" else "application/json"
+    return StreamingResponse(
+        catalog.export_catalog(rest.id, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{slug}-catalog.{fmt}"'},
+    )
 
 
 # Public digital menu endpoint (per restaurant)
 @api.get("/public/menu/{restaurant_slug}", response_model=dict)
-def public_menu(restaurant_slug: str, db: Session = Depends(get_db)):
+def public_menu(restaurant_slug: str, request: Request, db: Session = Depends(get_read_db)):
+    rendered = menu_cache.get(restaurant_slug)
+    if rendered is None:
+        version = menu_cache.version(restaurant_slug)
+        rest = _get_restaurant_by_slug(db, restaurant_slug)
+        rendered = render_menu(menu_model.load_public_menu(db, rest))
+        menu_cache.set(restaurant_slug, rendered, version=version)
+    return conditional_response(request, rendered.body, rendered.etag, settings.public_menu_cache_control)
+
+
+@api.get("/public/menu/{restaurant_slug}/search", response_model=dict)
+def search_public_menu(
+    restaurant_slug: str,
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_read_db),
+):
+    # Ranked product/category/ingredient names; fuzzy and accent-insensitive (services/search.py)
     rest = _get_restaurant_by_slug(db, restaurant_slug)
-    if not rest.is_active:
-        return {"unavailable": True, "message": "Temporarily unavailable"}
-    setting = db.query(Setting).filter(Setting.restaurant_id == rest.id).first()
-    categories = db.query(Category).filter(Category.restaurant_id == rest.id).order_by(Category.name.asc()).all()
-    products = db.query(Product).filter(Product.restaurant_id == rest.id).order_by(Product.name.asc()).all()
-    ingredients = db.query(Ingredient).filter(Ingredient.restaurant_id == rest.id).order_by(Ingredient.name.asc()).all()
-    # Compose DTO optimized for UI
-    cat_map = {c.id: {"id": c.id, "name": c.name, "image_path": c.image_path, "products": []} for c in categories}
-    uncategorized_products: list[dict] = []
-    # Link products to categories and collect uncategorized
-    for p in products:
-        rows = db.execute(product_categories.select().where(product_categories.c.product_id == p.id)).fetchall()
-        p_cat_ids = [r.category_id for r in rows]
-        ing_rows = db.execute(product_ingredients.select().where(product_ingredients.c.product_id == p.id)).fetchall()
-        p_ing_ids = [r.ingredient_id for r in ing_rows]
-        p_ingredients = [i.name for i in ingredients if i.id in p_ing_ids]
-        p_dto = {
-            "id": p.id,
-            "name": p.name,
-            "image_path": p.image_path,
-            "price_currency_1": p.price_currency_1,
-            "price_currency_2": round(p.price_currency_1 * (setting.rate if setting else 1.0), 2),
-            "ingredient_names": p_ingredients,
-        }
-        if not p_cat_ids:
-            uncategorized_products.append(p_dto)
-        else:
-            for cid in p_cat_ids:
-                if cid in cat_map:
-                    cat_map[cid]["products"].append(p_dto)
-
-    categories_out: list[dict] = []
-    if uncategorized_products:
-        categories_out.append({
-            "id": -1,
-            "name": "Uncategorized",
-            "image_path": None,
-            "products": uncategorized_products,
-        })
-    categories_out.extend(list(cat_map.values()))
+    return conditional_response(request, render_json(search_menu(db, rest, q, limit)), cache_control=settings.public_menu_cache_control)
 
-    return {
-        "restaurant": {"name": rest.name, "slug": rest.slug, "logo_image": rest.logo_image},
-        "setting": {
-            "company_name": setting.company_name if setting else "",
-            "logo_path": setting.logo_path if setting else None,
-            "currency_1": setting.currency_1 if setting else "USD",
-            "currency_2": setting.currency_2 if setting else "EUR",
-            "barcode_image_path": setting.barcode_image_path if setting else None,
-            "primary_color": setting.primary_color if setting else None,
-            "background_color": setting.background_color if setting else None,
-        },
-        "categories": categories_out,
-    }
+
+if isinstance(storage, S3Storage) and settings.s3_presign_expiry_seconds > 0:
+    @api.get("/media/{key:path}", include_in_schema=False)
+    def signed_media(key: str):
+        # Stable media URL for private buckets: signed when requested, never when cached or persisted
+        if key.startswith("/") or ".." in key.split("/"):
+            raise HTTPException(status_code=404, detail="Not found")
+        max_age = min(settings.s3_presign_expiry_seconds // 2, 3600)
+        return RedirectResponse(storage.presigned_url(key), status_code=307, headers={"Cache-Control": f"private, max-age={max_age}"})
+
+
+if settings.metrics_enabled:
+    @app.get("/metrics", include_in_schema=False)
+    def metrics():
+        # Prometheus text exposition format; keep it off the public internet at the proxy
+        body = shared_metrics.render() if shared_metrics is not None else registry.render()
+        return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
 
 
 app.mount(settings.api_v1_prefix, api)
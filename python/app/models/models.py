@@ -1,18 +1,22 @@
 from datetime import datetime
 import uuid
 from sqlalchemy import (
+    BigInteger,
     Column,
     Integer,
     String,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Table,
     Text,
     UniqueConstraint,
     Boolean,
+    JSON,
+    func,
 )
-from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.dialects.postgresql import JSONB, UUID
 from sqlalchemy.orm import relationship, Mapped, mapped_column
 from ..core.database import Base
 
@@ -23,7 +27,8 @@ product_categories = Table(
     Base.metadata,
     Column("product_id", ForeignKey("products.id", ondelete="CASCADE"), primary_key=True),
     Column("category_id", ForeignKey("categories.id", ondelete="RESTRICT"), primary_key=True),
-    UniqueConstraint("product_id", "category_id", name="uq_product_category"),
+    # The primary key serves product -> links; this one category -> products and the FK checks
+    Index("ix_product_categories_category_id", "category_id", "product_id"),
 )
 
 product_ingredients = Table(
@@ -31,7 +36,7 @@ product_ingredients = Table(
     Base.metadata,
     Column("product_id", ForeignKey("products.id", ondelete="CASCADE"), primary_key=True),
     Column("ingredient_id", ForeignKey("ingredients.id", ondelete="CASCADE"), primary_key=True),
-    UniqueConstraint("product_id", "ingredient_id", name="uq_product_ingredient"),
+    Index("ix_product_ingredients_ingredient_id", "ingredient_id", "product_id"),
 )
 
 
@@ -80,17 +85,20 @@ class Setting(Base, TimestampMixin):
     barcode_image_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
     primary_color: Mapped[str | None] = mapped_column(String(20), nullable=True)
     background_color: Mapped[str | None] = mapped_column(String(20), nullable=True)
+    logo_variants: Mapped[list | None] = mapped_column(JSON, nullable=True)
 
     restaurant: Mapped[Restaurant | None] = relationship("Restaurant", back_populates="settings")
 
 
 class Category(Base, TimestampMixin):
     __tablename__ = "categories"
+    __table_args__ = (UniqueConstraint("restaurant_id", "name", name="uq_category_restaurant_name"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    restaurant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True, index=True)
+    restaurant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
     image_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    image_variants: Mapped[list | None] = mapped_column(JSON, nullable=True)
 
     products: Mapped[list["Product"]] = relationship(
         secondary=product_categories, back_populates="categories"
@@ -101,11 +109,14 @@ class Category(Base, TimestampMixin):
 
 class Product(Base, TimestampMixin):
     __tablename__ = "products"
+    # Tenant filter + name order (and the keyset tiebreaker) in one index
+    __table_args__ = (Index("ix_products_restaurant_name", "restaurant_id", "name", "id"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    restaurant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True, index=True)
+    restaurant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     image_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    image_variants: Mapped[list | None] = mapped_column(JSON, nullable=True)
     price_currency_1: Mapped[float] = mapped_column(Float, nullable=False)
 
     categories: Mapped[list[Category]] = relationship(
@@ -121,11 +132,13 @@ class Product(Base, TimestampMixin):
 
 class Ingredient(Base, TimestampMixin):
     __tablename__ = "ingredients"
+    __table_args__ = (UniqueConstraint("restaurant_id", "name", name="uq_ingredient_restaurant_name"),)
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
-    restaurant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True, index=True)
+    restaurant_id: Mapped[uuid.UUID | None] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), nullable=True)
     name: Mapped[str] = mapped_column(String(200), nullable=False)
     image_path: Mapped[str | None] = mapped_column(String(255), nullable=True)
+    image_variants: Mapped[list | None] = mapped_column(JSON, nullable=True)
 
     products: Mapped[list[Product]] = relationship(
         secondary=product_ingredients, back_populates="ingredients"
@@ -134,4 +147,27 @@ class Ingredient(Base, TimestampMixin):
     restaurant: Mapped[Restaurant | None] = relationship("Restaurant", back_populates="ingredients")
 
 
+class MenuDocument(Base):
+    """Read model of one restaurant's public menu (see services/menu_model.py)."""
+
+    __tablename__ = "menu_documents"
+
+    restaurant_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("restaurants.id", ondelete="CASCADE"), primary_key=True)
+    # {"setting": {...} | null, "categories": {id: {...}}, "ingredients": {id: {...}}, "products": {id: {...}}}
+    document: Mapped[dict] = mapped_column(JSONB, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class LoginFailure(Base):
+    """One failed login, per throttle scope ("user" or "ip"); see core/throttle.py."""
+
+    __tablename__ = "login_failures"
+    __table_args__ = (
+        Index("ix_login_failures_scope_key", "scope", "key", "failed_at"),
+        Index("ix_login_failures_scope_failed_at", "scope", "failed_at"),
+    )
 
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    scope: Mapped[str] = mapped_column(String(10), nullable=False)
+    key: Mapped[str] = mapped_column(Text, nullable=False)
+    failed_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -0,0 +1,86 @@
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..core.config import settings
+from ..core.database import get_async_read_db
+from ..core.http_cache import conditional_response, model_list_response
+from ..dependencies import check_scope_owner, check_scope_role, get_current_principal
+from ..models.models import Category, Ingredient
+from ..schemas.schemas import CategoryOut, IngredientOut, ProductOut
+from ..services.menu import menu_cache, render_menu
+from ..services.menu_model import load_public_menu_async
+from ..services.products import ProductFilters, ProductSort, build_product_page, product_page_statements
+from ..services.restaurants import RestaurantRef, resolve_restaurant_async
+
+
+# Async (asyncpg) versions of the hot read endpoints. Included ahead of the sync
+# routes in main.py when DB_ASYNC is enabled, so these take precedence.
+router = APIRouter()
+
+
+async def _get_restaurant_by_slug(db: AsyncSession, slug: str) -> RestaurantRef:
+    r = await resolve_restaurant_async(db, slug)
+    if not r:
+        raise HTTPException(status_code=404, detail="Restaurant not found")
+    return r
+
+
+async def _scoped_restaurant(db: AsyncSession, slug: str, principal: dict) -> RestaurantRef:
+    check_scope_role(principal)
+    rest = await _get_restaurant_by_slug(db, slug)
+    check_scope_owner(principal, rest)
+    return rest
+
+
+@router.get("/public/menu/{restaurant_slug}", response_model=dict)
+async def public_menu(restaurant_slug: str, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    rendered = menu_cache.get(restaurant_slug)
+    if rendered is None:
+        version = menu_cache.version(restaurant_slug)
+        rest = await _get_restaurant_by_slug(db, restaurant_slug)
+        rendered = render_menu(await load_public_menu_async(db, rest))
+        menu_cache.set(restaurant_slug, rendered, version=version)
+    return conditional_response(request, rendered.body, rendered.etag, settings.public_menu_cache_control)
+
+
+@router.get("/restaurants/{slug}/categories", response_model=List[CategoryOut])
+async def list_categories(slug: str, request: Request, db: AsyncSession = Depends(get_async_read_db), principal: dict = Depends(get_current_principal)):
+    rest = await _scoped_restaurant(db, slug, principal)
+    items = (await db.execute(select(Category).where(Category.restaurant_id == rest.id).order_by(Category.name.asc()))).scalars().all()
+    return model_list_response(request, CategoryOut, items, settings.admin_cache_control)
+
+
+@router.get("/restaurants/{slug}/ingredients", response_model=List[IngredientOut])
+async def list_ingredients(slug: str, request: Request, db: AsyncSession = Depends(get_async_read_db), principal: dict = Depends(get_current_principal)):
+    rest = await _scoped_restaurant(db, slug, principal)
+    items = (await db.execute(select(Ingredient).where(Ingredient.restaurant_id == rest.id).order_by(Ingredient.name.asc()))).scalars().all()
+    return model_list_response(request, IngredientOut, items, settings.admin_cache_control)
+
+
+@router.get("/restaurants/{slug}/products", response_model=List[ProductOut])
+async def list_products(
+    slug: str,
+    request: Request,
+    q: Optional[str] = Query(None, max_length=100),
+    category_id: Optional[int] = None,
+    ingredient_id: Optional[int] = None,
+    sort: ProductSort = "name",
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_read_db),
+    principal: dict = Depends(get_current_principal),
+):
+    rest = await _scoped_restaurant(db, slug, principal)
+    stmts = product_page_statements(rest.id, ProductFilters(q, category_id, ingredient_id), sort, limit, cursor)
+    rows = (await db.execute(stmts["page"])).all()
+    rate = (await db.execute(stmts["rate"])).scalar()
+    total = (await db.execute(stmts["total"])).scalar_one()
+    page = build_product_page(rows, rate, total, sort, limit)
+    response = model_list_response(request, ProductOut, page.items, settings.admin_cache_control)
+    response.headers["X-Total-Count"] = str(page.total)
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
+    return response
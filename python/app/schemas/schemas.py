@@ -1,8 +1,14 @@
 from datetime import datetime
-from typing import List, Optional
-from pydantic import BaseModel, Field
+from typing import Annotated, List, Literal, Optional
+from pydantic import AfterValidator, BaseModel, Field, StringConstraints, model_validator
 from uuid import UUID
 
+from ..services.storage import media_url
+
+
+# Stored media keys are turned into public URLs on the way out
+MediaUrl = Annotated[Optional[str], AfterValidator(media_url)]
+
 
 class Principal(BaseModel):
     username: str
@@ -49,7 +55,7 @@ class RestaurantOut(BaseModel):
     id: UUID
     name: str
     slug: str
-    logo_image: Optional[str] = None
+    logo_image: MediaUrl = None
     username: Optional[str] = None
     is_active: bool
     created_at: datetime
@@ -79,10 +85,25 @@ class SettingCreate(SettingBase):
     manager_password: Optional[str] = Field(default=None, min_length=4)
 
 
+class ImageVariant(BaseModel):
+    url: str
+    width: int
+    height: int
+    format: str
+
+    @model_validator(mode="before")
+    @classmethod
+    def _resolve_key(cls, data):
+        if isinstance(data, dict) and "key" in data:
+            data = {**data, "url": media_url(data["key"])}
+        return data
+
+
 class SettingOut(SettingBase):
     id: int
-    logo_path: Optional[str] = None
-    barcode_image_path: Optional[str] = None
+    logo_path: MediaUrl = None
+    logo_variants: Optional[List[ImageVariant]] = None
+    barcode_image_path: MediaUrl = None
     updated_at: datetime
     manager_username: Optional[str] = None
 
@@ -100,7 +121,8 @@ class CategoryCreate(CategoryBase):
 
 class CategoryOut(CategoryBase):
     id: int
-    image_path: Optional[str] = None
+    image_path: MediaUrl = None
+    image_variants: Optional[List[ImageVariant]] = None
 
     class Config:
         from_attributes = True
@@ -116,7 +138,8 @@ class IngredientCreate(IngredientBase):
 
 class IngredientOut(IngredientBase):
     id: int
-    image_path: Optional[str] = None
+    image_path: MediaUrl = None
+    image_variants: Optional[List[ImageVariant]] = None
 
     class Config:
         from_attributes = True
@@ -135,10 +158,83 @@ class ProductCreate(ProductBase):
 
 class ProductOut(ProductBase):
     id: int
-    image_path: Optional[str] = None
+    image_path: MediaUrl = None
+    image_variants: Optional[List[ImageVariant]] = None
     price_currency_2: float
 
     class Config:
         from_attributes = True
 
 
+class BulkPriceUpdate(BaseModel):
+    # Which products: all of the restaurant's unless narrowed (filters combine with AND)
+    product_ids: Optional[List[int]] = None
+    category_id: Optional[int] = None
+    ingredient_id: Optional[int] = None
+    q: Optional[str] = Field(default=None, max_length=100)
+    # Transform, applied in this order: set_price or price * (1 + percent/100), + amount, rounded to round_to
+    set_price: Optional[float] = Field(default=None, ge=0)
+    percent: Optional[float] = Field(default=None, gt=-100)
+    amount: Optional[float] = None
+    round_to: Optional[float] = Field(default=None, gt=0)
+    round_mode: Literal["nearest", "up", "down"] = "nearest"
+    dry_run: bool = False
+
+    @model_validator(mode="after")
+    def _check_transform(self):
+        if self.set_price is None and self.percent is None and self.amount is None and self.round_to is None:
+            raise ValueError("Give at least one of set_price, percent, amount or round_to")
+        if self.set_price is not None and self.percent is not None:
+            raise ValueError("set_price and percent cannot be combined")
+        return self
+
+
+class PriceChange(BaseModel):
+    id: int
+    name: str
+    old_price: float
+    new_price: float
+
+
+class BulkPriceResult(BaseModel):
+    dry_run: bool
+    matched: int
+    changed: int
+    # At most PRICE_PREVIEW_LIMIT entries, ordered by name
+    changes: List[PriceChange]
+
+
+# Catalog import/export: categories and ingredients are referenced by name
+CategoryName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=100)]
+IngredientName = Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=200)]
+
+
+class CategoryImport(BaseModel):
+    name: CategoryName
+
+
+class IngredientImport(BaseModel):
+    name: IngredientName
+
+
+class ProductImport(BaseModel):
+    name: Annotated[str, StringConstraints(strip_whitespace=True, min_length=1, max_length=200)]
+    price_currency_1: float
+    # None leaves a product's existing links alone; [] clears them
+    categories: Optional[List[CategoryName]] = None
+    ingredients: Optional[List[IngredientName]] = None
+
+
+class CatalogImport(BaseModel):
+    categories: List[CategoryImport] = []
+    ingredients: List[IngredientImport] = []
+    products: List[ProductImport] = []
+
+
+class CatalogImportResult(BaseModel):
+    categories_created: int = 0
+    ingredients_created: int = 0
+    products_created: int = 0
+    products_updated: int = 0
+    products_unchanged: int = 0
+    links_written: int = 0
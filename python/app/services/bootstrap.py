@@ -0,0 +1,37 @@
+from sqlalchemy import func, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..core.database import Base, engine
+from ..core.security import get_password_hash
+from ..models.models import Restaurant, Setting, User
+
+
+# pg_advisory_xact_lock key shared by every process that runs prepare_database
+_SETUP_LOCK_ID = 0x646D5F7365747570  # "dm_setup"
+
+
+def prepare_database(bind: Engine = engine):
+    """Create missing tables and seed the admin user and the demo restaurant.
+
+    Idempotent and serialized across processes: the first worker does the work while the
+    others wait on an advisory lock and then find everything in place.
+    """
+    with Session(bind=bind) as db:
+        if bind.dialect.name == "postgresql":
+            db.execute(select(func.pg_advisory_xact_lock(_SETUP_LOCK_ID)))
+        # Create tables if not exists (alembic handles migrations; this is for safety in dev)
+        Base.metadata.create_all(bind=db.connection())
+        # Seed default admin
+        admin = db.query(User).filter(User.username == "admin").first()
+        if not admin:
+            admin = User(username="admin", password_hash=get_password_hash("evolusys"))
+            db.add(admin)
+        # seed demo restaurant if none exists
+        if db.query(Restaurant).count() == 0:
+            demo = Restaurant(name="La Famiglia", slug="la-famiglia", username="lafamiglia", password_hash=get_password_hash("secret"), is_active=True)
+            db.add(demo)
+            db.flush()
+            setting = Setting(restaurant_id=demo.id, company_name="La Famiglia", currency_1="USD", currency_2="EUR", rate=1.0)
+            db.add(setting)
+        db.commit()
@@ -0,0 +1,316 @@
+import csv
+import io
+from itertools import islice
+import json
+from typing import IO, Iterable, Iterator, Literal
+
+from fastapi import HTTPException
+import ijson
+from ijson.common import ObjectBuilder
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, func, insert, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from ..core.database import SessionLocal
+from ..models.models import Category, Ingredient, Product, product_categories, product_ingredients
+from ..schemas.schemas import CatalogImportResult, CategoryImport, IngredientImport, ProductImport
+
+
+CatalogFormat = Literal["csv", "json"]
+
+BATCH_SIZE = 500
+CSV_FIELDS = ["name", "price_currency_1", "categories", "ingredients"]
+LIST_SEPARATOR = "|"  # between category/ingredient names inside one CSV cell
+LIST_ESCAPE = "\\"  # before a separator or escape character that belongs to a name
+JSON_SECTIONS = {"categories": CategoryImport, "ingredients": IngredientImport, "products": ProductImport}
+
+
+def guess_format(filename: str | None, content_type: str | None) -> CatalogFormat:
+    if (filename or "").lower().endswith(".csv") or (content_type or "").startswith("text/csv"):
+        return "csv"
+    return "json"
+
+
+def _validation_detail(exc: ValidationError, where: str = "") -> str:
+    err = exc.errors()[0]
+    loc = ".".join(str(part) for part in err["loc"])
+    return f"{where}{loc}: {err['msg']}" if loc else f"{where}{err['msg']}"
+
+
+class CatalogImporter:
+    """Upserts one restaurant's catalog batch by batch inside the caller's transaction.
+
+    Categories and ingredients go through ``INSERT ... ON CONFLICT (restaurant_id, name)
+    DO NOTHING``. Products have no unique key, so each batch resolves names to ids in one
+    query, inserts new products in one multi-row INSERT and updates changed prices in one
+    executemany. Links of imported products are diffed against the current ones and only
+    the delta is written (one DELETE and one multi-row INSERT per association table).
+    """
+
+    def __init__(self, db: Session, restaurant_id):
+        self.db = db
+        self.restaurant_id = restaurant_id
+        self.category_ids: dict[str, int] = {}
+        self.ingredient_ids: dict[str, int] = {}
+        self.result = CatalogImportResult()
+
+    def _ensure_names(self, model, ids: dict[str, int], names: Iterable[str]) -> int:
+        missing = sorted({n for n in names if n not in ids})
+        if not missing:
+            return 0
+        lookup = select(model.name, model.id).where(model.restaurant_id == self.restaurant_id, model.name.in_(missing))
+        ids.update(self.db.execute(lookup).tuples().all())
+        new = [n for n in missing if n not in ids]
+        if not new:
+            return 0
+        stmt = pg_insert(model).on_conflict_do_nothing(index_elements=["restaurant_id", "name"]).returning(model.name, model.id)
+        created = self.db.execute(stmt, [{"restaurant_id": self.restaurant_id, "name": n} for n in new]).tuples().all()
+        ids.update(created)
+        if len(created) < len(new):
+            # Inserted concurrently by another transaction
+            ids.update(self.db.execute(lookup).tuples().all())
+        return len(created)
+
+    def add_categories(self, names: Iterable[str]):
+        self.result.categories_created += self._ensure_names(Category, self.category_ids, names)
+
+    def add_ingredients(self, names: Iterable[str]):
+        self.result.ingredients_created += self._ensure_names(Ingredient, self.ingredient_ids, names)
+
+    def add_products(self, products: Iterable[ProductImport]):
+        by_name = {p.name: p for p in products}  # a repeated name keeps its last row
+        if not by_name:
+            return
+        self.add_categories(n for p in by_name.values() for n in p.categories or ())
+        self.add_ingredients(n for p in by_name.values() for n in p.ingredients or ())
+
+        existing: dict[str, tuple[int, float]] = {}
+        rows = self.db.execute(
+            select(Product.name, Product.id, Product.price_currency_1)
+            .where(Product.restaurant_id == self.restaurant_id, Product.name.in_(list(by_name)))
+            .order_by(Product.id)
+        )
+        for name, pid, price in rows:
+            existing.setdefault(name, (pid, price))
+
+        changed = [
+            {"id": existing[p.name][0], "price_currency_1": p.price_currency_1}
+            for p in by_name.values()
+            if p.name in existing and existing[p.name][1] != p.price_currency_1
+        ]
+        if changed:
+            self.db.execute(update(Product), changed)
+        new = [p for p in by_name.values() if p.name not in existing]
+        product_ids = {name: pid for name, (pid, _) in existing.items()}
+        if new:
+            inserted = self.db.execute(
+                insert(Product).returning(Product.name, Product.id),
+                [{"restaurant_id": self.restaurant_id, "name": p.name, "price_currency_1": p.price_currency_1} for p in new],
+            )
+            product_ids.update(inserted.tuples().all())
+        self.result.products_created += len(new)
+        self.result.products_updated += len(changed)
+        self.result.products_unchanged += len(existing) - len(changed)
+
+        for table, column, ids, attr in (
+            (product_categories, "category_id", self.category_ids, "categories"),
+            (product_ingredients, "ingredient_id", self.ingredient_ids, "ingredients"),
+        ):
+            links = {product_ids[p.name]: getattr(p, attr) for p in by_name.values() if getattr(p, attr) is not None}
+            self._replace_links(table, column, ids, links, {pid for pid, _ in existing.values()})
+
+    def _replace_links(self, table, column: str, ids: dict[str, int], links: dict[int, list[str]], existing_ids: set[int]):
+        # Only the delta against the current links is written (see products.sync_product_links)
+        wanted = {(pid, ids[n]) for pid, names in links.items() for n in names}
+        current = set()
+        stale = [pid for pid in links if pid in existing_ids]
+        if stale:
+            current = set(self.db.execute(select(table.c.product_id, table.c[column]).where(table.c.product_id.in_(stale))).tuples().all())
+        removed = current - wanted
+        added = sorted(wanted - current)
+        if removed:
+            self.db.execute(delete(table).where(tuple_(table.c.product_id, table.c[column]).in_(removed)))
+        if added:
+            self.db.execute(insert(table), [{"product_id": pid, column: linked_id} for pid, linked_id in added])
+        self.result.links_written += len(added) + len(removed)
+
+
+def _join(names: Iterable[str]) -> str:
+    return LIST_SEPARATOR.join(
+        n.replace(LIST_ESCAPE, LIST_ESCAPE * 2).replace(LIST_SEPARATOR, LIST_ESCAPE + LIST_SEPARATOR) for n in names
+    )
+
+
+def _split(cell: str | None) -> list[str] | None:
+    # Inverse of _join; a backslash before any other character is kept as written
+    if cell is None:
+        return None
+    parts, current, i = [], [], 0
+    while i < len(cell):
+        ch = cell[i]
+        if ch == LIST_ESCAPE and cell[i + 1:i + 2] in (LIST_ESCAPE, LIST_SEPARATOR):
+            current.append(cell[i + 1])
+            i += 2
+            continue
+        if ch == LIST_SEPARATOR:
+            parts.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    parts.append("".join(current))
+    return [n for n in (part.strip() for part in parts) if n]
+
+
+def read_csv(stream: IO[bytes]) -> Iterator[ProductImport]:
+    """Products from CSV rows (columns: CSV_FIELDS), parsed lazily so large files stream.
+
+    Categories and ingredients named in a row are created as needed; a missing
+    categories/ingredients column leaves existing links untouched.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    missing = {"name", "price_currency_1"} - set(reader.fieldnames or ())
+    if missing:
+        raise HTTPException(status_code=422, detail=f"CSV is missing column(s): {', '.join(sorted(missing))}")
+    for row in reader:
+        try:
+            yield ProductImport(
+                name=row["name"] or "",
+                price_currency_1=row["price_currency_1"] or "",
+                categories=_split(row.get("categories")),
+                ingredients=_split(row.get("ingredients")),
+            )
+        except ValidationError as exc:
+            raise HTTPException(status_code=422, detail=_validation_detail(exc, f"Line {reader.line_num}: "))
+
+
+def read_json(stream: IO[bytes]) -> Iterator[tuple[str, BaseModel]]:
+    """(section, item) pairs of {"categories": [...], "ingredients": [...], "products": [...]}.
+
+    Parsed incrementally, so memory stays bounded by one item; each item is validated on
+    its own and errors point at it as ``products.<index>.<field>``.
+    """
+    counts = dict.fromkeys(JSON_SECTIONS, 0)
+    builder = item_prefix = None
+
+    def item(section: str, raw) -> BaseModel:
+        index = counts[section]
+        counts[section] += 1
+        try:
+            return JSON_SECTIONS[section].model_validate(raw)
+        except ValidationError as exc:
+            err = exc.errors()[0]
+            loc = ".".join(str(part) for part in (section, index, *err["loc"]))
+            raise HTTPException(status_code=422, detail=f"{loc}: {err['msg']}")
+
+    try:
+        for n, (prefix, event, value) in enumerate(ijson.parse(stream, use_float=True)):
+            if n == 0 and event != "start_map":
+                raise HTTPException(status_code=422, detail="Expected a JSON object with categories, ingredients and products")
+            if builder is not None:
+                builder.event(event, value)
+                if prefix == item_prefix and event in ("end_map", "end_array"):
+                    yield item_prefix.partition(".")[0], item(item_prefix.partition(".")[0], builder.value)
+                    builder = None
+                continue
+            if prefix in JSON_SECTIONS and event not in ("start_array", "end_array"):
+                raise HTTPException(status_code=422, detail=f"{prefix}: Input should be a valid list")
+            section, _, rest = prefix.partition(".")
+            if section in JSON_SECTIONS and rest == "item":
+                if event in ("start_map", "start_array"):
+                    builder, item_prefix = ObjectBuilder(), prefix
+                    builder.event(event, value)
+                else:
+                    yield section, item(section, value)
+    except ijson.JSONError as exc:
+        raise HTTPException(status_code=422, detail=f"Invalid JSON: {str(exc).splitlines()[0]}")
+
+
+def _json_products(importer: "CatalogImporter", items: Iterator[tuple[str, BaseModel]]) -> Iterator[ProductImport]:
+    # Products go on to the batching loop; category/ingredient names are written BATCH_SIZE at a time
+    pending: dict[str, list[str]] = {"categories": [], "ingredients": []}
+    add = {"categories": importer.add_categories, "ingredients": importer.add_ingredients}
+    for section, value in items:
+        if section == "products":
+            yield value
+            continue
+        pending[section].append(value.name)
+        if len(pending[section]) >= BATCH_SIZE:
+            add[section](pending[section])
+            pending[section] = []
+    for section, names in pending.items():
+        add[section](names)
+
+
+def import_catalog(db: Session, restaurant_id, stream: IO[bytes], fmt: CatalogFormat) -> CatalogImportResult:
+    # Writes only; the caller commits (or rolls back on error) so an import is all-or-nothing
+    importer = CatalogImporter(db, restaurant_id)
+    if fmt == "csv":
+        products = read_csv(stream)
+    else:
+        products = _json_products(importer, read_json(stream))
+    while batch := list(islice(products, BATCH_SIZE)):
+        importer.add_products(batch)
+    return importer.result
+
+
+def _link_names(table, column, model):
+    return (
+        select(func.array_agg(model.name))
+        .select_from(table.join(model, model.id == table.c[column]))
+        .where(table.c.product_id == Product.id)
+        .scalar_subquery()
+    )
+
+
+def _export_rows(db: Session, restaurant_id):
+    stmt = (
+        select(
+            Product.name,
+            Product.price_currency_1,
+            _link_names(product_categories, "category_id", Category),
+            _link_names(product_ingredients, "ingredient_id", Ingredient),
+        )
+        .where(Product.restaurant_id == restaurant_id)
+        .order_by(Product.name, Product.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    for name, price, categories, ingredients in db.execute(stmt):
+        yield name, price, sorted(categories or []), sorted(ingredients or [])
+
+
+def export_catalog(restaurant_id, fmt: CatalogFormat) -> Iterator[str]:
+    """Stream a restaurant's catalog in the import format, BATCH_SIZE products at a time.
+
+    Uses its own session because the response body is produced after the request's
+    dependencies have been torn down.
+    """
+    with SessionLocal() as db:
+        rows = _export_rows(db, restaurant_id)
+        if fmt == "csv":
+            buf = io.StringIO()
+            writer = csv.writer(buf)
+            writer.writerow(CSV_FIELDS)
+            while batch := list(islice(rows, BATCH_SIZE)):
+                for name, price, categories, ingredients in batch:
+                    writer.writerow([name, price, _join(categories), _join(ingredients)])
+                yield buf.getvalue()
+                buf.seek(0)
+                buf.truncate()
+            yield buf.getvalue()
+            return
+
+        def names(model):
+            stmt = select(model.name).where(model.restaurant_id == restaurant_id).order_by(model.name)
+            return ", ".join(json.dumps({"name": n}) for n in db.execute(stmt).scalars())
+
+        yield f'{{"categories": [{names(Category)}], "ingredients": [{names(Ingredient)}], "products": ['
+        sep = ""
+        while batch := list(islice(rows, BATCH_SIZE)):
+            yield sep + ", ".join(
+                json.dumps({"name": name, "price_currency_1": price, "categories": categories, "ingredients": ingredients})
+                for name, price, categories, ingredients in batch
+            )
+            sep = ", "
+        yield "]}"
@@ -0,0 +1,101 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import logging
+import multiprocessing
+from pathlib import Path
+
+from ..core.config import settings
+
+
+logger = logging.getLogger(__name__)
+
+_EXTENSIONS = {"avif": "avif", "webp": "webp", "jpeg": "jpg"}
+_pool: ProcessPoolExecutor | None = None
+
+
+def _configured_formats() -> list[str]:
+    return [f.strip().lower() for f in settings.image_variant_formats.split(",") if f.strip()]
+
+
+def available_formats() -> list[str]:
+    # Configured formats this Pillow build can encode (AVIF needs Pillow >= 11.2 or a plugin)
+    from PIL import Image
+
+    Image.init()
+    return [fmt for fmt in _configured_formats() if fmt in _EXTENSIONS and fmt.upper() in Image.SAVE]
+
+
+def check_formats():
+    # Called at startup so a Pillow without AVIF (or a typo in the setting) is noticed
+    if not settings.image_variants_enabled:
+        return
+    missing = [fmt for fmt in _configured_formats() if fmt not in available_formats()]
+    if missing:
+        logger.warning("IMAGE_VARIANT_FORMATS lists %s, which this Pillow build cannot encode; those variants are skipped", ", ".join(missing))
+
+
+def variant_widths() -> list[int]:
+    return sorted({int(w) for w in settings.image_variant_widths.split(",") if w.strip()})
+
+
+def render_variants(src: str, out_dir: str, stem: str, widths: list[int], formats: list[str], quality: int) -> list[dict]:
+    # Runs in a worker process: decode once, then resize/encode every width x format
+    from PIL import Image, ImageOps
+
+    with Image.open(src) as im:
+        im = ImageOps.exif_transpose(im)
+        has_alpha = im.mode in ("RGBA", "LA") or (im.mode == "P" and "transparency" in im.info)
+        im = im.convert("RGBA" if has_alpha else "RGB")
+        targets = [w for w in widths if w < im.width] or [im.width]
+        variants = []
+        for width in targets:
+            height = max(1, round(im.height * width / im.width))
+            resized = im.resize((width, height), Image.LANCZOS) if width != im.width else im
+            for fmt in formats:
+                frame = resized
+                if fmt == "jpeg" and has_alpha:
+                    frame = Image.new("RGB", resized.size, (255, 255, 255))
+                    frame.paste(resized, mask=resized.getchannel("A"))
+                name = f"{stem}_{width}w.{_EXTENSIONS[fmt]}"
+                options = {"quality": quality}
+                if fmt == "jpeg":
+                    options.update(optimize=True, progressive=True)
+                elif fmt == "webp":
+                    options["method"] = 4
+                frame.save(Path(out_dir) / name, format=fmt.upper(), **options)
+                variants.append({"file": name, "width": width, "height": height, "format": fmt})
+        return variants
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the API process runs threads (timers, listeners) that must not be forked
+        _pool = ProcessPoolExecutor(max_workers=settings.image_workers, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+async def generate_variants(src: Path, stem: str, out_dir: Path) -> list[dict] | None:
+    # Renders into out_dir; returns [{file, width, height, format}] or None when src is not a decodable image
+    if not settings.image_variants_enabled:
+        return None
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(
+            _get_pool(), render_variants, str(src), str(out_dir), stem, variant_widths(), available_formats(), settings.image_quality
+        )
+    except BrokenProcessPool:
+        logger.error("Image worker died while processing %s; restarting the pool", src.name)
+        shutdown_pool()
+        return None
+    except Exception:
+        logger.warning("Could not build image variants for %s", src.name, exc_info=True)
+        return None
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
@@ -0,0 +1,83 @@
+import logging
+import re
+import time
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.models import Category, Ingredient, Product, Restaurant, Setting
+from .storage import storage
+
+
+logger = logging.getLogger(__name__)
+
+# Content-addressed uploads: storage keys c/{sha256[:32]}.{ext} plus c/{hash}_{w}w.{ext} variants
+
+_BLOB_REF = re.compile(r"(?:^|/)c/([0-9a-f]{32})[._]")
+_MEDIA_COLUMNS = (
+    Category.image_path,
+    Product.image_path,
+    Ingredient.image_path,
+    Setting.logo_path,
+    Setting.barcode_image_path,
+    Restaurant.logo_image,
+)
+
+
+def blob_hash(path: str | None) -> str | None:
+    # Content hash of a stored media reference, or None for legacy / external paths
+    if not path:
+        return None
+    m = _BLOB_REF.search(path)
+    return m.group(1) if m else None
+
+
+def _is_referenced(db: Session, digest: str) -> bool:
+    pattern = f"%c/{digest}.%"
+    for column in _MEDIA_COLUMNS:
+        if db.execute(select(column).where(column.like(pattern)).limit(1)).first() is not None:
+            return True
+    return False
+
+
+def _delete_blob(digest: str) -> int:
+    keys = [key for key, _ in storage.list(f"c/{digest}")]
+    for key in keys:
+        storage.delete(key)
+    return len(keys)
+
+
+def _is_fresh(digest: str, now: float) -> bool:
+    # A blob written within the grace period may belong to an upload that has not committed yet
+    return any(now - mtime < settings.media_gc_grace_seconds for _, mtime in storage.list(f"c/{digest}"))
+
+
+def release_media(db: Session, *paths: str | None):
+    """Delete blobs no row references any more. Call after the commit that dropped the reference.
+
+    Blocking (database scans and storage calls): async handlers run it in the threadpool.
+    """
+    now = time.time()
+    for digest in {blob_hash(p) for p in paths} - {None}:
+        try:
+            if not _is_referenced(db, digest) and not _is_fresh(digest, now):
+                _delete_blob(digest)
+        except Exception:
+            logger.exception("Could not release media blob %s", digest)
+
+
+def collect_garbage(db: Session) -> dict:
+    # Full sweep: remove every blob (and its variants) that no row references
+    referenced = set()
+    for column in _MEDIA_COLUMNS:
+        rows = db.execute(select(column).where(column.like("%c/%"))).scalars()
+        referenced.update(blob_hash(p) for p in rows)
+    now = time.time()
+    stored = {m.group(1) for key, _ in storage.list("c/") if (m := _BLOB_REF.search(key))}
+    removed = files = 0
+    for digest in stored - referenced:
+        if not _is_fresh(digest, now):
+            files += _delete_blob(digest)
+            removed += 1
+    return {"blobs": len(stored), "referenced": len(stored & referenced), "removed": removed, "files_removed": files}
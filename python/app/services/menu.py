@@ -0,0 +1,161 @@
+from collections import defaultdict
+from typing import NamedTuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.cache import VersionedCache
+from ..core.cache_bus import cache_bus
+from ..core.config import settings
+from ..core.http_cache import compute_etag, render_json
+from .restaurants import RestaurantRef
+from .storage import media_url, media_variants
+from ..models.models import (
+    Setting,
+    Category,
+    Product,
+    Ingredient,
+    product_categories,
+    product_ingredients,
+)
+
+
+class RenderedMenu(NamedTuple):
+    body: bytes
+    # Strong ETag over the body; doubles as the restaurant's menu version
+    etag: str
+
+
+# Rendered public menus keyed by restaurant slug; write endpoints call invalidate()
+menu_cache = VersionedCache(maxsize=settings.menu_cache_size, ttl=settings.menu_cache_ttl_seconds)
+cache_bus.subscribe("menu", menu_cache.on_invalidate)
+
+
+# The public menu is assembled from a fixed set of statements (one per table),
+# independent of how many products the restaurant has.
+def menu_statements(restaurant_id) -> dict:
+    return {
+        "setting": select(Setting).where(Setting.restaurant_id == restaurant_id).limit(1),
+        "categories": select(Category).where(Category.restaurant_id == restaurant_id).order_by(Category.name.asc(), Category.id.asc()),
+        "products": select(Product).where(Product.restaurant_id == restaurant_id).order_by(Product.name.asc(), Product.id.asc()),
+        "ingredients": select(Ingredient).where(Ingredient.restaurant_id == restaurant_id).order_by(Ingredient.name.asc(), Ingredient.id.asc()),
+        "product_categories": (
+            select(product_categories.c.product_id, product_categories.c.category_id)
+            .join(Product, Product.id == product_categories.c.product_id)
+            .where(Product.restaurant_id == restaurant_id)
+        ),
+        "product_ingredients": (
+            select(product_ingredients.c.product_id, product_ingredients.c.ingredient_id)
+            .join(Product, Product.id == product_ingredients.c.product_id)
+            .where(Product.restaurant_id == restaurant_id)
+        ),
+    }
+
+
+def group_links(rows) -> dict[int, list[int]]:
+    links: dict[int, list[int]] = defaultdict(list)
+    for product_id, other_id in rows:
+        links[product_id].append(other_id)
+    return links
+
+
+def assemble_menu(
+    rest: RestaurantRef,
+    setting: Setting | None,
+    categories: list[Category],
+    products: list[Product],
+    ingredients: list[Ingredient],
+    cat_links: dict[int, list[int]],
+    ing_links: dict[int, list[int]],
+) -> dict:
+    rate = setting.rate if setting else 1.0
+    # Ingredients arrive sorted by name; keep that order for each product's list
+    ing_rank = {i.id: pos for pos, i in enumerate(ingredients)}
+    ing_names = {i.id: i.name for i in ingredients}
+
+    cat_map = {c.id: {"id": c.id, "name": c.name, "image_path": media_url(c.image_path), "image_variants": media_variants(c.image_variants), "products": []} for c in categories}
+    uncategorized_products: list[dict] = []
+    for p in products:
+        p_ing_ids = sorted((iid for iid in ing_links.get(p.id, ()) if iid in ing_rank), key=ing_rank.__getitem__)
+        p_dto = {
+            "id": p.id,
+            "name": p.name,
+            "image_path": media_url(p.image_path),
+            "image_variants": media_variants(p.image_variants),
+            "price_currency_1": p.price_currency_1,
+            "price_currency_2": round(p.price_currency_1 * rate, 2),
+            "ingredient_names": [ing_names[iid] for iid in p_ing_ids],
+        }
+        p_cat_ids = cat_links.get(p.id)
+        if not p_cat_ids:
+            uncategorized_products.append(p_dto)
+        else:
+            for cid in p_cat_ids:
+                if cid in cat_map:
+                    cat_map[cid]["products"].append(p_dto)
+
+    categories_out: list[dict] = []
+    if uncategorized_products:
+        categories_out.append({
+            "id": -1,
+            "name": "Uncategorized",
+            "image_path": None,
+            "image_variants": None,
+            "products": uncategorized_products,
+        })
+    categories_out.extend(list(cat_map.values()))
+
+    return {
+        "restaurant": {"name": rest.name, "slug": rest.slug, "logo_image": media_url(rest.logo_image)},
+        "setting": {
+            "company_name": setting.company_name if setting else "",
+            "logo_path": media_url(setting.logo_path) if setting else None,
+            "logo_variants": media_variants(setting.logo_variants) if setting else None,
+            "currency_1": setting.currency_1 if setting else "USD",
+            "currency_2": setting.currency_2 if setting else "EUR",
+            "barcode_image_path": media_url(setting.barcode_image_path) if setting else None,
+            "primary_color": setting.primary_color if setting else None,
+            "background_color": setting.background_color if setting else None,
+        },
+        "categories": categories_out,
+    }
+
+
+def unavailable_menu() -> dict:
+    return {"unavailable": True, "message": "Temporarily unavailable"}
+
+
+def build_public_menu(db: Session, rest: RestaurantRef) -> dict:
+    if not rest.is_active:
+        return unavailable_menu()
+    stmts = menu_statements(rest.id)
+    return assemble_menu(
+        rest,
+        db.execute(stmts["setting"]).scalars().first(),
+        db.execute(stmts["categories"]).scalars().all(),
+        db.execute(stmts["products"]).scalars().all(),
+        db.execute(stmts["ingredients"]).scalars().all(),
+        group_links(db.execute(stmts["product_categories"]).all()),
+        group_links(db.execute(stmts["product_ingredients"]).all()),
+    )
+
+
+async def build_public_menu_async(db: AsyncSession, rest: RestaurantRef) -> dict:
+    if not rest.is_active:
+        return unavailable_menu()
+    stmts = menu_statements(rest.id)
+    return assemble_menu(
+        rest,
+        (await db.execute(stmts["setting"])).scalars().first(),
+        (await db.execute(stmts["categories"])).scalars().all(),
+        (await db.execute(stmts["products"])).scalars().all(),
+        (await db.execute(stmts["ingredients"])).scalars().all(),
+        group_links((await db.execute(stmts["product_categories"])).all()),
+        group_links((await db.execute(stmts["product_ingredients"])).all()),
+    )
+
+
+def render_menu(menu: dict) -> RenderedMenu:
+    body = render_json(menu)
+    return RenderedMenu(body, compute_etag(body))
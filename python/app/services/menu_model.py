@@ -0,0 +1,246 @@
+from types import SimpleNamespace
+from typing import Iterable
+
+from sqlalchemy import ARRAY, Text, func, literal, select, update
+from sqlalchemy.dialects.postgresql import JSONB, aggregate_order_by, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.config import settings
+from ..models.models import Category, Ingredient, MenuDocument, Product, Restaurant, Setting
+from .menu import assemble_menu, build_public_menu, build_public_menu_async, group_links, menu_statements, unavailable_menu
+from .products import ProductFilters, product_page_statements
+from .restaurants import RestaurantRef
+
+
+# Section entries keep storage keys (not URLs), so media settings can change without a rebuild
+_SETTING_FIELDS = (
+    "company_name", "logo_path", "logo_variants", "currency_1", "currency_2", "rate",
+    "barcode_image_path", "primary_color", "background_color",
+)
+
+
+# Sections whose entries the menu lists in the database's collation order, kept as id lists
+# under "order" so the read model never sorts names in Python
+_ORDERED = {"categories": Category, "ingredients": Ingredient, "products": Product}
+
+
+def _setting_entry(s: Setting | None) -> dict | None:
+    return {f: getattr(s, f) for f in _SETTING_FIELDS} if s else None
+
+
+def _category_entry(c: Category) -> dict:
+    return {"id": c.id, "name": c.name, "image_path": c.image_path, "image_variants": c.image_variants}
+
+
+def _ingredient_entry(i: Ingredient) -> dict:
+    return {"id": i.id, "name": i.name}
+
+
+def _product_entry(p: Product, category_ids, ingredient_ids) -> dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "image_path": p.image_path,
+        "image_variants": p.image_variants,
+        "price_currency_1": p.price_currency_1,
+        "category_ids": sorted(set(category_ids or ())),
+        "ingredient_ids": sorted(set(ingredient_ids or ())),
+    }
+
+
+def build_document(db: Session, restaurant_id) -> dict:
+    # The whole document from the normalized tables (rebuilds and the consistency check)
+    stmts = menu_statements(restaurant_id)
+    cat_links = group_links(db.execute(stmts["product_categories"]).all())
+    ing_links = group_links(db.execute(stmts["product_ingredients"]).all())
+    categories = db.execute(stmts["categories"]).scalars().all()
+    ingredients = db.execute(stmts["ingredients"]).scalars().all()
+    products = db.execute(stmts["products"]).scalars().all()
+    return {
+        "setting": _setting_entry(db.execute(stmts["setting"]).scalars().first()),
+        "categories": {str(c.id): _category_entry(c) for c in categories},
+        "ingredients": {str(i.id): _ingredient_entry(i) for i in ingredients},
+        "products": {str(p.id): _product_entry(p, cat_links.get(p.id), ing_links.get(p.id)) for p in products},
+        "order": {
+            "categories": [c.id for c in categories],
+            "ingredients": [i.id for i in ingredients],
+            "products": [p.id for p in products],
+        },
+    }
+
+
+def _lock_document(db: Session, restaurant_id) -> bool:
+    # Row lock taken before the catalog is read: under READ COMMITTED every later statement gets
+    # a snapshot that includes what the transactions we waited on committed. Locking inside the
+    # UPDATE is not enough, its subqueries keep the snapshot from before the wait.
+    stmt = select(MenuDocument.restaurant_id).where(MenuDocument.restaurant_id == restaurant_id).with_for_update()
+    return db.execute(stmt).first() is not None
+
+
+def rebuild_document(db: Session, restaurant_id):
+    if not _lock_document(db, restaurant_id):
+        # Placeholder row to lock, so concurrent first builds queue up instead of racing the upsert;
+        # it is overwritten below before this transaction commits
+        db.execute(pg_insert(MenuDocument).values(restaurant_id=restaurant_id, document={}).on_conflict_do_nothing())
+        _lock_document(db, restaurant_id)
+    document = build_document(db, restaurant_id)
+    stmt = pg_insert(MenuDocument).values(restaurant_id=restaurant_id, document=document, updated_at=func.now())
+    db.execute(stmt.on_conflict_do_update(index_elements=[MenuDocument.restaurant_id], set_={"document": stmt.excluded.document, "updated_at": stmt.excluded.updated_at}))
+
+
+def _patch(db: Session, restaurant_id, values: dict[tuple[str, ...], object]):
+    # jsonb_set per path in one UPDATE; a restaurant without a document yet gets a full build
+    if not _lock_document(db, restaurant_id):
+        rebuild_document(db, restaurant_id)
+        return
+    document = MenuDocument.document
+    for path, value in values.items():
+        document = func.jsonb_set(document, literal(list(path), ARRAY(Text)), value)
+    stmt = (
+        update(MenuDocument)
+        .where(MenuDocument.restaurant_id == restaurant_id)
+        .values(document=document)
+        .execution_options(synchronize_session=False)
+    )
+    db.execute(stmt)
+
+
+def _patch_entries(db: Session, restaurant_id, section: str, ids: Iterable[int], entries: dict[str, dict]):
+    # Replace the given entries and drop those that no longer exist, leaving the rest of the section alone
+    removed = [str(i) for i in ids if str(i) not in entries]
+    value = func.coalesce(MenuDocument.document[section], literal({}, JSONB))
+    if removed:
+        value = value.op("-", return_type=JSONB)(literal(removed, ARRAY(Text)))
+    if entries:
+        value = value.op("||", return_type=JSONB)(literal(entries, JSONB))
+    # The section's order is recomputed by the database (same ORDER BY as menu_statements)
+    model = _ORDERED[section]
+    order = (
+        select(func.coalesce(func.jsonb_agg(aggregate_order_by(model.id, model.name.asc(), model.id.asc())), literal([], JSONB)))
+        .where(model.restaurant_id == restaurant_id)
+        .scalar_subquery()
+    )
+    _patch(db, restaurant_id, {(section,): value, ("order", section): order})
+
+
+# Call from write paths after flush and before commit, so the document commits with the change
+def setting_changed(db: Session, restaurant_id):
+    if settings.menu_read_model_enabled:
+        setting = db.execute(menu_statements(restaurant_id)["setting"]).scalars().first()
+        _patch(db, restaurant_id, {("setting",): literal(_setting_entry(setting), JSONB)})
+
+
+def categories_changed(db: Session, restaurant_id, ids: Iterable[int]):
+    ids = set(ids)
+    if settings.menu_read_model_enabled and ids:
+        rows = db.execute(select(Category).where(Category.restaurant_id == restaurant_id, Category.id.in_(ids))).scalars()
+        _patch_entries(db, restaurant_id, "categories", ids, {str(c.id): _category_entry(c) for c in rows})
+
+
+def ingredients_changed(db: Session, restaurant_id, ids: Iterable[int]):
+    ids = set(ids)
+    if settings.menu_read_model_enabled and ids:
+        rows = db.execute(select(Ingredient).where(Ingredient.restaurant_id == restaurant_id, Ingredient.id.in_(ids))).scalars()
+        _patch_entries(db, restaurant_id, "ingredients", ids, {str(i.id): _ingredient_entry(i) for i in rows})
+
+
+def products_changed(db: Session, restaurant_id, ids: Iterable[int]):
+    ids = set(ids)
+    if settings.menu_read_model_enabled and ids:
+        rows = db.execute(product_page_statements(restaurant_id, ProductFilters(ids=tuple(ids)))["page"]).all()
+        _patch_entries(db, restaurant_id, "products", ids, {str(p.id): _product_entry(p, c, i) for p, c, i in rows})
+
+
+def catalog_changed(db: Session, restaurant_id):
+    # Bulk writes (imports) rebuild the document instead of patching entry by entry
+    if settings.menu_read_model_enabled:
+        rebuild_document(db, restaurant_id)
+
+
+def menu_from_document(rest: RestaurantRef, document: dict) -> dict:
+    # Same output as menu.build_public_menu; entries follow the stored database order
+    def rows(section):
+        entries = document[section]
+        return [SimpleNamespace(**entries[str(i)]) for i in document["order"][section] if str(i) in entries]
+
+    products = rows("products")
+    return assemble_menu(
+        rest,
+        SimpleNamespace(**document["setting"]) if document["setting"] else None,
+        rows("categories"),
+        products,
+        rows("ingredients"),
+        {p.id: p.category_ids for p in products},
+        {p.id: p.ingredient_ids for p in products},
+    )
+
+
+def _document_stmt(restaurant_id):
+    return select(MenuDocument.document).where(MenuDocument.restaurant_id == restaurant_id)
+
+
+def load_public_menu(db: Session, rest: RestaurantRef) -> dict:
+    # One primary-key lookup; falls back to the normalized tables until the document exists
+    if not rest.is_active:
+        return unavailable_menu()
+    if settings.menu_read_model_enabled:
+        document = db.execute(_document_stmt(rest.id)).scalar()
+        if document is not None and "order" in document:
+            return menu_from_document(rest, document)
+    return build_public_menu(db, rest)
+
+
+async def load_public_menu_async(db: AsyncSession, rest: RestaurantRef) -> dict:
+    if not rest.is_active:
+        return unavailable_menu()
+    if settings.menu_read_model_enabled:
+        document = (await db.execute(_document_stmt(rest.id))).scalar()
+        if document is not None and "order" in document:
+            return menu_from_document(rest, document)
+    return await build_public_menu_async(db, rest)
+
+
+def _section_diff(stored: dict, expected: dict) -> list[str]:
+    problems = []
+    for section in ("categories", "ingredients", "products"):
+        have = stored.get(section) or {}
+        want = expected[section]
+        for key in sorted(set(want) - set(have), key=int):
+            problems.append(f"{section}/{key} missing")
+        for key in sorted(set(have) - set(want), key=int):
+            problems.append(f"{section}/{key} should not exist")
+        for key in sorted(set(have) & set(want), key=int):
+            if have[key] != want[key]:
+                problems.append(f"{section}/{key} differs")
+    if stored.get("setting") != expected["setting"]:
+        problems.append("setting differs")
+    if "order" not in stored:
+        problems.append("order missing")
+    else:
+        problems.extend(f"order/{section} differs" for section in _ORDERED if stored["order"].get(section) != expected["order"][section])
+    return problems
+
+
+def check_documents(db: Session, slugs: list[str] | None = None, repair: bool = False) -> dict[str, list[str]]:
+    """Compare stored menu documents with the normalized tables; {slug: problems} for every mismatch.
+
+    Besides the sections, the menu rendered from the document must equal build_public_menu's.
+    With ``repair`` the mismatching documents are rebuilt (the caller commits).
+    """
+    stmt = select(Restaurant.id, Restaurant.slug, Restaurant.name, Restaurant.logo_image).order_by(Restaurant.slug)
+    if slugs:
+        stmt = stmt.where(Restaurant.slug.in_(slugs))
+    report = {}
+    for restaurant_id, slug, name, logo_image in db.execute(stmt).all():
+        stored = db.execute(_document_stmt(restaurant_id)).scalar()
+        problems = ["document missing"] if stored is None else _section_diff(stored, build_document(db, restaurant_id))
+        if not problems:
+            rest = RestaurantRef(id=restaurant_id, slug=slug, name=name, is_active=True, logo_image=logo_image)
+            if menu_from_document(rest, stored) != build_public_menu(db, rest):
+                problems.append("rendered menu differs")
+        if problems:
+            report[slug] = problems
+            if repair:
+                rebuild_document(db, restaurant_id)
+    return report
@@ -0,0 +1,232 @@
+import base64
+import json
+from typing import Literal, NamedTuple
+
+from fastapi import HTTPException
+from sqlalchemy import Float, Numeric, Select, cast, delete, func, insert, literal, select, tuple_, union_all, update
+from sqlalchemy.orm import Session
+
+from ..schemas.schemas import BulkPriceUpdate
+from ..models.models import Category, Ingredient, Product, Setting, product_categories, product_ingredients
+
+
+ProductSort = Literal["name", "-name", "price", "-price"]
+
+_SORT_COLUMNS = {"name": Product.name, "price": Product.price_currency_1}
+
+
+class ProductFilters(NamedTuple):
+    q: str | None = None  # case-insensitive name prefix
+    category_id: int | None = None
+    ingredient_id: int | None = None
+    ids: tuple[int, ...] | None = None
+
+
+def encode_cursor(sort_value, product_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, product_id]).encode()).decode().rstrip("=")
+
+
+# Cursor values must match the sort column's type, or the keyset comparison fails in the database
+_CURSOR_TYPES = {"name": (str,), "price": (int, float)}
+
+
+def decode_cursor(cursor: str, sort: ProductSort = "name") -> tuple:
+    try:
+        value, product_id = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        product_id = int(product_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if isinstance(value, bool) or not isinstance(value, _CURSOR_TYPES[sort.lstrip("-")]):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, product_id
+
+
+def _filtered(stmt: Select, restaurant_id, filters: ProductFilters) -> Select:
+    stmt = stmt.where(Product.restaurant_id == restaurant_id)
+    if filters.q:
+        prefix = filters.q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(Product.name.ilike(prefix + "%", escape="\\"))
+    if filters.category_id is not None:
+        stmt = stmt.where(Product.id.in_(select(product_categories.c.product_id).where(product_categories.c.category_id == filters.category_id)))
+    if filters.ingredient_id is not None:
+        stmt = stmt.where(Product.id.in_(select(product_ingredients.c.product_id).where(product_ingredients.c.ingredient_id == filters.ingredient_id)))
+    if filters.ids is not None:
+        stmt = stmt.where(Product.id.in_(filters.ids))
+    return stmt
+
+
+def product_page_statements(restaurant_id, filters: ProductFilters, sort: ProductSort = "name", limit: int | None = None, cursor: str | None = None) -> dict:
+    """Statements for one keyset page of the editor's product list.
+
+    ``page`` returns products with their category/ingredient ids aggregated in the
+    same query (ordered by (sort column, id), limit + 1 rows to detect a next page);
+    ``total`` counts every product matching the filters; ``rate`` is the conversion rate.
+    """
+    column = _SORT_COLUMNS[sort.lstrip("-")]
+    descending = sort.startswith("-")
+    category_ids = (
+        select(func.array_agg(product_categories.c.category_id))
+        .where(product_categories.c.product_id == Product.id)
+        .scalar_subquery()
+    )
+    ingredient_ids = (
+        select(func.array_agg(product_ingredients.c.ingredient_id))
+        .where(product_ingredients.c.product_id == Product.id)
+        .scalar_subquery()
+    )
+    page = _filtered(select(Product, category_ids.label("category_ids"), ingredient_ids.label("ingredient_ids")), restaurant_id, filters)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        key = tuple_(column, Product.id)
+        page = page.where(key < tuple_(value, last_id) if descending else key > tuple_(value, last_id))
+    page = page.order_by(column.desc(), Product.id.desc()) if descending else page.order_by(column.asc(), Product.id.asc())
+    if limit:
+        page = page.limit(limit + 1)
+    return {
+        "page": page,
+        "total": _filtered(select(func.count(Product.id)), restaurant_id, filters),
+        "rate": select(Setting.rate).where(Setting.restaurant_id == restaurant_id).limit(1),
+    }
+
+
+def product_out(p: Product, rate: float, category_ids, ingredient_ids) -> dict:
+    return {
+        "id": p.id,
+        "name": p.name,
+        "image_path": p.image_path,
+        "image_variants": p.image_variants,
+        "price_currency_1": p.price_currency_1,
+        "price_currency_2": round(p.price_currency_1 * rate, 2),
+        "category_ids": sorted(set(category_ids or [])),
+        "ingredient_ids": sorted(set(ingredient_ids or [])),
+    }
+
+
+class ProductPage(NamedTuple):
+    items: list[dict]
+    total: int
+    next_cursor: str | None
+
+
+def build_product_page(rows, rate: float | None, total: int, sort: ProductSort, limit: int | None) -> ProductPage:
+    rows = list(rows)
+    next_cursor = None
+    if limit and len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1][0]
+        next_cursor = encode_cursor(getattr(last, _SORT_COLUMNS[sort.lstrip("-")].key), last.id)
+    rate = rate if rate is not None else 1.0
+    return ProductPage([product_out(p, rate, cat_ids, ing_ids) for p, cat_ids, ing_ids in rows], total, next_cursor)
+
+
+def list_product_page(db: Session, restaurant_id, filters: ProductFilters, sort: ProductSort = "name", limit: int | None = None, cursor: str | None = None) -> ProductPage:
+    stmts = product_page_statements(restaurant_id, filters, sort, limit, cursor)
+    rows = db.execute(stmts["page"]).all()
+    return build_product_page(rows, db.execute(stmts["rate"]).scalar(), db.execute(stmts["total"]).scalar_one(), sort, limit)
+
+
+def load_product_out(db: Session, product: Product) -> dict:
+    # One product in the list shape (aggregated ids + converted price)
+    stmts = product_page_statements(product.restaurant_id, ProductFilters())
+    p, category_ids, ingredient_ids = db.execute(stmts["page"].where(Product.id == product.id)).one()
+    rate = db.execute(stmts["rate"]).scalar()
+    return product_out(p, rate if rate is not None else 1.0, category_ids, ingredient_ids)
+
+
+_LINKS = (("category", product_categories, "category_id"), ("ingredient", product_ingredients, "ingredient_id"))
+
+
+def check_link_ids(db: Session, restaurant_id, category_ids, ingredient_ids):
+    # One query for both lists; 400 if any id is unknown or belongs to another restaurant
+    wanted = {"category": set(category_ids or ()), "ingredient": set(ingredient_ids or ())}
+    parts = [
+        select(literal(kind).label("kind"), model.id).where(model.restaurant_id == restaurant_id, model.id.in_(wanted[kind]))
+        for kind, model in (("category", Category), ("ingredient", Ingredient))
+        if wanted[kind]
+    ]
+    if not parts:
+        return
+    for kind, found_id in db.execute(union_all(*parts)):
+        wanted[kind].discard(found_id)
+    for kind, missing in wanted.items():
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Unknown {kind} id(s): {', '.join(map(str, sorted(missing)))}")
+
+
+def sync_product_links(db: Session, product_id: int, category_ids, ingredient_ids, new: bool = False):
+    """Bring a product's category/ingredient links to the given ids, touching only the delta.
+
+    Current links are read in one query (skipped for a ``new`` product); removals are one
+    DELETE and additions one multi-row INSERT per association table.
+    """
+    current = {"category": set(), "ingredient": set()}
+    if not new:
+        rows = db.execute(union_all(*[
+            select(literal(kind).label("kind"), table.c[column]).where(table.c.product_id == product_id)
+            for kind, table, column in _LINKS
+        ]))
+        for kind, linked_id in rows:
+            current[kind].add(linked_id)
+    wanted = {"category": set(category_ids or ()), "ingredient": set(ingredient_ids or ())}
+    for kind, table, column in _LINKS:
+        removed = current[kind] - wanted[kind]
+        added = wanted[kind] - current[kind]
+        if removed:
+            db.execute(delete(table).where(table.c.product_id == product_id, table.c[column].in_(removed)))
+        if added:
+            db.execute(insert(table), [{"product_id": product_id, column: linked_id} for linked_id in sorted(added)])
+
+
+PRICE_PREVIEW_LIMIT = 200
+
+_ROUNDING = {"nearest": func.round, "up": func.ceil, "down": func.floor}
+
+
+def price_expression(change: BulkPriceUpdate):
+    # SQL for the new price, evaluated per row by the database
+    price = literal(change.set_price, Float) if change.set_price is not None else Product.price_currency_1
+    if change.percent is not None:
+        price = price * (1 + change.percent / 100)
+    if change.amount is not None:
+        price = price + change.amount
+    if change.round_to is not None:
+        price = _ROUNDING[change.round_mode](price / change.round_to) * change.round_to
+    # Cents, never negative
+    return cast(func.round(cast(func.greatest(price, 0), Numeric), 2), Float)
+
+
+def reprice_products(db: Session, restaurant_id, filters: ProductFilters, change: BulkPriceUpdate) -> dict:
+    """Apply ``change`` to every matching product in one UPDATE (or only preview it).
+
+    The UPDATE joins a snapshot of the old prices and returns old and new price per changed
+    row; rows whose price would not change are left untouched. ``changes`` lists every changed
+    product (callers trim it to PRICE_PREVIEW_LIMIT for responses).
+    """
+    new_price = price_expression(change)
+    matched = db.execute(_filtered(select(func.count(Product.id)), restaurant_id, filters)).scalar_one()
+    if change.dry_run:
+        old = Product.price_currency_1
+        rows = db.execute(
+            _filtered(select(Product.id, Product.name, old, new_price), restaurant_id, filters)
+            .where(old.is_distinct_from(new_price))
+            .order_by(Product.name, Product.id)
+        ).all()
+    else:
+        before = _filtered(select(Product.id, Product.price_currency_1.label("old_price")), restaurant_id, filters).subquery()
+        rows = db.execute(
+            update(Product)
+            .where(Product.id == before.c.id, Product.price_currency_1.is_distinct_from(new_price))
+            .values(price_currency_1=new_price)
+            .returning(Product.id, Product.name, before.c.old_price, Product.price_currency_1),
+            execution_options={"synchronize_session": False},
+        ).all()
+        rows.sort(key=lambda r: (r[1], r[0]))
+    return {
+        "dry_run": change.dry_run,
+        "matched": matched,
+        "changed": len(rows),
+        "changes": [
+            {"id": pid, "name": name, "old_price": old_price, "new_price": price}
+            for pid, name, old_price, price in rows
+        ],
+    }
@@ -0,0 +1,56 @@
+from dataclasses import dataclass
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..core.cache import VersionedCache
+from ..core.cache_bus import cache_bus
+from ..core.config import settings
+from ..models.models import Restaurant
+
+
+@dataclass(frozen=True)
+class RestaurantRef:
+    # The immutable-slug -> restaurant facts every scoped route needs
+    id: uuid.UUID
+    slug: str
+    name: str
+    is_active: bool
+    logo_image: str | None
+
+
+restaurant_cache = VersionedCache(maxsize=settings.restaurant_cache_size, ttl=settings.restaurant_cache_ttl_seconds)
+cache_bus.subscribe("restaurant", restaurant_cache.on_invalidate)
+
+_ref_columns = (Restaurant.id, Restaurant.slug, Restaurant.name, Restaurant.is_active, Restaurant.logo_image)
+
+
+def resolve_restaurant(db: Session, slug: str) -> RestaurantRef | None:
+    ref = restaurant_cache.get(slug)
+    if ref is None:
+        version = restaurant_cache.version(slug)
+        row = db.execute(select(*_ref_columns).where(Restaurant.slug == slug)).first()
+        if row is None:
+            return None
+        ref = RestaurantRef(*row)
+        restaurant_cache.set(slug, ref, version=version)
+    return ref
+
+
+async def resolve_restaurant_async(db: AsyncSession, slug: str) -> RestaurantRef | None:
+    ref = restaurant_cache.get(slug)
+    if ref is None:
+        version = restaurant_cache.version(slug)
+        row = (await db.execute(select(*_ref_columns).where(Restaurant.slug == slug))).first()
+        if row is None:
+            return None
+        ref = RestaurantRef(*row)
+        restaurant_cache.set(slug, ref, version=version)
+    return ref
+
+
+def restaurant_changed(slug: str):
+    # Call after commit whenever name, is_active, logo_image changes or the restaurant is deleted
+    cache_bus.publish("restaurant", slug)
@@ -0,0 +1,286 @@
+from collections import Counter
+import functools
+import heapq
+import logging
+import math
+import re
+import unicodedata
+from typing import Literal, NamedTuple
+
+from sqlalchemy import Float, Integer, Numeric, String, bindparam, case, func, literal, select, text, union_all
+from sqlalchemy.orm import Session
+
+from ..core.cache import VersionedCache
+from ..core.cache_bus import cache_bus
+from ..core.config import settings
+from ..models.models import Category, Ingredient, Product, product_categories, product_ingredients
+from .restaurants import RestaurantRef
+
+
+logger = logging.getLogger(__name__)
+
+SearchKind = Literal["product", "category", "ingredient"]
+_KIND_ORDER = {"product": 0, "category": 1, "ingredient": 2}
+_MODELS = (("product", Product), ("category", Category), ("ingredient", Ingredient))
+
+# Letters NFKD does not decompose but unaccent maps
+_FOLD = str.maketrans({"ß": "ss", "æ": "ae", "œ": "oe", "ø": "o", "đ": "d", "ł": "l", "þ": "th", "ı": "i"})
+_WORD = re.compile(r"[^\W_]+")
+
+
+def normalize(value: str) -> str:
+    # Python twin of the SQL function menu_search_normalize: lower(unaccent(value)), spacing kept
+    value = unicodedata.normalize("NFKD", value.lower().translate(_FOLD))
+    return "".join(ch for ch in value if not unicodedata.combining(ch))
+
+
+def trigram_sequence(norm: str) -> list[str]:
+    # pg_trgm's trigrams in order: each alphanumeric word padded with two spaces before and one after
+    grams = []
+    for word in _WORD.findall(norm):
+        padded = f"  {word} "
+        grams.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def word_similarity(query: set[str], sequence: list[str]) -> float:
+    # Best similarity between the query's trigrams and any run of consecutive target trigrams.
+    # A best run starts and ends on a shared trigram, so only those positions are tried.
+    # Starting later can only find fewer shared trigrams, so stop once that bound cannot win.
+    hits = [i for i, gram in enumerate(sequence) if gram in query]
+    remaining, found = [], set()
+    for i in reversed(hits):
+        found.add(sequence[i])
+        remaining.append(len(found))
+    remaining.reverse()
+    size = len(query)
+    best = 0.0
+    for start, available in zip(hits, remaining):
+        if available / size <= best:
+            break
+        seen: set[str] = set()
+        common = 0
+        for gram in sequence[start:hits[-1] + 1]:
+            if gram not in seen:
+                seen.add(gram)
+                if gram in query:
+                    common += 1
+                    similarity = common / (size + len(seen) - common)
+                    if similarity > best:
+                        best = similarity
+    return best
+
+
+def _tier_score(norm: str, q: str) -> float | None:
+    # Same ranking tiers as the SQL query: name prefix, word prefix, substring
+    if norm.startswith(q):
+        return 1.0
+    if f" {q}" in norm:
+        return 0.9
+    if q in norm:
+        return 0.8
+    return None
+
+
+class SearchHit(NamedTuple):
+    kind: SearchKind
+    id: int
+    name: str
+    score: float
+
+
+class SearchIndex:
+    """In-memory trigram index over one restaurant's product, category and ingredient names.
+
+    Fallback for databases without pg_trgm (SQLite test runs, Postgres builds without
+    contrib). Candidates for fuzzy matches come from an inverted trigram index, so only
+    names sharing enough trigrams with the query are scored.
+    """
+
+    def __init__(self, entries: list[tuple[SearchKind, int, str]], links: dict[tuple[str, int], list[int]]):
+        self.entries = [(kind, id_, name, normalize(name)) for kind, id_, name in entries]
+        self.sequences = [trigram_sequence(norm) for *_, norm in self.entries]
+        self.postings: dict[str, list[int]] = {}
+        for idx, seq in enumerate(self.sequences):
+            for gram in set(seq):
+                self.postings.setdefault(gram, []).append(idx)
+        self.links = links
+
+    def search(self, q: str, limit: int, threshold: float) -> list[SearchHit]:
+        scores: dict[int, float] = {}
+        for idx, (*_, norm) in enumerate(self.entries):
+            score = _tier_score(norm, q)
+            if score is not None:
+                scores[idx] = score
+        grams = set(trigram_sequence(q))
+        if grams:
+            shared = Counter(idx for gram in grams for idx in self.postings.get(gram, ()))
+            needed = math.ceil(threshold * len(grams))
+            # Similarity is at most shared/len(grams): score the best bounds first and stop
+            # once no remaining candidate can beat the current limit-th score
+            top = sorted(scores.values(), reverse=True)[:limit]  # min-heap of the best `limit` scores
+            heapq.heapify(top)
+            for count, idx in sorted(((c, i) for i, c in shared.items() if c >= needed and i not in scores), reverse=True):
+                # Scores are rounded like the SQL ones, so the bound is too (an exact bound could
+                # round up to the limit-th score and still tie)
+                if len(top) == limit and round(0.8 * count / len(grams), 4) < top[0]:
+                    break
+                similarity = word_similarity(grams, self.sequences[idx])
+                if similarity >= threshold:
+                    score = scores[idx] = round(0.8 * similarity, 4)
+                    if len(top) < limit:
+                        heapq.heappush(top, score)
+                    elif score > top[0]:
+                        heapq.heapreplace(top, score)
+        ranked = sorted(scores, key=lambda i: (-scores[i], _KIND_ORDER[self.entries[i][0]], self.entries[i][2], self.entries[i][1]))
+        return [SearchHit(*self.entries[i][:3], scores[i]) for i in ranked[:limit]]
+
+
+def build_index(db: Session, restaurant_id) -> SearchIndex:
+    entries = []
+    for kind, model in _MODELS:
+        rows = db.execute(select(model.id, model.name).where(model.restaurant_id == restaurant_id))
+        entries.extend((kind, id_, name) for id_, name in rows)
+    links: dict[tuple[str, int], list[int]] = {}
+    for kind, table, column in (("category", product_categories, "category_id"), ("ingredient", product_ingredients, "ingredient_id")):
+        stmt = (
+            select(table.c[column], table.c.product_id)
+            .join(Product, Product.id == table.c.product_id)
+            .where(Product.restaurant_id == restaurant_id)
+            .order_by(table.c.product_id)
+        )
+        for other_id, product_id in db.execute(stmt):
+            links.setdefault((kind, other_id), []).append(product_id)
+    return SearchIndex(entries, links)
+
+
+# Python indexes live as long as the menu they were built from (same invalidations)
+search_index_cache = VersionedCache(maxsize=settings.menu_cache_size, ttl=settings.menu_cache_ttl_seconds)
+cache_bus.subscribe("menu", search_index_cache.on_invalidate)
+
+
+def _search_python(db: Session, rest: RestaurantRef, q: str, limit: int) -> tuple[list[SearchHit], dict]:
+    index = search_index_cache.get(rest.slug)
+    if index is None:
+        version = search_index_cache.version(rest.slug)
+        index = build_index(db, rest.id)
+        search_index_cache.set(rest.slug, index, version=version)
+    hits = index.search(q, limit, settings.menu_search_similarity)
+    return hits, {(h.kind, h.id): index.links.get((h.kind, h.id), []) for h in hits if h.kind != "product"}
+
+
+def _like_escape(value: str) -> str:
+    return value.replace("/", "//").replace("%", "/%").replace("_", "/_")
+
+
+@functools.cache
+def search_statement():
+    """One UNION ALL over the three name columns, ranked like SearchIndex.search (params: search_params).
+
+    Matches use the GIN trigram indexes on menu_search_normalize(name): substring (LIKE)
+    or fuzzy word similarity (``<%``, threshold pg_trgm.word_similarity_threshold). Built
+    once; every search only binds new parameters.
+    """
+    q = bindparam("q", type_=String)
+    parts = []
+    for kind, model in _MODELS:
+        indexed = func.menu_search_normalize(model.name, type_=String)
+        # The function is not inlined, so each reference would call it again: normalize each
+        # candidate once (OFFSET 0 keeps the planner from pulling the subquery up)
+        candidates = (
+            select(model.id, model.name, indexed.label("norm"))
+            .where(
+                model.restaurant_id == bindparam("restaurant_id", type_=model.restaurant_id.type),
+                indexed.like(bindparam("contains", type_=String), escape="/") | q.op("<%")(indexed),
+            )
+            .offset(0)
+            .subquery()
+        )
+        norm = candidates.c.norm
+        score = case(
+            (norm.like(bindparam("prefix", type_=String), escape="/"), 1.0),
+            (norm.like(bindparam("word_prefix", type_=String), escape="/"), 0.9),
+            (norm.like(bindparam("contains", type_=String), escape="/"), 0.8),
+            else_=func.round((0.8 * func.word_similarity(q, norm, type_=Float)).cast(Numeric), 4).cast(Float),
+        )
+        parts.append(select(
+            literal(kind).label("kind"), literal(_KIND_ORDER[kind]).label("kind_order"), candidates.c.id, candidates.c.name, score.label("score"),
+        ))
+    hits = union_all(*parts).subquery()
+    return (
+        select(hits.c.kind, hits.c.id, hits.c.name, hits.c.score)
+        .order_by(hits.c.score.desc(), hits.c.kind_order, hits.c.name, hits.c.id)
+        .limit(bindparam("limit", type_=Integer))
+    )
+
+
+def search_params(restaurant_id, q: str, limit: int) -> dict:
+    escaped = _like_escape(q)
+    return {
+        "restaurant_id": restaurant_id,
+        "q": q,
+        "prefix": f"{escaped}%",
+        "word_prefix": f"% {escaped}%",
+        "contains": f"%{escaped}%",
+        "limit": limit,
+    }
+
+
+def _search_sql(db: Session, rest: RestaurantRef, q: str, limit: int) -> tuple[list[SearchHit], dict]:
+    # is_local: the threshold only applies to this request's transaction
+    db.execute(select(func.set_config("pg_trgm.word_similarity_threshold", str(settings.menu_search_similarity), True)))
+    hits = [SearchHit(*row) for row in db.execute(search_statement(), search_params(rest.id, q, limit))]
+    links: dict[tuple[str, int], list[int]] = {(h.kind, h.id): [] for h in hits if h.kind != "product"}
+    wanted = {kind: [id_ for k, id_ in links if k == kind] for kind in ("category", "ingredient")}
+    parts = [
+        select(literal(kind).label("kind"), table.c[column], table.c.product_id).where(table.c[column].in_(wanted[kind]))
+        for kind, table, column in (("category", product_categories, "category_id"), ("ingredient", product_ingredients, "ingredient_id"))
+        if wanted[kind]
+    ]
+    if parts:
+        for kind, other_id, product_id in db.execute(union_all(*parts).order_by(text("product_id"))):
+            links[(kind, other_id)].append(product_id)
+    return hits, links
+
+
+_sql_search: dict[str, bool] = {}
+
+
+def sql_search_available(db: Session) -> bool:
+    # Checked once per database: Postgres with pg_trgm and the normalize function from the migration
+    bind = db.get_bind()
+    key = bind.url.render_as_string(hide_password=True)
+    if key not in _sql_search:
+        available = False
+        if bind.dialect.name == "postgresql":
+            available = bool(db.execute(text(
+                "SELECT to_regprocedure('menu_search_normalize(text)') IS NOT NULL"
+                " AND EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')"
+            )).scalar())
+            if not available:
+                logger.warning("pg_trgm/menu_search_normalize not installed; menu search uses the in-process index")
+        _sql_search[key] = available
+    return _sql_search[key]
+
+
+def search_menu(db: Session, rest: RestaurantRef, q: str, limit: int) -> dict:
+    """Ranked products, categories and ingredients of one restaurant matching ``q``.
+
+    Case-, accent- and typo-tolerant; categories and ingredients carry the ids of their
+    products so a client can show the dishes from the menu it already has.
+    """
+    query = " ".join(normalize(q).split())
+    if not rest.is_active or not query:
+        return {"query": q, "results": []}
+    backend = settings.menu_search_backend
+    if backend == "postgres" or (backend == "auto" and sql_search_available(db)):
+        hits, links = _search_sql(db, rest, query, limit)
+    else:
+        hits, links = _search_python(db, rest, query, limit)
+    results = []
+    for h in hits:
+        item = h._asdict()
+        if h.kind != "product":
+            item["product_ids"] = links.get((h.kind, h.id), [])
+        results.append(item)
+    return {"query": q, "results": results}
@@ -0,0 +1,140 @@
+import gzip
+import logging
+import re
+import threading
+import time
+
+from sqlalchemy import select
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..models.models import Restaurant
+from .menu import render_menu
+from .menu_model import load_public_menu
+from .storage import storage
+
+try:
+    import brotli
+except ImportError:  # optional: only .json and .json.gz are written without it
+    brotli = None
+
+
+logger = logging.getLogger(__name__)
+
+_SAFE_SLUG = re.compile(r"^[a-z0-9][a-z0-9-]*$")
+
+
+def snapshot_key(slug: str) -> str:
+    # Media storage key; with local storage this is {MEDIA_DIR}/menus/{slug}.json
+    if not _SAFE_SLUG.match(slug):
+        raise ValueError(f"Refusing to snapshot unsafe slug {slug!r}")
+    return f"menus/{slug}.json"
+
+
+def write_snapshot(slug: str, body: bytes):
+    key = snapshot_key(slug)
+    headers = {"content_type": "application/json", "cache_control": settings.public_menu_cache_control}
+    # Compressed siblings first so nginx gzip_static/brotli_static never pair a new .json with an old .gz
+    if settings.menu_snapshot_gzip:
+        storage.put_bytes(key + ".gz", gzip.compress(body, compresslevel=9, mtime=0), content_encoding="gzip", **headers)
+    if settings.menu_snapshot_brotli and brotli is not None:
+        storage.put_bytes(key + ".br", brotli.compress(body, quality=11), content_encoding="br", **headers)
+    storage.put_bytes(key, body, **headers)
+
+
+def remove_snapshot(slug: str):
+    key = snapshot_key(slug)
+    for k in (key, key + ".gz", key + ".br"):
+        storage.delete(k)
+
+
+def purge_snapshots(slugs: list[str] | None = None) -> int:
+    # Every stored snapshot (also those of deleted restaurants) or only the given slugs';
+    # returns the number of files removed
+    if slugs is not None:
+        keys = [key for slug in slugs for key, _ in storage.list(snapshot_key(slug))]
+    else:
+        keys = [key for key, _ in storage.list("menus/")]
+    for key in keys:
+        storage.delete(key)
+    return len(keys)
+
+
+def rebuild_snapshot(slug: str) -> bool:
+    # True when a snapshot was written, False when the restaurant is gone (its files are removed)
+    with SessionLocal() as db:
+        rest = db.execute(select(Restaurant).where(Restaurant.slug == slug)).scalars().first()
+        if rest is None:
+            remove_snapshot(slug)
+            return False
+        write_snapshot(slug, render_menu(load_public_menu(db, rest)).body)
+        return True
+
+
+def rebuild_all_snapshots(slugs: list[str] | None = None) -> int:
+    # One failing restaurant (unsafe slug, build or storage error) is logged and skipped;
+    # returns the number of snapshots actually written
+    if slugs is None:
+        with SessionLocal() as db:
+            slugs = db.execute(select(Restaurant.slug)).scalars().all()
+    written = 0
+    for slug in slugs:
+        try:
+            written += rebuild_snapshot(slug)
+        except Exception:
+            logger.exception("Menu snapshot rebuild failed for %s", slug)
+    return written
+
+
+class SnapshotScheduler:
+    """Debounces snapshot rebuilds: a burst of edits to one restaurant triggers a
+    single rebuild ``delay`` seconds after the last edit (but never later than
+    ``max_delay`` after the first one)."""
+
+    def __init__(self, delay: float, max_delay: float):
+        self.delay = delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self._timers: dict[str, threading.Timer] = {}
+        self._first_seen: dict[str, float] = {}
+
+    def schedule(self, slug: str):
+        with self._lock:
+            now = time.monotonic()
+            first = self._first_seen.setdefault(slug, now)
+            timer = self._timers.pop(slug, None)
+            if timer is not None:
+                timer.cancel()
+            delay = max(0.0, min(self.delay, first + self.max_delay - now))
+            timer = threading.Timer(delay, self._run, args=(slug,))
+            timer.daemon = True
+            self._timers[slug] = timer
+            timer.start()
+
+    def _run(self, slug: str):
+        with self._lock:
+            if self._timers.get(slug) is not threading.current_thread():
+                return
+            del self._timers[slug]
+            self._first_seen.pop(slug, None)
+        try:
+            rebuild_snapshot(slug)
+        except Exception:
+            logger.exception("Menu snapshot rebuild failed for %s", slug)
+
+    def flush(self):
+        # Run pending rebuilds now (used on shutdown so the last edits are not lost)
+        with self._lock:
+            pending = list(self._timers)
+            for timer in self._timers.values():
+                timer.cancel()
+            self._timers.clear()
+            self._first_seen.clear()
+        for slug in pending:
+            try:
+                rebuild_snapshot(slug)
+            except Exception:
+                logger.exception("Menu snapshot rebuild failed for %s", slug)
+
+
+snapshot_scheduler = SnapshotScheduler(settings.menu_snapshot_debounce_seconds, settings.menu_snapshot_max_delay_seconds)
@@ -0,0 +1,144 @@
+import os
+from pathlib import Path
+import tempfile
+
+from ..core.config import settings
+
+
+class LocalStorage:
+    """Media on the API host's disk under MEDIA_DIR, served by the /media mount."""
+
+    def __init__(self, root: Path):
+        self.root = root
+        self.staging_dir = root / ".tmp"  # same filesystem, so put_file is a rename
+        self.staging_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise ValueError(f"Refusing media key outside the media root: {key!r}")
+        return path
+
+    def put_file(self, key: str, src: Path, content_type: str | None = None, cache_control: str | None = None, content_encoding: str | None = None):
+        # Takes ownership of src
+        dest = self._path(key)
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        os.chmod(src, 0o644)
+        os.replace(src, dest)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str | None = None, cache_control: str | None = None, content_encoding: str | None = None):
+        fd, tmp = tempfile.mkstemp(dir=self.staging_dir)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            self.put_file(key, Path(tmp))
+        finally:
+            Path(tmp).unlink(missing_ok=True)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def list(self, prefix: str) -> list[tuple[str, float]]:
+        # (key, mtime) for every object whose key starts with prefix
+        directory, _, start = prefix.rpartition("/")
+        base = self._path(directory) if directory else self.root
+        if not base.is_dir():
+            return []
+        found = []
+        for path in base.iterdir():
+            if path.is_file() and path.name.startswith(start):
+                found.append((f"{directory}/{path.name}" if directory else path.name, path.stat().st_mtime))
+        return found
+
+    def url(self, key: str) -> str:
+        return f"{settings.media_public_base_url.rstrip('/') or '/media'}/{key}"
+
+
+class S3Storage:
+    """S3-compatible object store (AWS S3, MinIO, R2, ...). Needs boto3.
+
+    URLs use MEDIA_PUBLIC_BASE_URL (CDN) when set, otherwise plain bucket URLs. With
+    S3_PRESIGN_EXPIRY_SECONDS > 0 they are stable API paths that redirect to a pre-signed
+    GET URL signed per request, so cached menus, ETags and snapshots never hold an expiring URL.
+    """
+
+    def __init__(self):
+        try:
+            import boto3
+            from botocore.config import Config
+        except ImportError as exc:
+            raise RuntimeError("MEDIA_STORAGE=s3 requires the boto3 package") from exc
+        self.bucket = settings.s3_bucket
+        self.prefix = settings.s3_prefix.strip("/") + "/" if settings.s3_prefix.strip("/") else ""
+        self.client = boto3.client(
+            "s3",
+            endpoint_url=settings.s3_endpoint_url or None,
+            region_name=settings.s3_region or None,
+            aws_access_key_id=settings.s3_access_key_id or None,
+            aws_secret_access_key=settings.s3_secret_access_key or None,
+            config=Config(signature_version="s3v4", s3={"addressing_style": "path" if settings.s3_endpoint_url else "auto"}),
+        )
+        self.staging_dir = Path(tempfile.gettempdir())
+
+    @staticmethod
+    def _extra(content_type, cache_control, content_encoding) -> dict:
+        extra = {"ContentType": content_type, "CacheControl": cache_control, "ContentEncoding": content_encoding}
+        return {k: v for k, v in extra.items() if v}
+
+    def put_file(self, key: str, src: Path, content_type: str | None = None, cache_control: str | None = None, content_encoding: str | None = None):
+        try:
+            self.client.upload_file(str(src), self.bucket, self.prefix + key, ExtraArgs=self._extra(content_type, cache_control, content_encoding))
+        finally:
+            src.unlink(missing_ok=True)
+
+    def put_bytes(self, key: str, data: bytes, content_type: str | None = None, cache_control: str | None = None, content_encoding: str | None = None):
+        self.client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data, **self._extra(content_type, cache_control, content_encoding))
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=self.prefix + key)
+
+    def list(self, prefix: str) -> list[tuple[str, float]]:
+        found = []
+        for page in self.client.get_paginator("list_objects_v2").paginate(Bucket=self.bucket, Prefix=self.prefix + prefix):
+            for obj in page.get("Contents", ()):
+                found.append((obj["Key"][len(self.prefix):], obj["LastModified"].timestamp()))
+        return found
+
+    def url(self, key: str) -> str:
+        if settings.media_public_base_url:
+            return f"{settings.media_public_base_url.rstrip('/')}/{key}"
+        if settings.s3_presign_expiry_seconds > 0:
+            return f"{settings.api_v1_prefix}/media/{key}"
+        return f"{self.client.meta.endpoint_url}/{self.bucket}/{self.prefix}{key}"
+
+    def presigned_url(self, key: str) -> str:
+        return self.client.generate_presigned_url(
+            "get_object", Params={"Bucket": self.bucket, "Key": self.prefix + key}, ExpiresIn=settings.s3_presign_expiry_seconds
+        )
+
+
+def _create_storage():
+    if settings.media_storage == "s3":
+        return S3Storage()
+    if settings.media_storage != "local":
+        raise ValueError(f"Unknown MEDIA_STORAGE {settings.media_storage!r} (expected 'local' or 's3')")
+    return LocalStorage(Path(settings.media_dir))
+
+
+storage = _create_storage()
+
+
+def media_url(value: str | None) -> str | None:
+    # Rows store storage keys ("c/<hash>.png"); absolute and rooted URLs pass through unchanged
+    if not value or value.startswith(("http://", "https://", "/")):
+        return value
+    return storage.url(value)
+
+
+def media_variants(variants: list[dict] | None) -> list[dict] | None:
+    if not variants:
+        return variants
+    return [
+        {"url": media_url(v.get("key") or v.get("url")), "width": v["width"], "height": v["height"], "format": v["format"]}
+        for v in variants
+    ]
@@ -0,0 +1,95 @@
+import hashlib
+import os
+from pathlib import Path
+import shutil
+import tempfile
+from typing import NamedTuple
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from .images import generate_variants
+from .storage import storage
+
+_CONTENT_TYPES = {".jpg": "image/jpeg", ".png": "image/png", ".gif": "image/gif", ".webp": "image/webp", ".avif": "image/avif"}
+
+
+def sniff_image(head: bytes) -> str | None:
+    # Extension for the image type named by the leading magic bytes, or None
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+    if head[4:12] in (b"ftypavif", b"ftypavis"):
+        return ".avif"
+    return None
+
+
+async def save_upload(file: UploadFile, staging_dir: Path) -> tuple[Path, str]:
+    """Stream an uploaded image to a temp file in ``staging_dir`` without buffering it in memory.
+
+    Returns the temp path (owned by the caller) and its content-addressed name,
+    ``<sha256[:32]>.<ext>``. The type comes from the first chunk's magic bytes (415 if
+    it is not a supported image) and the size is enforced while copying (413 past
+    UPLOAD_MAX_BYTES).
+    """
+    if file.content_type and not file.content_type.startswith(("image/", "application/octet-stream")):
+        raise HTTPException(status_code=415, detail="Only image uploads are accepted")
+    limit = settings.upload_max_bytes
+    if file.size is not None and file.size > limit:
+        raise HTTPException(status_code=413, detail=f"File exceeds {limit} bytes")
+
+    chunk = await file.read(settings.upload_chunk_bytes)
+    ext = sniff_image(chunk)
+    if ext is None:
+        raise HTTPException(status_code=415, detail="Unsupported or unrecognised image format")
+
+    fd, tmp_name = tempfile.mkstemp(dir=staging_dir, prefix=".upload-", suffix=ext)
+    tmp = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as out:
+            written = 0
+            digest = hashlib.sha256()
+            while chunk:
+                written += len(chunk)
+                if written > limit:
+                    raise HTTPException(status_code=413, detail=f"File exceeds {limit} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(out.write, chunk)
+                chunk = await file.read(settings.upload_chunk_bytes)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return tmp, f"{digest.hexdigest()[:32]}{ext}"
+
+
+class StoredImage(NamedTuple):
+    # Storage keys, resolved into URLs when serialized (see storage.media_url)
+    key: str
+    variants: list[dict] | None
+
+
+async def store_image(file: UploadFile, variants: bool = True) -> StoredImage:
+    # Stream, optionally render responsive variants, then hand everything to the media storage.
+    # Identical content maps to the same key, so re-used images are stored once.
+    tmp, name = await save_upload(file, storage.staging_dir)
+    work = Path(tempfile.mkdtemp(dir=storage.staging_dir, prefix=".variants-"))
+    try:
+        rendered = await generate_variants(tmp, Path(name).stem, work) if variants else None
+        # Variants first: once the original exists under its key the blob is complete.
+        # Re-putting an identical blob refreshes its mtime for the GC grace period.
+        for v in rendered or ():
+            await run_in_threadpool(storage.put_file, f"c/{v['file']}", work / v["file"], f"image/{v['format']}", settings.media_cache_control)
+        await run_in_threadpool(storage.put_file, f"c/{name}", tmp, _CONTENT_TYPES[tmp.suffix], settings.media_cache_control)
+    finally:
+        tmp.unlink(missing_ok=True)
+        shutil.rmtree(work, ignore_errors=True)
+    return StoredImage(
+        f"c/{name}",
+        [{"key": f"c/{v['file']}", "width": v["width"], "height": v["height"], "format": v["format"]} for v in rendered] if rendered else None,
+    )
@@ -0,0 +1,2 @@
+# benchmarks package
+
@@ -0,0 +1,101 @@
+"""Compare the sync (psycopg2 + threadpool) and async (asyncpg) database modes.
+
+Starts one uvicorn process per mode against the same local Postgres, then drives
+the public menu and the editor list endpoints at a fixed concurrency. The menu
+cache is disabled in both processes so every request reaches the database.
+
+    cd python && pip install -r bench/requirements.txt
+    python -m bench.db_modes --slug la-famiglia --concurrency 200 --duration 15
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import httpx
+
+from .common import login, summarize, wait_ready
+
+
+MODES = {"sync": "false", "async": "true"}
+
+
+async def _drive(base: str, paths: list[str], headers: dict, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, headers=headers, limits=limits, timeout=30) as client:
+        async def worker(n: int):
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                start = time.perf_counter()
+                try:
+                    r = await client.get(path)
+                    if r.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed)
+
+
+def run_mode(mode: str, args) -> dict:
+    port = args.port + (0 if mode == "sync" else 1)
+    env = {**os.environ, "DB_ASYNC": MODES[mode], "MENU_CACHE_SIZE": "0", "MENU_SNAPSHOTS_ENABLED": "false"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+    )
+    try:
+        base = f"http://127.0.0.1:{port}"
+        wait_ready(base)
+        headers = login(base, args.username, args.password)
+        results = {}
+        results["public_menu"] = asyncio.run(_drive(base, [f"/api/v1/public/menu/{args.slug}"], {}, args.concurrency, args.duration))
+        if headers:
+            lists = [f"/api/v1/restaurants/{args.slug}/{name}" for name in ("categories", "products", "ingredients")]
+            results["editor_lists"] = asyncio.run(_drive(base, lists, headers, args.concurrency, args.duration))
+        return results
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--slug", default="la-famiglia")
+    parser.add_argument("--username", default="lafamiglia", help="Manager login for the list endpoints ('' to skip)")
+    parser.add_argument("--password", default="secret")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--port", type=int, default=8195)
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = {"concurrency": args.concurrency, "duration": args.duration, "modes": {}}
+    for mode in args.modes.split(","):
+        report["modes"][mode] = run_mode(mode, args)
+
+    for mode, scenarios in report["modes"].items():
+        for name, r in scenarios.items():
+            print(f"{mode:6} {name:12} {r['throughput_rps']:>9} rps  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  errors {r['errors']}")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
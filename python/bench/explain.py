@@ -0,0 +1,195 @@
+"""EXPLAIN ANALYZE the hot queries of one seeded restaurant.
+
+Runs the app's own service code (public menu, menu document, product list pages and
+filters, link checks, link sync, delete checks, bulk pricing) against the database while
+recording the SQL it sends, then explains every recorded statement with
+EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON). Everything happens in one transaction that
+is rolled back, writes included.
+
+    cd python && python -m bench.seed --restaurants 1 --products 5000 --ingredients 400
+    python -m bench.explain --slug bench-1 --out plans.json
+    python -m bench.explain --slug bench-1 --drop-index ix_products_restaurant_name --plans
+
+--drop-index drops an index inside the rolled-back transaction to compare plans
+without it. DROP INDEX locks the table until the end of the run, so use a bench database.
+"""
+import argparse
+from contextlib import contextmanager
+import json
+import sys
+
+from sqlalchemy import create_engine, event, select, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import DATABASE_URL
+from app.models.models import Category, Ingredient, MenuDocument, Product, Restaurant, product_categories, product_ingredients
+from app.schemas.schemas import BulkPriceUpdate
+from app.services.menu import build_public_menu
+from app.services.products import ProductFilters, check_link_ids, list_product_page, reprice_products, sync_product_links
+from app.services.restaurants import RestaurantRef
+
+
+_EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}  # not SAVEPOINT/RELEASE
+CATALOG_TABLES = {"products", "categories", "ingredients", "product_categories", "product_ingredients", "settings", "menu_documents"}
+
+
+class Recorder:
+    # Collects (label, SQL, DBAPI parameters) of single statements while a label is set
+    def __init__(self):
+        self.label: str | None = None
+        self.statements: list[tuple[str, str, dict]] = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        if self.label and not executemany and statement.lstrip().split(None, 1)[0].upper() in _EXPLAINABLE:
+            self.statements.append((self.label, statement, parameters))
+
+    @contextmanager
+    def scope(self, db: Session, label: str):
+        # Each action runs in a savepoint so writes do not change what later actions see
+        self.label = label
+        savepoint = db.begin_nested()
+        try:
+            yield
+            db.flush()
+        finally:
+            self.label = None
+            savepoint.rollback()
+
+
+def run_actions(db: Session, rec: Recorder, rest: RestaurantRef):
+    rid = rest.id
+    category_ids = list(db.execute(select(Category.id).where(Category.restaurant_id == rid).order_by(Category.id)).scalars())
+    ingredient_ids = list(db.execute(select(Ingredient.id).where(Ingredient.restaurant_id == rid).order_by(Ingredient.id)).scalars())
+    product_id = db.execute(select(Product.id).where(Product.restaurant_id == rid).order_by(Product.id).limit(1)).scalar()
+    busiest_category = db.execute(
+        select(product_categories.c.category_id).join(Category).where(Category.restaurant_id == rid)
+        .group_by(product_categories.c.category_id).order_by(text("count(*) DESC")).limit(1)
+    ).scalar() or (category_ids[0] if category_ids else None)
+
+    with rec.scope(db, "menu.tables"):
+        build_public_menu(db, rest)
+    with rec.scope(db, "menu.document"):
+        db.execute(select(MenuDocument.document).where(MenuDocument.restaurant_id == rid)).scalar()
+    with rec.scope(db, "categories.list"):
+        db.query(Category).filter(Category.restaurant_id == rid).order_by(Category.name.asc()).all()
+    with rec.scope(db, "ingredients.list"):
+        db.query(Ingredient).filter(Ingredient.restaurant_id == rid).order_by(Ingredient.name.asc()).all()
+
+    first = None
+    with rec.scope(db, "products.page"):
+        first = list_product_page(db, rid, ProductFilters(), "name", 100)
+    if first.next_cursor:
+        with rec.scope(db, "products.page2"):
+            list_product_page(db, rid, ProductFilters(), "name", 100, first.next_cursor)
+    with rec.scope(db, "products.page_price_desc"):
+        list_product_page(db, rid, ProductFilters(), "-price", 100)
+    with rec.scope(db, "products.page_q"):
+        list_product_page(db, rid, ProductFilters(q="Product 01"), "name", 100)
+    if busiest_category is not None:
+        with rec.scope(db, "products.page_category"):
+            list_product_page(db, rid, ProductFilters(category_id=busiest_category), "name", 100)
+    if ingredient_ids:
+        with rec.scope(db, "products.page_ingredient"):
+            list_product_page(db, rid, ProductFilters(ingredient_id=ingredient_ids[0]), "name", 100)
+
+    with rec.scope(db, "product.check_link_ids"):
+        check_link_ids(db, rid, category_ids[:2], ingredient_ids[:5])
+    if product_id is not None:
+        with rec.scope(db, "product.sync_links"):
+            sync_product_links(db, product_id, category_ids[-1:], ingredient_ids[-3:])
+    if busiest_category is not None:
+        with rec.scope(db, "category.delete_check"):
+            db.query(product_categories).filter_by(category_id=busiest_category).first()
+    if ingredient_ids:
+        with rec.scope(db, "ingredient.delete"):
+            db.query(product_ingredients.c.product_id).filter_by(ingredient_id=ingredient_ids[0]).all()
+            db.delete(db.get(Ingredient, ingredient_ids[0]))
+    with rec.scope(db, "products.bulk_price"):
+        reprice_products(db, rid, ProductFilters(category_id=busiest_category), BulkPriceUpdate(percent=5, round_to=0.05))
+
+
+def _nodes(plan: dict, depth: int = 0):
+    label = plan["Node Type"]
+    if "Relation Name" in plan:
+        label += f" on {plan['Relation Name']}"
+    if "Index Name" in plan:
+        label += f" using {plan['Index Name']}"
+    yield depth, label, plan.get("Actual Total Time"), plan.get("Actual Rows")
+    for child in plan.get("Plans", ()):
+        yield from _nodes(child, depth + 1)
+
+
+def explain(db: Session, statement: str, parameters) -> dict:
+    raw = db.connection().exec_driver_sql(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters).scalar()
+    result = (json.loads(raw) if isinstance(raw, str) else raw)[0]
+    nodes = list(_nodes(result["Plan"]))
+    return {
+        "planning_ms": result.get("Planning Time"),
+        "execution_ms": result.get("Execution Time"),
+        "triggers": [{"name": t["Trigger Name"], "ms": t["Time"], "calls": t["Calls"]} for t in result.get("Triggers", ())],
+        "seq_scans": sorted({label.split(" on ")[1] for _, label, _, _ in nodes if label.startswith("Seq Scan on ") and label.split(" on ")[1] in CATALOG_TABLES}),
+        "nodes": [{"depth": d, "node": label, "ms": ms, "rows": rows} for d, label, ms, rows in nodes],
+        "plan": result["Plan"],
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Defaults to the app's POSTGRES_* settings")
+    parser.add_argument("--slug", default="bench-1")
+    parser.add_argument("--drop-index", action="append", default=[], metavar="NAME", help="Explain without this index (rolled back)")
+    parser.add_argument("--plans", action="store_true", help="Print the plan tree of every statement")
+    parser.add_argument("--out", help="Write statements and plans as JSON to this file")
+    args = parser.parse_args(argv)
+
+    engine = create_engine(args.database_url)
+    rec = Recorder()
+    report = {"slug": args.slug, "dropped_indexes": args.drop_index, "menu_read_model": settings.menu_read_model_enabled, "statements": []}
+    try:
+        with Session(engine) as db:
+            row = db.execute(select(Restaurant).where(Restaurant.slug == args.slug)).scalar()
+            if row is None:
+                parser.error(f"No restaurant {args.slug!r}; seed one with: python -m bench.seed")
+            rest = RestaurantRef(id=row.id, slug=row.slug, name=row.name, is_active=True, logo_image=None)
+            for name in args.drop_index:
+                db.execute(text(f'DROP INDEX "{name}"'))
+            for table in sorted(CATALOG_TABLES):
+                db.execute(text(f"ANALYZE {table}"))
+
+            event.listen(engine, "before_cursor_execute", rec)
+            try:
+                run_actions(db, rec, rest)
+            finally:
+                event.remove(engine, "before_cursor_execute", rec)
+
+            counts: dict[str, int] = {}
+            for label, statement, parameters in rec.statements:
+                counts[label] = counts.get(label, 0) + 1
+                name = f"{label}#{counts[label]}"
+                savepoint = db.begin_nested()
+                try:
+                    result = explain(db, statement, parameters)
+                finally:
+                    savepoint.rollback()
+                report["statements"].append({"name": name, "sql": statement, **result})
+            db.rollback()
+    finally:
+        engine.dispose()
+
+    for s in report["statements"]:
+        seq = f"  seq scan: {', '.join(s['seq_scans'])}" if s["seq_scans"] else ""
+        triggers = sum(t["ms"] for t in s["triggers"])
+        trig = f"  triggers {triggers:.2f} ms" if s["triggers"] else ""
+        print(f"{s['name']:30} {s['execution_ms']:>9.3f} ms  plan {s['planning_ms']:>7.3f} ms{trig}{seq}")
+        if args.plans:
+            for n in s["nodes"]:
+                print(f"    {'  ' * n['depth']}{n['node']}  ({n['ms']} ms, {n['rows']} rows)")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+"""Load-test the public menu and the editor flows against seeded restaurants.
+
+Seeds synthetic restaurants (see bench.seed), starts the API in a uvicorn process
+and drives each scenario at a fixed concurrency for --duration seconds:
+
+    public_menu      GET  /public/menu/{slug}
+    list_products    GET  /restaurants/{slug}/products?limit=100
+    create_product   POST /restaurants/{slug}/products
+    update_product   PUT  /restaurants/{slug}/products/{id}
+    login            POST /login (bcrypt-bound)
+
+Reports throughput, p50/p95/p99 latency, errors and SQL statements per request
+(from the server's /metrics). Results are written as JSON; --baseline compares a
+run with an earlier results file.
+
+    cd python && pip install -r bench/requirements.txt
+    python -m bench.load --disposable --products 300 --concurrency 50 --duration 10 --out run.json
+    python -m bench.load --disposable --products 300 --baseline run.json
+    python -m bench.load --base-url http://127.0.0.1:8095 --no-seed --scenarios public_menu
+
+--disposable creates a throwaway database next to POSTGRES_DB (same server and
+credentials) and drops it afterwards; otherwise restaurants are (re)seeded into the
+configured database under --prefix.
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Callable
+
+import httpx
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from app.core.database import DATABASE_URL
+
+from . import seed as seeder
+from .common import login, summarize, wait_ready
+
+
+@dataclass
+class Scenario:
+    name: str
+    route: str  # route template as labelled in /metrics
+    request: Callable[[httpx.AsyncClient, int], object]
+
+
+class Target:
+    """The seeded restaurants as the scenarios see them: slugs, auth headers and catalog ids."""
+
+    def __init__(self, base: str, prefix: str, slugs: list[str], password: str):
+        self.base = base
+        self.prefix = prefix
+        self.slugs = slugs
+        self.password = password
+        self.headers = {slug: login(base, slug, password, prefix) for slug in slugs}
+        self.ids: dict[str, dict[str, list[int]]] = {}
+        for slug in slugs:
+            self.ids[slug] = {}
+            for kind in ("categories", "ingredients", "products"):
+                r = httpx.get(f"{base}{prefix}/restaurants/{slug}/{kind}", headers=self.headers[slug], timeout=60)
+                r.raise_for_status()
+                self.ids[slug][kind] = [row["id"] for row in r.json()]
+
+    def product_payload(self, slug: str, rng: random.Random, name: str) -> dict:
+        ids = self.ids[slug]
+        return {
+            "name": name,
+            "price_currency_1": round(rng.uniform(2, 40), 2),
+            "category_ids": rng.sample(ids["categories"], min(1, len(ids["categories"]))),
+            "ingredient_ids": rng.sample(ids["ingredients"], min(3, len(ids["ingredients"]))),
+        }
+
+
+def scenarios(t: Target) -> dict[str, Scenario]:
+    p = t.prefix
+    rng = random.Random(7)
+
+    def public_menu(client, i):
+        return client.get(f"{p}/public/menu/{t.slugs[i % len(t.slugs)]}")
+
+    def list_products(client, i):
+        slug = t.slugs[i % len(t.slugs)]
+        return client.get(f"{p}/restaurants/{slug}/products", params={"limit": 100}, headers=t.headers[slug])
+
+    def create_product(client, i):
+        slug = t.slugs[i % len(t.slugs)]
+        return client.post(f"{p}/restaurants/{slug}/products", json=t.product_payload(slug, rng, f"Load {time.monotonic_ns()}"), headers=t.headers[slug])
+
+    def update_product(client, i):
+        slug = t.slugs[i % len(t.slugs)]
+        pid = rng.choice(t.ids[slug]["products"])
+        return client.put(f"{p}/restaurants/{slug}/products/{pid}", json=t.product_payload(slug, rng, f"Updated {pid}"), headers=t.headers[slug])
+
+    def login_request(client, i):
+        slug = t.slugs[i % len(t.slugs)]
+        return client.post(f"{p}/login", data={"username": slug, "password": t.password})
+
+    return {
+        s.name: s
+        for s in (
+            Scenario("public_menu", f"{p}/public/menu/{{restaurant_slug}}", public_menu),
+            Scenario("list_products", f"{p}/restaurants/{{slug}}/products", list_products),
+            Scenario("create_product", f"{p}/restaurants/{{slug}}/products", create_product),
+            Scenario("update_product", f"{p}/restaurants/{{slug}}/products/{{product_id}}", update_product),
+            Scenario("login", f"{p}/login", login_request),
+        )
+    }
+
+
+async def drive(base: str, scenario: Scenario, concurrency: int, duration: float) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base, limits=limits, timeout=30) as client:
+        async def worker(n: int):
+            nonlocal errors
+            i = n
+            while time.perf_counter() < deadline:
+                i += concurrency
+                start = time.perf_counter()
+                try:
+                    r = await scenario.request(client, i)
+                    if r.status_code >= 400:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append((time.perf_counter() - start) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return summarize(latencies, errors, elapsed)
+
+
+def _db_query_totals(base: str) -> dict[str, tuple[float, float]] | None:
+    # route -> (statements, requests) summed over methods, from the server's /metrics
+    try:
+        r = httpx.get(f"{base}/metrics", timeout=10)
+    except httpx.HTTPError:
+        return None
+    if r.status_code != 200:
+        return None
+    totals: dict[str, list[float]] = {}
+    for line in r.text.splitlines():
+        for suffix, slot in (("http_request_db_queries_sum{", 0), ("http_request_db_queries_count{", 1)):
+            if line.startswith(suffix):
+                labels, value = line[len(suffix):].rsplit("} ", 1)
+                route = labels.split('route="', 1)[1].split('"', 1)[0]
+                totals.setdefault(route, [0.0, 0.0])[slot] += float(value)
+    return {route: (q, n) for route, (q, n) in totals.items()}
+
+
+def queries_per_request(before, after, route: str) -> float | None:
+    if before is None or after is None:
+        return None
+    q0, n0 = before.get(route, (0.0, 0.0))
+    q1, n1 = after.get(route, (0.0, 0.0))
+    return round((q1 - q0) / (n1 - n0), 2) if n1 > n0 else None
+
+
+class DisposableDatabase:
+    """CREATE DATABASE on the configured server for one run; dropped on exit."""
+
+    def __init__(self, url: str):
+        self.url = make_url(url)
+        self.name = f"{self.url.database}_bench_{os.getpid()}"
+        self.admin = create_engine(self.url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+
+    def __enter__(self) -> str:
+        with self.admin.connect() as conn:
+            conn.execute(text(f'CREATE DATABASE "{self.name}"'))
+        return self.url.set(database=self.name).render_as_string(hide_password=False)
+
+    def __exit__(self, *exc):
+        with self.admin.connect() as conn:
+            conn.execute(text(f'DROP DATABASE IF EXISTS "{self.name}" WITH (FORCE)'))
+        self.admin.dispose()
+
+
+def _start_server(args, database: str | None) -> subprocess.Popen:
+    env = {**os.environ, "METRICS_ENABLED": "true", "METRICS_SLOW_REQUEST_MS": "0", "MENU_SNAPSHOTS_ENABLED": "false"}
+    if database:
+        env["POSTGRES_DB"] = database
+    for item in args.server_env:
+        key, _, value = item.partition("=")
+        env[key] = value
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env,
+    )
+
+
+def run(args, database_url: str, database: str | None) -> dict:
+    seeded = None
+    if not args.no_seed:
+        seeded = seeder.seed(database_url, args.prefix, args.restaurants, seeder.size_from_args(args), args.password, args.seed)
+    proc = None
+    base = args.base_url
+    if not base:
+        proc = _start_server(args, database)
+        base = f"http://127.0.0.1:{args.port}"
+    try:
+        wait_ready(base)
+        target = Target(base, args.api_prefix, [f"{args.prefix}-{n}" for n in range(1, args.restaurants + 1)], args.password)
+        available = scenarios(target)
+        results = {}
+        for name in args.scenarios.split(","):
+            scenario = available[name]
+            before = _db_query_totals(base)
+            result = asyncio.run(drive(base, scenario, args.concurrency, args.duration))
+            result["queries_per_request"] = queries_per_request(before, _db_query_totals(base), scenario.route)
+            results[name] = result
+        return {"seed": seeded, "scenarios": results}
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=10)
+
+
+def compare(report: dict, baseline: dict):
+    for name, r in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        changes = []
+        for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+            if old.get(key):
+                changes.append(f"{key} {100 * (r[key] - old[key]) / old[key]:+.1f}%")
+        print(f"{name:15} vs baseline: {', '.join(changes)}")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    seeder.add_arguments(parser)
+    parser.add_argument("--disposable", action="store_true", help="Seed and serve a throwaway database")
+    parser.add_argument("--no-seed", action="store_true", help="Use restaurants seeded earlier under --prefix")
+    parser.add_argument("--base-url", help="Drive an already running API instead of starting one")
+    parser.add_argument("--api-prefix", default="/api/v1")
+    parser.add_argument("--port", type=int, default=8197)
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE", help="Extra environment for the started server")
+    parser.add_argument("--scenarios", default="public_menu,list_products,create_product,update_product,login")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    parser.add_argument("--baseline", help="Earlier results file to compare with")
+    args = parser.parse_args(argv)
+    if args.disposable and (args.base_url or args.no_seed):
+        parser.error("--disposable starts its own server on a fresh database")
+
+    config = {k: v for k, v in vars(args).items() if k not in ("database_url", "password", "out", "baseline")}
+    if args.disposable:
+        with DisposableDatabase(args.database_url) as url:
+            report = run(args, url, make_url(url).database)
+    else:
+        report = run(args, args.database_url, None if args.database_url == DATABASE_URL else make_url(args.database_url).database)
+    report = {"config": config, "started_at": time.strftime("%Y-%m-%dT%H:%M:%S"), **report}
+
+    for name, r in report["scenarios"].items():
+        qpr = "-" if r["queries_per_request"] is None else r["queries_per_request"]
+        print(f"{name:15} {r['throughput_rps']:>9} rps  p50 {r['p50_ms']:>8} ms  p95 {r['p95_ms']:>8} ms  p99 {r['p99_ms']:>8} ms  queries/req {qpr:>6}  errors {r['errors']}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare(report, json.load(f))
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
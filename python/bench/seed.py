@@ -0,0 +1,136 @@
+"""Seed synthetic restaurants for benchmarks.
+
+Each restaurant gets a settings row and the requested numbers of categories,
+ingredients and products; every product links to a random number of categories and
+ingredients around the given averages. Restaurants are named <prefix>-<n>, with the
+manager login <prefix>-<n> / --password. Re-seeding a slug replaces it.
+
+    cd python && python -m bench.seed --restaurants 3 --products 300 --categories 12 --ingredients 60
+    python -m bench.seed --database-url postgresql+psycopg2://postgres@localhost/bench --products 5000
+"""
+import argparse
+from dataclasses import asdict, dataclass
+import json
+import random
+import sys
+import time
+
+from sqlalchemy import create_engine, delete, insert, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import DATABASE_URL, Base
+from app.core.security import get_password_hash
+from app.models.models import Category, Ingredient, Product, Restaurant, Setting, product_categories, product_ingredients
+from app.services import menu_model
+
+
+@dataclass
+class CatalogSize:
+    categories: int = 12
+    products: int = 300
+    ingredients: int = 60
+    categories_per_product: float = 1.2  # average links per product
+    ingredients_per_product: float = 4.0
+
+
+def _link_count(rng: random.Random, average: float, available: int) -> int:
+    # 0..2*average, so the mean matches while some products have none
+    return min(available, rng.randint(0, round(2 * average)))
+
+
+def drop_restaurant(db: Session, slug: str):
+    rid = db.execute(select(Restaurant.id).where(Restaurant.slug == slug)).scalar()
+    if rid is None:
+        return
+    # Category links are ON DELETE RESTRICT, so they go before the cascade
+    products = select(Product.id).where(Product.restaurant_id == rid)
+    db.execute(delete(product_categories).where(product_categories.c.product_id.in_(products)))
+    db.execute(delete(Restaurant).where(Restaurant.id == rid))
+
+
+def seed_restaurant(db: Session, slug: str, size: CatalogSize, password_hash: str, rng: random.Random) -> dict:
+    """Insert one restaurant with a synthetic catalog using multi-row INSERTs; the caller commits."""
+    drop_restaurant(db, slug)
+    rid = db.execute(
+        insert(Restaurant).values(name=f"Bench {slug}", slug=slug, username=slug, password_hash=password_hash, is_active=True).returning(Restaurant.id)
+    ).scalar_one()
+    db.execute(insert(Setting).values(restaurant_id=rid, company_name=f"Bench {slug}", currency_1="USD", currency_2="EUR", rate=0.92))
+
+    def names(model, label: str, count: int) -> list[int]:
+        if not count:
+            return []
+        rows = [{"restaurant_id": rid, "name": f"{label} {i:05d}"} for i in range(count)]
+        return list(db.execute(insert(model).returning(model.id), rows).scalars())
+
+    category_ids = names(Category, "Category", size.categories)
+    ingredient_ids = names(Ingredient, "Ingredient", size.ingredients)
+    product_ids = []
+    if size.products:
+        rows = [{"restaurant_id": rid, "name": f"Product {i:05d} {rng.choice(('grilled', 'fresh', 'spicy', 'classic'))}", "price_currency_1": round(rng.uniform(2, 40), 2)} for i in range(size.products)]
+        product_ids = list(db.execute(insert(Product).returning(Product.id), rows).scalars())
+
+    links = {product_categories: [], product_ingredients: []}
+    for pid in product_ids:
+        for cid in rng.sample(category_ids, _link_count(rng, size.categories_per_product, len(category_ids))):
+            links[product_categories].append({"product_id": pid, "category_id": cid})
+        for iid in rng.sample(ingredient_ids, _link_count(rng, size.ingredients_per_product, len(ingredient_ids))):
+            links[product_ingredients].append({"product_id": pid, "ingredient_id": iid})
+    for table, rows in links.items():
+        if rows:
+            db.execute(insert(table), rows)
+    if settings.menu_read_model_enabled:
+        menu_model.rebuild_document(db, rid)
+    return {
+        "slug": slug,
+        "products": len(product_ids),
+        "category_links": len(links[product_categories]),
+        "ingredient_links": len(links[product_ingredients]),
+    }
+
+
+def seed(database_url: str, prefix: str, restaurants: int, size: CatalogSize, password: str, seed_value: int = 1) -> dict:
+    engine = create_engine(database_url)
+    Base.metadata.create_all(engine)
+    rng = random.Random(seed_value)
+    password_hash = get_password_hash(password)
+    started = time.perf_counter()
+    seeded = []
+    try:
+        for n in range(1, restaurants + 1):
+            with Session(engine) as db:
+                seeded.append(seed_restaurant(db, f"{prefix}-{n}", size, password_hash, rng))
+                db.commit()
+    finally:
+        engine.dispose()
+    return {"size": asdict(size), "restaurants": seeded, "seconds": round(time.perf_counter() - started, 2)}
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--database-url", default=DATABASE_URL, help="Defaults to the app's POSTGRES_* settings")
+    parser.add_argument("--prefix", default="bench")
+    parser.add_argument("--restaurants", type=int, default=1)
+    parser.add_argument("--categories", type=int, default=CatalogSize.categories)
+    parser.add_argument("--products", type=int, default=CatalogSize.products)
+    parser.add_argument("--ingredients", type=int, default=CatalogSize.ingredients)
+    parser.add_argument("--categories-per-product", type=float, default=CatalogSize.categories_per_product)
+    parser.add_argument("--ingredients-per-product", type=float, default=CatalogSize.ingredients_per_product)
+    parser.add_argument("--password", default="bench", help="Manager password of every seeded restaurant")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed (same seed, same catalog)")
+
+
+def size_from_args(args) -> CatalogSize:
+    return CatalogSize(args.categories, args.products, args.ingredients, args.categories_per_product, args.ingredients_per_product)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    result = seed(args.database_url, args.prefix, args.restaurants, size_from_args(args), args.password, args.seed)
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
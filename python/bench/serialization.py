@@ -0,0 +1,128 @@
+"""Time serializing and compressing public menus of growing size.
+
+Builds synthetic menus in-process (no database) with assemble_menu and compares the
+encoders the API can use for them: FastAPI's generic path (jsonable_encoder + stdlib
+json), stdlib json alone, orjson (render_json when installed) and pydantic's
+dump_json for the list endpoints. Then gzip/brotli sizes and times for each body.
+
+    cd python && python -m bench.serialization --sizes 50,300,1000,3000 --out serialization.json
+"""
+import argparse
+import gzip
+import json
+import random
+import sys
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.compression import brotli
+from app.core.http_cache import orjson
+from app.schemas.schemas import ProductOut
+from app.services.menu import assemble_menu
+from app.services.restaurants import RestaurantRef
+
+
+def build_menu(n_products: int, seed: int = 1) -> tuple[dict, list]:
+    rnd = random.Random(seed)
+    n_cats = max(4, n_products // 25)
+    n_ings = max(10, n_products // 5)
+    rest = RestaurantRef(id=uuid4(), name="Bench", slug="bench", is_active=True, logo_image=None)
+    setting = SimpleNamespace(
+        company_name="Bench", logo_path=None, logo_variants=None, currency_1="USD", currency_2="EUR",
+        rate=0.92, barcode_image_path=None, primary_color="#222222", background_color="#ffffff",
+    )
+    variants = [{"key": f"c/{'a' * 32}_{w}w.webp", "width": w, "height": w, "format": "webp"} for w in (160, 480, 960)]
+    categories = [SimpleNamespace(id=i, name=f"Category {i:03d}", image_path=None, image_variants=None) for i in range(1, n_cats + 1)]
+    ingredients = [SimpleNamespace(id=i, name=f"Ingredient {i:04d}") for i in range(1, n_ings + 1)]
+    products = [
+        SimpleNamespace(
+            id=i, name=f"Product {i:05d} with a longer menu name", price_currency_1=round(rnd.uniform(2, 40), 2),
+            image_path=f"c/{'b' * 32}.jpg" if i % 2 else None, image_variants=variants if i % 2 else None,
+        )
+        for i in range(1, n_products + 1)
+    ]
+    cat_links = {p.id: [rnd.randint(1, n_cats)] for p in products}
+    ing_links = {p.id: rnd.sample(range(1, n_ings + 1), rnd.randint(0, 6)) for p in products}
+    menu = assemble_menu(rest, setting, categories, products, ingredients, cat_links, ing_links)
+    rows = [
+        SimpleNamespace(**vars(p), price_currency_2=round(p.price_currency_1 * setting.rate, 2), category_ids=cat_links[p.id], ingredient_ids=ing_links[p.id])
+        for p in products
+    ]
+    return menu, rows
+
+
+def _time(fn, repeat: int) -> tuple[float, bytes]:
+    best = float("inf")
+    out = b""
+    for _ in range(repeat):
+        start = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - start)
+    return round(best * 1000, 3), out
+
+
+def _stdlib(content) -> bytes:
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def run_size(n: int, repeat: int, gzip_level: int, brotli_quality: int) -> dict:
+    menu, rows = build_menu(n)
+    encoders = {
+        "jsonable_encoder+json": lambda: _stdlib(jsonable_encoder(menu)),
+        "json": lambda: _stdlib(menu),
+    }
+    if orjson is not None:
+        encoders["orjson"] = lambda: orjson.dumps(menu)
+
+    result = {"products": n, "menu": {}, "product_list": {}, "compression": {}}
+    body = b""
+    for name, fn in encoders.items():
+        ms, body = _time(fn, repeat)
+        result["menu"][name] = {"ms": ms, "bytes": len(body)}
+
+    adapter = TypeAdapter(list[ProductOut])
+    lists = {
+        "model_validate+model_dump+json": lambda: _stdlib([ProductOut.model_validate(r).model_dump(mode="json") for r in rows]),
+        "type_adapter.dump_json": lambda: adapter.dump_json(adapter.validate_python(rows, from_attributes=True)),
+    }
+    for name, fn in lists.items():
+        ms, out = _time(fn, repeat)
+        result["product_list"][name] = {"ms": ms, "bytes": len(out)}
+
+    codecs = {f"gzip-{gzip_level}": lambda: gzip.compress(body, compresslevel=gzip_level, mtime=0)}
+    if brotli is not None:
+        codecs[f"br-{brotli_quality}"] = lambda: brotli.compress(body, quality=brotli_quality)
+    for name, fn in codecs.items():
+        ms, out = _time(fn, repeat)
+        result["compression"][name] = {"ms": ms, "bytes": len(out), "ratio": round(len(out) / len(body), 3)}
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="50,300,1000,3000", help="Products per menu")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement (best is kept)")
+    parser.add_argument("--gzip-level", type=int, default=6)
+    parser.add_argument("--brotli-quality", type=int, default=5)
+    parser.add_argument("--out", help="Write results as JSON to this file")
+    args = parser.parse_args(argv)
+
+    report = {"repeat": args.repeat, "results": []}
+    for n in (int(s) for s in args.sizes.split(",")):
+        r = run_size(n, args.repeat, args.gzip_level, args.brotli_quality)
+        report["results"].append(r)
+        for section in ("menu", "product_list", "compression"):
+            for name, m in r[section].items():
+                print(f"{n:>6} {section:12} {name:32} {m['ms']:>9} ms {m['bytes']:>10} B")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
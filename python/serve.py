@@ -0,0 +1,40 @@
+import logging
+import os
+import tempfile
+
+import uvicorn
+
+from app.core.config import settings
+from app.core.database import engine
+from app.core.metrics import clear_shared_metrics
+from app.services.bootstrap import prepare_database
+
+
+# Production entry point: N worker processes (one per core by default) that finish
+# in-flight requests on SIGTERM before exiting. Use run.py for a single dev process.
+if __name__ == "__main__":
+    workers = settings.web_workers or os.cpu_count() or 1
+    if workers > 1 and settings.cache_notify_enabled is False:
+        logging.getLogger("serve").warning(
+            "CACHE_NOTIFY_ENABLED=false with %d workers: each worker keeps its own menu/restaurant/token caches "
+            "and sees other workers' edits only after the cache TTL", workers,
+        )
+    # Tables and seeds once in this process, before the workers start (their startup hooks then
+    # find everything in place; the advisory lock covers workers started some other way)
+    prepare_database()
+    engine.dispose()
+    # Workers share their metrics through a directory so any of them can answer /metrics for all
+    # (the workers inherit the environment, and read METRICS_DIR when they import the settings)
+    if settings.metrics_dir:
+        clear_shared_metrics(settings.metrics_dir)
+    elif workers > 1:
+        shared_dir = tempfile.TemporaryDirectory(prefix="digitalmenu-metrics-")  # removed when serve.py exits
+        os.environ["METRICS_DIR"] = shared_dir.name
+    uvicorn.run(
+        "app.main:app",
+        host=settings.web_host,
+        port=settings.web_port,
+        workers=workers,
+        timeout_graceful_shutdown=settings.web_graceful_timeout,
+        proxy_headers=True,
+    )
@@ -0,0 +1,56 @@
+import os
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import OperationalError
+
+# Before the app is imported: settings are read once, and every test sees the uncached app
+os.environ.update({
+    "MENU_CACHE_SIZE": "0",
+    "MENU_READ_MODEL_ENABLED": "false",
+    "MENU_SNAPSHOTS_ENABLED": "false",
+    "IMAGE_VARIANTS_ENABLED": "false",
+    "CACHE_NOTIFY_ENABLED": "false",
+    "RESTAURANT_CACHE_SIZE": "0",
+})
+
+from app.core.database import DATABASE_URL, Base
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "postgres: needs a Postgres server (deselect with -m 'not postgres')")
+
+
+def pytest_collection_modifyitems(items):
+    for item in items:
+        if "database" in getattr(item, "fixturenames", ()):
+            item.add_marker(pytest.mark.postgres)
+
+
+@pytest.fixture
+def database():
+    # Engine on a throwaway database created on the configured Postgres server, dropped afterwards.
+    # No server is an error, not a skip: these tests guard query budgets and locking.
+    url = make_url(os.environ.get("TEST_DATABASE_URL", DATABASE_URL))
+    if url.get_backend_name() != "postgresql":
+        pytest.fail(f"TEST_DATABASE_URL must point at Postgres, got {url.get_backend_name()!r}")
+    name = f"{url.database}_test_{os.getpid()}"
+    admin = create_engine(url.set(database="postgres"), isolation_level="AUTOCOMMIT")
+    try:
+        with admin.connect() as conn:
+            conn.execute(text(f'CREATE DATABASE "{name}"'))
+    except OperationalError as exc:
+        admin.dispose()
+        pytest.fail(
+            f"Postgres not reachable at {url.render_as_string(hide_password=True)}: {exc.orig}\n"
+            "Start one (see README.txt, Tests) or deselect these tests with -m 'not postgres'",
+            pytrace=False,
+        )
+    engine = create_engine(url.set(database=name))
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+    admin.dispose()
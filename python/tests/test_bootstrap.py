@@ -0,0 +1,19 @@
+"""Workers starting together must not race on table creation or the seed rows."""
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.models.models import Restaurant, Setting, User
+from app.services.bootstrap import prepare_database
+
+
+def test_concurrent_first_boot_seeds_once(database):
+    Base.metadata.drop_all(database)
+    with ThreadPoolExecutor(8) as pool:
+        for future in [pool.submit(prepare_database, database) for _ in range(8)]:
+            future.result()
+    with Session(database) as db:
+        counts = [db.execute(select(func.count()).select_from(m)).scalar() for m in (User, Restaurant, Setting)]
+    assert counts == [1, 1, 1]
@@ -0,0 +1,84 @@
+"""Catalog export output imports back unchanged, in both formats, whatever the names contain."""
+import io
+import json
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Restaurant
+from app.services import catalog
+
+
+@pytest.mark.parametrize("names", [
+    ["Pizza | Pasta", "Dolci"],
+    ["Salt\\Pepper", "ends with \\", "\\|", "|"],
+    [],
+])
+def test_list_cell_round_trip(names):
+    assert catalog._split(catalog._join(names)) == names
+
+
+def test_split_keeps_other_backslashes_and_drops_blanks():
+    assert catalog._split("Salt\\Pepper| Dolci ||") == ["Salt\\Pepper", "Dolci"]
+    assert catalog._split(None) is None
+
+
+CATALOG = {
+    "categories": [{"name": "Pizza | Pasta"}, {"name": "Empty"}],
+    "ingredients": [{"name": "Salt\\Pepper"}, {"name": "Basil"}],
+    "products": [
+        {"name": "Margherita", "price_currency_1": 8.5, "categories": ["Pizza | Pasta"], "ingredients": ["Basil", "Salt\\Pepper"]},
+        {"name": "Water | 0.5l", "price_currency_1": 2.0, "categories": [], "ingredients": []},
+        {"name": "Tiramisu", "price_currency_1": 6.0, "categories": ["Dolci \\ Dessert"], "ingredients": ["|"]},
+    ],
+}
+
+
+@pytest.fixture
+def Session(database, monkeypatch):
+    Session = sessionmaker(bind=database, autoflush=False, expire_on_commit=False)
+    monkeypatch.setattr(catalog, "SessionLocal", Session)
+    return Session
+
+
+def make_restaurant(Session, slug: str):
+    with Session() as db:
+        rest = Restaurant(name=slug, slug=slug, username=slug, password_hash="x", is_active=True)
+        db.add(rest)
+        db.commit()
+        return rest.id
+
+
+def import_bytes(Session, restaurant_id, data: bytes, fmt):
+    with Session() as db:
+        result = catalog.import_catalog(db, restaurant_id, io.BytesIO(data), fmt)
+        db.commit()
+    return result
+
+
+def export(restaurant_id, fmt) -> str:
+    return "".join(catalog.export_catalog(restaurant_id, fmt))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "json"])
+def test_export_imports_back_unchanged(Session, fmt):
+    source = make_restaurant(Session, "source")
+    import_bytes(Session, source, json.dumps(CATALOG).encode(), "json")
+    exported = export(source, fmt)
+
+    # Into an empty restaurant: the same catalog comes out again
+    copy = make_restaurant(Session, "copy")
+    result = import_bytes(Session, copy, exported.encode(), fmt)
+    assert result.products_created == 3
+    copied, original = json.loads(export(copy, "json")), json.loads(export(source, "json"))
+    # CSV only carries names through products, so unused categories and ingredients stay behind
+    keys = ["products"] if fmt == "csv" else list(original)
+    assert [copied[k] for k in keys] == [original[k] for k in keys]
+    assert copied["products"][0] == {
+        "name": "Margherita", "price_currency_1": 8.5, "categories": ["Pizza | Pasta"], "ingredients": ["Basil", "Salt\\Pepper"],
+    }
+
+    # Into the restaurant it came from: nothing to do
+    result = import_bytes(Session, source, exported.encode(), fmt)
+    assert (result.products_unchanged, result.products_updated, result.links_written) == (3, 0, 0)
+    assert (result.categories_created, result.ingredients_created) == (0, 0)
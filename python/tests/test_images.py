@@ -0,0 +1,45 @@
+"""Variant rendering: one file per (width below the original) x (encodable format)."""
+import logging
+
+from PIL import Image
+
+from app.core.config import settings
+from app.services import images
+
+
+def test_pillow_encodes_every_default_format(monkeypatch):
+    monkeypatch.setattr(settings, "image_variant_formats", "avif,webp,jpeg")
+    assert images.available_formats() == ["avif", "webp", "jpeg"]
+
+
+def test_render_variants_produces_width_by_format_set(tmp_path):
+    src = tmp_path / "photo.png"
+    Image.new("RGBA", (600, 300), (200, 40, 40, 128)).save(src)
+    variants = images.render_variants(str(src), str(tmp_path), "photo", [160, 480, 960], ["avif", "webp", "jpeg"], 70)
+
+    assert [(v["width"], v["height"], v["format"]) for v in variants] == [
+        (160, 80, "avif"), (160, 80, "webp"), (160, 80, "jpeg"),
+        (480, 240, "avif"), (480, 240, "webp"), (480, 240, "jpeg"),
+    ]
+    for v in variants:
+        with Image.open(tmp_path / v["file"]) as im:
+            assert im.size == (v["width"], v["height"])
+            assert im.format == v["format"].upper()
+            # JPEG has no alpha: transparency is flattened onto white
+            assert im.mode == ("RGB" if v["format"] == "jpeg" else "RGBA")
+
+
+def test_small_image_keeps_its_own_width(tmp_path):
+    src = tmp_path / "icon.jpg"
+    Image.new("RGB", (100, 50)).save(src)
+    variants = images.render_variants(str(src), str(tmp_path), "icon", [160, 480], ["webp"], 70)
+    assert [(v["file"], v["width"]) for v in variants] == [("icon_100w.webp", 100)]
+
+
+def test_unencodable_formats_are_reported_at_startup(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "image_variants_enabled", True)
+    monkeypatch.setattr(settings, "image_variant_formats", "webp,heic")
+    with caplog.at_level(logging.WARNING, logger=images.__name__):
+        images.check_formats()
+    assert "heic" in caplog.text
+    assert images.available_formats() == ["webp"]
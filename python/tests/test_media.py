@@ -0,0 +1,86 @@
+"""Blobs are deleted only when no row references them and they are older than the grace period."""
+import os
+import time
+
+import pytest
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.models import Category, Restaurant, Setting
+from app.services import media
+from app.services.storage import LocalStorage
+
+KEPT, RELEASED, FRESH, SHARED = ("%032x" % n for n in range(1, 5))
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(media, "storage", storage)
+    monkeypatch.setattr(settings, "media_gc_grace_seconds", 60)
+    return storage
+
+
+def put_blob(storage, digest: str, age: float) -> list[str]:
+    # Original plus one variant, written `age` seconds ago
+    keys = [f"c/{digest}.png", f"c/{digest}_320w.webp"]
+    for key in keys:
+        storage.put_bytes(key, b"x")
+        mtime = time.time() - age
+        os.utime(storage.root / key, (mtime, mtime))
+    return keys
+
+
+def stored(storage) -> set[str]:
+    return {key for key, _ in storage.list("c/")}
+
+
+@pytest.fixture
+def db(database, storage):
+    Session = sessionmaker(bind=database, autoflush=False, expire_on_commit=False)
+    with Session() as db:
+        rest = Restaurant(name="r", slug="r", username="r", password_hash="x", is_active=True)
+        db.add(rest)
+        db.flush()
+        db.add(Category(restaurant_id=rest.id, name="Pizza", image_path=f"c/{KEPT}.png"))
+        db.add(Setting(restaurant_id=rest.id, logo_path=f"c/{SHARED}.png"))
+        db.commit()
+        yield db
+
+
+def test_blob_hash():
+    assert media.blob_hash(f"c/{KEPT}.png") == KEPT
+    assert media.blob_hash(f"c/{KEPT}_320w.webp") == KEPT
+    assert media.blob_hash(f"https://cdn.example.com/media/c/{KEPT}.png") == KEPT
+    assert media.blob_hash("uploads/logo.png") is None
+    assert media.blob_hash(None) is None
+
+
+def test_release_media_deletes_only_unreferenced_old_blobs(db, storage):
+    kept, released, fresh = put_blob(storage, KEPT, 3600), put_blob(storage, RELEASED, 3600), put_blob(storage, FRESH, 5)
+
+    media.release_media(db, f"c/{KEPT}.png", f"c/{RELEASED}.png", f"c/{FRESH}_320w.webp", "uploads/legacy.png", None)
+
+    assert stored(storage) == set(kept) | set(fresh)
+    assert not set(released) & stored(storage)
+
+
+def test_release_media_keeps_blob_shared_with_another_row(db, storage):
+    # The same upload used as a logo and (formerly) as a category image
+    shared = put_blob(storage, SHARED, 3600)
+    media.release_media(db, f"c/{SHARED}.png")
+    assert stored(storage) == set(shared)
+
+
+def test_collect_garbage(db, storage):
+    kept, _, fresh = put_blob(storage, KEPT, 3600), put_blob(storage, RELEASED, 3600), put_blob(storage, FRESH, 5)
+
+    result = media.collect_garbage(db)
+
+    assert result == {"blobs": 3, "referenced": 1, "removed": 1, "files_removed": 2}
+    assert stored(storage) == set(kept) | set(fresh)
+
+    # Past the grace period the unreferenced upload goes too
+    settings.media_gc_grace_seconds = 1
+    assert media.collect_garbage(db)["removed"] == 1
+    assert stored(storage) == set(kept)
@@ -0,0 +1,75 @@
+"""Concurrent catalog writes must both land in the menu document, entries and order alike."""
+import threading
+import time
+
+import pytest
+from sqlalchemy import select, text
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.models.models import MenuDocument, Product, Restaurant
+from app.services import menu_model
+
+
+@pytest.fixture
+def Session(database, monkeypatch):
+    monkeypatch.setattr(settings, "menu_read_model_enabled", True)
+    return sessionmaker(bind=database, autoflush=False, expire_on_commit=False)
+
+
+def wait_for_lock_wait(Session):
+    # Until another connection of this database is blocked on a lock
+    with Session() as db:
+        for _ in range(200):
+            waiting = db.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database() AND wait_event_type = 'Lock'"
+            )).scalar()
+            if waiting:
+                return
+            db.rollback()  # pg_stat_activity is a per-transaction snapshot
+            time.sleep(0.01)
+    raise AssertionError("second writer never waited for the document lock")
+
+
+def add_product(db, restaurant_id, name: str) -> int:
+    product = Product(restaurant_id=restaurant_id, name=name, price_currency_1=5)
+    db.add(product)
+    db.flush()
+    menu_model.products_changed(db, restaurant_id, [product.id])
+    return product.id
+
+
+@pytest.mark.parametrize("existing_document", [True, False], ids=["patch", "first-build"])
+def test_concurrent_product_creates_keep_both_entries(Session, existing_document):
+    with Session() as db:
+        rest = Restaurant(name="r", slug="r", username="r", password_hash="x", is_active=True)
+        db.add(rest)
+        db.flush()
+        if existing_document:
+            menu_model.rebuild_document(db, rest.id)
+        db.commit()
+        restaurant_id = rest.id
+
+    first = Session()
+    first_id = add_product(first, restaurant_id, "Beta")  # holds the document row lock until commit
+    result = {}
+
+    def second_writer():
+        with Session() as db:
+            result["id"] = add_product(db, restaurant_id, "Alpha")
+            db.commit()
+
+    thread = threading.Thread(target=second_writer)
+    thread.start()
+    try:
+        wait_for_lock_wait(Session)
+        first.commit()
+    finally:
+        first.close()
+        thread.join(timeout=10)
+
+    with Session() as db:
+        document = db.execute(select(MenuDocument.document).where(MenuDocument.restaurant_id == restaurant_id)).scalar()
+        assert document["order"]["products"] == [result["id"], first_id]
+        assert set(document["products"]) == {str(result["id"]), str(first_id)}
+        assert menu_model.check_documents(db) == {}
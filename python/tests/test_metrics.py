@@ -0,0 +1,67 @@
+"""/metrics adds up every worker's numbers when they share METRICS_DIR."""
+import pytest
+
+from app.core.metrics import QUERY_BUCKETS, Registry, SharedMetrics, clear_shared_metrics
+
+
+def make_registry() -> Registry:
+    registry = Registry()
+    registry.counter("http_requests_total", "Requests.", ("method", "route", "status"))
+    registry.histogram("http_request_db_queries", "Statements per request.", QUERY_BUCKETS, ("method", "route"))
+    return registry
+
+
+def record(registry: Registry, route: str, queries: int):
+    registry.inc("http_requests_total", ("GET", route, "200"))
+    registry.observe("http_request_db_queries", ("GET", route), queries)
+
+
+@pytest.fixture
+def workers(tmp_path):
+    # Two "worker processes": separate registries, one shared directory
+    started = []
+    for _ in range(2):
+        shared = SharedMetrics(make_registry(), tmp_path, interval=60)
+        shared.start()
+        started.append(shared)
+    yield started
+    for shared in started:
+        shared.stop()
+
+
+def test_render_sums_all_workers(workers):
+    a, b = workers
+    record(a.registry, "/menu/{slug}", 3)
+    record(a.registry, "/menu/{slug}", 3)
+    record(b.registry, "/menu/{slug}", 2)
+    record(b.registry, "/login", 1)
+    b.write()  # a renders its own live numbers plus b's last write
+
+    text = a.render()
+    assert 'http_requests_total{method="GET",route="/menu/{slug}",status="200"} 3' in text
+    assert 'http_requests_total{method="GET",route="/login",status="200"} 1' in text
+    assert 'http_request_db_queries_sum{method="GET",route="/menu/{slug}"} 8' in text
+    assert 'http_request_db_queries_count{method="GET",route="/menu/{slug}"} 3' in text
+    assert 'http_request_db_queries_bucket{method="GET",route="/menu/{slug}",le="2"} 1' in text
+    a.write()
+    assert b.render() == text
+
+
+def test_exited_worker_keeps_counting_until_cleared(workers, tmp_path):
+    a, b = workers
+    record(b.registry, "/login", 1)
+    b.stop()  # writes its final numbers
+    workers.remove(b)
+    assert 'route="/login",status="200"} 1' in a.render()
+
+    a.stop()
+    workers.remove(a)
+    clear_shared_metrics(tmp_path)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_single_process_render_unchanged():
+    registry = make_registry()
+    record(registry, "/login", 1)
+    assert registry.render() == registry.render([])
+    assert "# TYPE http_request_db_queries histogram" in registry.render()
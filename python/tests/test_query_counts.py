@@ -0,0 +1,83 @@
+"""Statement counts of the public menu and the editor list endpoints must not grow with the catalog.
+
+Runs the app against a throwaway database created on the configured Postgres server
+(TEST_DATABASE_URL, else the app's POSTGRES_* settings) with caches and the menu read model
+off (tests/conftest.py), so every request assembles its response from the catalog tables.
+Fails when the server cannot be reached.
+
+    cd python && pip install pytest && python -m pytest -q tests
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event, insert
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import get_db, get_read_db
+from app.core.security import create_access_token
+from app.main import api, app
+from app.models.models import Category, Ingredient, Product, Restaurant, Setting, product_categories, product_ingredients
+
+
+# endpoint -> (URL, statements per request including the restaurant lookup)
+ENDPOINTS = {
+    "public_menu": ("/api/v1/public/menu/{slug}", 7),
+    "categories": ("/api/v1/restaurants/{slug}/categories", 2),
+    "ingredients": ("/api/v1/restaurants/{slug}/ingredients", 2),
+    "products": ("/api/v1/restaurants/{slug}/products", 4),
+    "products_page": ("/api/v1/restaurants/{slug}/products?limit=100", 4),
+}
+
+
+@pytest.fixture
+def env(database):
+    Session = sessionmaker(bind=database, autoflush=False, expire_on_commit=False)
+
+    def session():
+        with Session() as db:
+            yield db
+
+    api.dependency_overrides[get_db] = api.dependency_overrides[get_read_db] = session
+    statements = []
+    event.listen(database, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    yield Session, statements
+    api.dependency_overrides.clear()
+
+
+def seed(Session, slug: str, products: int) -> dict:
+    with Session() as db:
+        rest = Restaurant(name=slug, slug=slug, username=slug, password_hash="x", is_active=True)
+        db.add(rest)
+        db.flush()
+        db.add(Setting(restaurant_id=rest.id, company_name=slug, currency_1="USD", currency_2="EUR", rate=0.9))
+        categories = [Category(restaurant_id=rest.id, name=f"Category {i}") for i in range(5)]
+        ingredients = [Ingredient(restaurant_id=rest.id, name=f"Ingredient {i}") for i in range(20)]
+        items = [Product(restaurant_id=rest.id, name=f"Product {i:04d}", price_currency_1=5 + i % 20) for i in range(products)]
+        db.add_all(categories + ingredients + items)
+        db.flush()
+        db.execute(insert(product_categories), [{"product_id": p.id, "category_id": categories[n % 5].id} for n, p in enumerate(items)])
+        db.execute(insert(product_ingredients), [
+            {"product_id": p.id, "ingredient_id": ingredients[(n + k) % 20].id} for n, p in enumerate(items) for k in range(3)
+        ])
+        db.commit()
+        token = create_access_token(slug, "manager", str(rest.id), slug)
+    return {"Authorization": f"Bearer {token}"}
+
+
+def count(client: TestClient, statements: list, url: str, headers: dict) -> int:
+    client.get(url, headers=headers)  # warm-up: per-process caches (tokens) may add one-off queries
+    statements.clear()
+    response = client.get(url, headers=headers)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("endpoint", sorted(ENDPOINTS))
+def test_statement_count_is_independent_of_catalog_size(env, endpoint):
+    Session, statements = env
+    url, expected = ENDPOINTS[endpoint]
+    client = TestClient(app)
+    counts = {}
+    for slug, products in (("small", 3), ("large", 150)):
+        headers = seed(Session, slug, products)
+        counts[slug] = count(client, statements, url.format(slug=slug), headers)
+    assert counts == {"small": expected, "large": expected}
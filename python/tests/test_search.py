@@ -0,0 +1,115 @@
+"""Menu search: normalization, pg_trgm-compatible trigram similarity and ranking tiers."""
+import importlib.util
+from pathlib import Path
+
+import pytest
+from sqlalchemy import insert, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import sessionmaker
+
+from app.models.models import Category, Ingredient, Product, Restaurant, product_categories
+from app.services import search
+from app.services.restaurants import RestaurantRef
+from app.services.search import SearchIndex, normalize, trigram_sequence, word_similarity
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("Crème Brûlée", "creme brulee"),
+    ("STRAßE", "strasse"),
+    ("Smørrebrød", "smorrebrod"),
+    ("Łódź", "lodz"),
+    ("  Ærø  Ísland ", "  aero  island "),  # spacing kept, like the SQL function
+])
+def test_normalize_matches_lower_unaccent(value, expected):
+    assert normalize(value) == expected
+
+
+def test_trigram_sequence_pads_each_word_like_pg_trgm():
+    assert trigram_sequence("ab c-d") == ["  a", " ab", "ab ", "  c", " c ", "  d", " d "]
+
+
+# Expected values from pg_trgm's word_similarity(query, target)
+@pytest.mark.parametrize("query, target, expected", [
+    ("mushrom", "grilled mushroom risotto", 0.75),
+    ("piza", "pizza margherita", 0.6),
+    ("word", "two words", 0.8),
+    ("creme brulee", "creme brulee tart", 1.0),
+    ("jalapeno 12", "beef cheese jalapeno 1647", 10 / 12),
+    ("sala", "caesar salad", 0.8),
+    ("abc", "xyz", 0.0),
+])
+def test_word_similarity_matches_pg_trgm(query, target, expected):
+    assert word_similarity(set(trigram_sequence(query)), trigram_sequence(target)) == pytest.approx(expected)
+
+
+def test_ranking_tiers_then_kind_then_name():
+    index = SearchIndex([
+        ("product", 1, "Minipizzas"),
+        ("product", 2, "Mini pizza bites"),
+        ("category", 3, "Pizza"),
+        ("product", 4, "Pizza Margherita"),
+        ("ingredient", 5, "Pizze dough"),
+        ("product", 6, "Caesar salad"),
+    ], {})
+    hits = index.search("pizza", limit=10, threshold=0.5)
+    assert [(h.kind, h.id, h.score) for h in hits] == [
+        ("product", 4, 1.0),  # name prefix; products before categories on equal scores
+        ("category", 3, 1.0),
+        ("product", 2, 0.9),  # word prefix
+        ("product", 1, 0.8),  # substring
+        ("ingredient", 5, 0.5333),  # fuzzy: 0.8 x word similarity 4/6 ("  p", " pi", "piz", "izz")
+    ]
+    assert index.search("pizza", limit=2, threshold=0.5) == hits[:2]
+    assert [h.id for h in index.search("pizza", limit=10, threshold=0.7)] == [4, 3, 2, 1]
+
+
+def test_fuzzy_ties_are_not_pruned_before_the_name_tiebreak():
+    # Both score round(0.8 * 10/12, 4); the candidate bound must be rounded the same way
+    index = SearchIndex([("product", 1, "Aa jalapeño 1647"), ("product", 2, "Zz jalapeño 1648")], {})
+    assert [h.name for h in index.search("jalapeno 12", limit=1, threshold=0.5)] == ["Aa jalapeño 1647"]
+
+
+def load_migration(filename: str):
+    # The function and indexes come from the migration itself, so the test follows its changes
+    path = Path(__file__).resolve().parents[1] / "alembic" / "versions" / filename
+    spec = importlib.util.spec_from_file_location(path.stem, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+NAMES = ["Pizza Margherita", "Mini pizza bites", "Minipizzas", "Crème brûlée", "Grilled mushroom risotto",
+         "Caesar salad", "Jalapeño poppers", "Straße burger", "Aa jalapeño 1647", "Zz jalapeño 1648", "100% beef"]
+
+
+def test_sql_search_matches_the_in_process_index(database):
+    # Needs pg_trgm and unaccent (postgresql-contrib) on the test server
+    try:
+        with database.begin() as conn:
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+    except DBAPIError as exc:
+        pytest.skip(f"pg_trgm/unaccent not installable: {exc.orig}")
+    migration = load_migration("20261018_000008_menu_search.py")
+    with database.begin() as conn:
+        conn.execute(text(migration.NORMALIZE))
+        for table in migration.TABLES:
+            conn.execute(text(f"CREATE INDEX ix_{table}_name_trgm ON {table} USING gin (menu_search_normalize(name) gin_trgm_ops)"))
+    Session = sessionmaker(bind=database)
+    with Session() as db:
+        rest = Restaurant(name="s", slug="s", username="s", password_hash="x", is_active=True)
+        db.add(rest)
+        db.flush()
+        products = [Product(restaurant_id=rest.id, name=n, price_currency_1=1) for n in NAMES]
+        category = Category(restaurant_id=rest.id, name="Pizzas")
+        db.add_all(products + [category, Ingredient(restaurant_id=rest.id, name="Mushrooms")])
+        db.flush()
+        db.execute(insert(product_categories), [{"product_id": p.id, "category_id": category.id} for p in products[:3]])
+        db.commit()
+        ref = RestaurantRef(id=rest.id, slug="s", name="s", is_active=True, logo_image=None)
+        assert search.sql_search_available(db)
+        for q in ["pizza", "piza", "mushrom", "creme brulee", "jalapeno 12", "strasse", "100%", "a_b", "xyz"]:
+            query = normalize(q)
+            expected = search._search_python(db, ref, query, 5)
+            assert search._search_sql(db, ref, query, 5) == expected, q
+            db.rollback()
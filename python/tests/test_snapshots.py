@@ -0,0 +1,32 @@
+"""Snapshots can be purged after MENU_SNAPSHOTS_ENABLED is turned off, so none is served stale."""
+import pytest
+
+from app.services import snapshots
+from app.services.storage import LocalStorage
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    storage = LocalStorage(tmp_path)
+    monkeypatch.setattr(snapshots, "storage", storage)
+    for slug in ("pizza", "pizza-2", "gone"):
+        snapshots.write_snapshot(slug, b"{}")
+    return storage
+
+
+def stored(storage) -> list[str]:
+    return sorted(key for key, _ in storage.list("menus/"))
+
+
+def test_purge_one_restaurant(storage):
+    before = stored(storage)
+    own = [key for key in before if key.startswith("menus/pizza.json")]  # .json, .json.gz, .json.br
+    assert snapshots.purge_snapshots(["pizza"]) == len(own)
+    assert stored(storage) == [key for key in before if key not in own]
+    assert "menus/pizza-2.json" in stored(storage)
+
+
+def test_purge_all_including_deleted_restaurants(storage):
+    assert "menus/gone.json" in stored(storage)
+    snapshots.purge_snapshots()
+    assert stored(storage) == []
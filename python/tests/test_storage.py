@@ -0,0 +1,75 @@
+"""Storage backends: LocalStorage on disk, and the URLs S3Storage hands out (signing needs no network)."""
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.core.config import settings
+from app.services.storage import LocalStorage, S3Storage
+
+
+@pytest.fixture
+def local(tmp_path):
+    return LocalStorage(tmp_path / "media")
+
+
+def test_local_round_trip(local, tmp_path):
+    local.put_bytes("c/abc.png", b"png")
+    src = tmp_path / "upload.webp"
+    src.write_bytes(b"webp")
+    local.put_file("c/abc_320w.webp", src)
+    local.put_bytes("menus/r.json", b"{}")
+
+    assert not src.exists()  # put_file takes ownership
+    assert (local.root / "c/abc.png").read_bytes() == b"png"
+    assert (local.root / "c/abc_320w.webp").read_bytes() == b"webp"
+    assert sorted(key for key, _ in local.list("c/abc")) == ["c/abc.png", "c/abc_320w.webp"]
+    assert [key for key, _ in local.list("menus/")] == ["menus/r.json"]
+    assert local.list("missing/") == []
+    assert list(local.staging_dir.iterdir()) == []
+
+    local.delete("c/abc.png")
+    local.delete("c/abc.png")  # already gone is fine
+    assert [key for key, _ in local.list("c/")] == ["c/abc_320w.webp"]
+
+
+@pytest.mark.parametrize("key", ["../outside.png", "c/../../outside.png", "/etc/passwd"])
+def test_local_refuses_keys_outside_root(local, key):
+    with pytest.raises(ValueError):
+        local.put_bytes(key, b"x")
+    with pytest.raises(ValueError):
+        local.delete(key)
+
+
+def test_local_url(local, monkeypatch):
+    assert local.url("c/abc.png") == "/media/c/abc.png"
+    monkeypatch.setattr(settings, "media_public_base_url", "https://cdn.example.com/m/")
+    assert local.url("c/abc.png") == "https://cdn.example.com/m/c/abc.png"
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    for name, value in {
+        "s3_bucket": "menus", "s3_prefix": "/prod/", "s3_endpoint_url": "https://s3.example.com", "s3_region": "eu-west-1",
+        "s3_access_key_id": "AKIDEXAMPLE", "s3_secret_access_key": "secret", "s3_presign_expiry_seconds": 900,
+        "media_public_base_url": "",
+    }.items():
+        monkeypatch.setattr(settings, name, value)
+    return S3Storage()
+
+
+def test_s3_url_is_stable_api_path_when_presigning(s3, monkeypatch):
+    assert s3.url("c/abc.png") == f"{settings.api_v1_prefix}/media/c/abc.png"
+    monkeypatch.setattr(settings, "s3_presign_expiry_seconds", 0)
+    assert s3.url("c/abc.png") == "https://s3.example.com/menus/prod/c/abc.png"
+    monkeypatch.setattr(settings, "media_public_base_url", "https://cdn.example.com")
+    assert s3.url("c/abc.png") == "https://cdn.example.com/c/abc.png"
+
+
+def test_s3_presigned_url(s3):
+    url = urlsplit(s3.presigned_url("c/abc.png"))
+    query = parse_qs(url.query)
+    assert (url.scheme, url.netloc, url.path) == ("https", "s3.example.com", "/menus/prod/c/abc.png")
+    assert query["X-Amz-Expires"] == ["900"]
+    assert query["X-Amz-Credential"][0].startswith("AKIDEXAMPLE/")
+    assert "/eu-west-1/s3/" in query["X-Amz-Credential"][0]
+    assert len(query["X-Amz-Signature"][0]) == 64
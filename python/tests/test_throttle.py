@@ -0,0 +1,42 @@
+"""Login failures counted in Postgres apply one limit across all worker processes."""
+from datetime import timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.core.throttle import DatabaseFailureThrottle
+from app.models.models import LoginFailure
+
+
+def test_workers_share_the_limit(database):
+    # One throttle object per "worker", all on the same database
+    workers = [DatabaseFailureThrottle("user", 3, 300, database) for _ in range(3)]
+    for worker in workers:
+        assert worker.retry_after("alice") == 0
+        worker.fail("alice")
+
+    assert all(0 < w.retry_after("alice") <= 300 for w in workers)
+    assert workers[0].retry_after("bob") == 0
+    assert DatabaseFailureThrottle("ip", 3, 300, database).retry_after("alice") == 0  # scopes are separate
+    assert workers[0].stats()["tracked_keys"] == 1
+
+    workers[1].reset("alice")
+    assert workers[2].retry_after("alice") == 0
+
+
+def test_old_failures_expire_and_are_pruned(database):
+    throttle = DatabaseFailureThrottle("ip", 2, 60, database)
+    with database.begin() as conn:
+        conn.execute(insert(LoginFailure).values([
+            {"scope": "ip", "key": "10.0.0.1", "failed_at": func.now() - timedelta(minutes=10)},
+            {"scope": "ip", "key": "10.0.0.2", "failed_at": func.now() - timedelta(seconds=50)},
+        ]))
+    throttle.fail("10.0.0.1")
+    assert throttle.retry_after("10.0.0.1") == 0  # the 10-minute-old failure no longer counts
+
+    # Blocked until the older of the last two failures is 60 seconds old
+    throttle.fail("10.0.0.2")
+    assert 1 <= throttle.retry_after("10.0.0.2") <= 11
+
+    with database.connect() as conn:
+        remaining = conn.execute(select(func.count()).select_from(LoginFailure)).scalar()
+    assert remaining == 3  # the expired row was deleted by fail()
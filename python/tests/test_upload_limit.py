@@ -0,0 +1,74 @@
+"""Per-route multipart caps, enforced while the body arrives (no Content-Length needed)."""
+import asyncio
+
+from fastapi import FastAPI, File, UploadFile
+
+from app.core.upload_limit import UploadLimitMiddleware
+
+CHUNK = 64 * 1024
+BOUNDARY = "limit-test"
+
+
+def build_app():
+    inner = FastAPI()
+
+    @inner.post("/restaurants/{slug}/products/{product_id}/image")
+    @inner.post("/restaurants/{slug}/catalog/import")
+    @inner.post("/restaurants/{slug}/notes")
+    async def upload(file: UploadFile = File(...)):
+        return {"size": len(await file.read())}
+
+    return UploadLimitMiddleware(inner, limits=[
+        (r"/restaurants/[^/]+/products/\d+/image$", 256 * 1024, "File too large"),
+        (r"/restaurants/[^/]+/catalog/import$", 1024 * 1024, "Import too large"),
+    ])
+
+
+def post_chunked(app, path: str, size: int) -> tuple[int, bytes, int]:
+    # Sends a multipart body of about ``size`` bytes in 64 KB messages without Content-Length;
+    # returns (status, body, request bytes the app pulled)
+    head = (f'--{BOUNDARY}\r\nContent-Disposition: form-data; name="file"; filename="f.bin"\r\n'
+            "Content-Type: application/octet-stream\r\n\r\n").encode()
+    parts = [head] + [b"x" * CHUNK] * (size // CHUNK) + [f"\r\n--{BOUNDARY}--\r\n".encode()]
+    pulled, sent = 0, []
+    scope = {
+        "type": "http", "method": "POST", "path": path, "raw_path": path.encode(), "root_path": "",
+        "query_string": b"", "scheme": "http", "server": ("test", 80), "client": ("127.0.0.1", 1), "http_version": "1.1",
+        "headers": [(b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()), (b"transfer-encoding", b"chunked")],
+    }
+
+    async def receive():
+        nonlocal pulled
+        if not parts:
+            return {"type": "http.disconnect"}
+        body = parts.pop(0)
+        pulled += len(body)
+        return {"type": "http.request", "body": body, "more_body": bool(parts)}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    status = next(m["status"] for m in sent if m["type"] == "http.response.start")
+    return status, b"".join(m.get("body", b"") for m in sent if m["type"] == "http.response.body"), pulled
+
+
+def test_chunked_image_upload_is_cut_off_at_the_limit():
+    status, body, pulled = post_chunked(build_app(), "/restaurants/r/products/1/image", 4 * 1024 * 1024)
+    assert status == 413
+    assert b"File too large" in body
+    assert pulled <= 256 * 1024 + 2 * CHUNK
+
+
+def test_import_has_its_own_limit():
+    app = build_app()
+    status, body, _ = post_chunked(app, "/restaurants/r/catalog/import", 512 * 1024)
+    assert status == 200
+    status, body, _ = post_chunked(app, "/restaurants/r/catalog/import", 2 * 1024 * 1024)
+    assert (status, b"Import too large" in body) == (413, True)
+
+
+def test_other_routes_are_not_limited():
+    status, body, _ = post_chunked(build_app(), "/restaurants/r/notes", 2 * 1024 * 1024)
+    assert status == 200
+    assert body == b'{"size":%d}' % (2 * 1024 * 1024)
@@ -11,4 +11,4 @@ chmod 664 "$BACKEND_LOG"
 fuser -k 8095/tcp 2>/dev/null || true
 
 cd "$BACKEND_DIR"
-/usr/bin/python3 run.py >> "$BACKEND_LOG" 2>&1
+/usr/bin/python3 serve.py >> "$BACKEND_LOG" 2>&1